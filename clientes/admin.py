@@ -1,6 +1,18 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from .models import Client, ClientHistory, Consultor, Motivo, Razao, Responsavel, ReuniaoPreferencia
+from .closed_months import close_months, reopen_months
+from .models import (
+    Client,
+    ClientHistory,
+    ClosedMonth,
+    Consultor,
+    Motivo,
+    OperatorMonthSnapshot,
+    Razao,
+    Responsavel,
+    ReuniaoPreferencia,
+)
+from .utils import add_months
 
 
 @admin.register(Client)
@@ -67,3 +79,51 @@ class ReuniaoPreferenciaAdmin(admin.ModelAdmin):
     )
     list_filter = ("tipo", "horario_pref", "local", "dia_semana_pref")
     search_fields = ("client__nome", "consultor__nome", "responsavel_nome")
+
+
+@admin.register(OperatorMonthSnapshot)
+class OperatorMonthSnapshotAdmin(admin.ModelAdmin):
+    list_display = (
+        "mes",
+        "responsavel",
+        "entradas_quantidade",
+        "saidas_quantidade",
+        "ativos_quantidade",
+        "ativos_valor",
+    )
+    list_filter = ("responsavel",)
+    date_hierarchy = "mes"
+    actions = ["fechar_meses"]
+
+    @admin.action(description="Fechar os meses até o selecionado (inclusive)")
+    def fechar_meses(self, request, queryset):
+        ultimo_mes = max(queryset.values_list("mes", flat=True))
+        try:
+            total = close_months(add_months(ultimo_mes, 1))
+        except ValueError as exc:
+            self.message_user(request, str(exc), messages.ERROR)
+            return
+        self.message_user(request, f"{total} meses fechados até {ultimo_mes:%m/%Y}.", messages.SUCCESS)
+
+
+@admin.register(ClosedMonth)
+class ClosedMonthAdmin(admin.ModelAdmin):
+    list_display = ("mes", "clientes", "receita_total", "receita_ativos", "receita_inativos", "criado_em")
+    date_hierarchy = "mes"
+    actions = ["reabrir_meses"]
+
+    # Closed months are frozen report figures: they are only written by close_months
+    # and only removed by reopen_months, never edited by hand.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Reabrir os meses selecionados (e os seguintes)")
+    def reabrir_meses(self, request, queryset):
+        total = reopen_months(min(queryset.values_list("mes", flat=True)))
+        self.message_user(request, f"{total} meses reabertos.", messages.SUCCESS)
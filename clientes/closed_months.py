@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.db import transaction
+
+from .models import ClosedMonth, ClosedOperatorMonth
+from .report_cache import bump_reports_version
+from .utils import (
+    OperatorReportAccumulator,
+    from_cents,
+    iter_report_clients,
+    month_date_from_index,
+    month_index,
+    month_start,
+)
+
+
+def close_months(until: date) -> int:
+    """Freeze the report figures of every month before ``until`` and return how many were closed.
+
+    Closed months are recomputed from scratch, so calling this again with a later
+    ``until`` simply extends the closed range. Only past months can be closed.
+    """
+    cutoff = month_index(month_start(until))
+    if cutoff > month_index(month_start(date.today())):
+        raise ValueError("Só é possível fechar meses que já terminaram.")
+
+    accumulator = OperatorReportAccumulator(until=cutoff)
+    for client in iter_report_clients():
+        accumulator.add(client)
+
+    first_indices = list(accumulator.months)
+    if accumulator.first_active_index is not None:
+        first_indices.append(accumulator.first_active_index)
+    indices = list(range(min(first_indices), cutoff)) if first_indices else []
+
+    deltas = accumulator.active_deltas
+    months = [
+        ClosedMonth(
+            mes=month_date_from_index(index),
+            clientes=clientes,
+            receita_total=from_cents(total),
+            receita_ativos=from_cents(ativos),
+            receita_inativos=from_cents(inativos),
+        )
+        for index, clientes, total, ativos, inativos in zip(
+            indices, *(deltas.prefix_sums(key, indices) for key in ("clientes", "total", "ativos", "inativos"))
+        )
+    ]
+
+    with transaction.atomic():
+        ClosedMonth.objects.all().delete()
+        ClosedMonth.objects.bulk_create(months, batch_size=500)
+        closed_ids = dict(ClosedMonth.objects.values_list("mes", "id"))
+        rows = []
+        for resp, info in accumulator.operator_data.items():
+            quantities = deltas.prefix_sums((resp, "quantidade"), indices)
+            values = deltas.prefix_sums((resp, "valor"), indices)
+            for index, closed, quantidade, valor in zip(indices, months, quantities, values):
+                entradas = info["entradas"].get(index)
+                saidas = info["saidas"].get(index)
+                if not (entradas or saidas or quantidade or valor):
+                    continue
+                rows.append(
+                    ClosedOperatorMonth(
+                        fechamento_id=closed_ids[closed.mes],
+                        responsavel=resp,
+                        entradas_quantidade=entradas["quantidade"] if entradas else None,
+                        entradas_valor=from_cents(entradas["valor"]) if entradas else None,
+                        saidas_quantidade=saidas["quantidade"] if saidas else None,
+                        saidas_valor=from_cents(saidas["valor"]) if saidas else None,
+                        ativos_quantidade=quantidade,
+                        ativos_valor=from_cents(valor),
+                    )
+                )
+        ClosedOperatorMonth.objects.bulk_create(rows, batch_size=500)
+    bump_reports_version()
+    return len(months)
+
+
+def reopen_months(since: date) -> int:
+    """Unfreeze the closed months from ``since`` on; earlier months stay closed."""
+    _, deleted = ClosedMonth.objects.filter(mes__gte=month_start(since)).delete()
+    reopened = deleted.get(ClosedMonth._meta.label, 0)
+    if reopened:
+        bump_reports_version()
+    return reopened
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, QuerySet
+
+from .models import Client
+from .report_cache import get_reports_version
+
+FACETS_CACHE_KEY = "clientes:facets"
+
+Facets = Dict[str, Dict[object, int]]
+
+
+def client_facets(clients: QuerySet[Client] | None = None) -> Facets:
+    """Number of ``clients`` per status, termômetro level and responsável (by id).
+
+    A single query groups by the three columns together, which yields one row per
+    combination in use (a few dozen); each facet is then summed over the other two.
+    Clients without a linked responsável are counted under ``None``.
+    """
+    if clients is None:
+        clients = Client.objects.all()
+    rows = (
+        clients.order_by()
+        .values("status", "termometro", "responsavel_ref")
+        .annotate(quantidade=Count("id"))
+        .values_list("status", "termometro", "responsavel_ref", "quantidade")
+    )
+    facets: Facets = {"status": {}, "termometro": {}, "responsavel": {}}
+    for status, termometro, responsavel, quantidade in rows:
+        for facet, value in (("status", status), ("termometro", termometro), ("responsavel", responsavel)):
+            facets[facet][value] = facets[facet].get(value, 0) + quantidade
+    return facets
+
+
+def cached_client_facets() -> Facets:
+    """``client_facets`` of every client, cached until the next client write.
+
+    The key carries the reports data version, which the client save/delete signals
+    (and the bulk writes wrapped in ``reports_version_batch``) already bump.
+    """
+    key = f"{FACETS_CACHE_KEY}:{get_reports_version()}"
+    facets = cache.get(key)
+    if facets is None:
+        facets = client_facets()
+        cache.set(key, facets, getattr(settings, "REPORTS_CACHE_TIMEOUT", 60 * 60 * 24))
+    return facets
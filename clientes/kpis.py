@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict
+
+from django.db.models import Count, F, Func, IntegerField, Q, QuerySet, Subquery, Sum
+
+from .models import Client, Responsavel
+
+TERMOMETRO_LEVELS = range(1, 6)
+
+
+class _UngroupedSubquery(Subquery):
+    # An uncorrelated scalar subquery is valid next to the aggregates of an ungrouped
+    # query; aggregate() only accepts it when it claims to be one of them.
+    contains_aggregate = True
+
+
+def client_kpis(clients: QuerySet[Client] | None = None) -> Dict[str, object]:
+    """Headline client indicators computed in a single aggregate query.
+
+    Counts and sums use conditional aggregates over ``clients`` (all clients by
+    default); the number of responsáveis rides along as a scalar subquery.
+    """
+    if clients is None:
+        clients = Client.objects.all()
+    # order_by() drops Meta.ordering: an ORDER BY next to COUNT() is rejected by Postgres.
+    responsaveis = (
+        Responsavel.objects.order_by()
+        .annotate(quantidade=Func(F("id"), function="COUNT", output_field=IntegerField()))
+        .values("quantidade")
+    )
+    values = clients.order_by().aggregate(
+        total=Count("id"),
+        ativos=Count("id", filter=Q(status="ATIVO")),
+        inativos=Count("id", filter=Q(status="INATIVO")),
+        receita_ativa=Sum("valor", filter=Q(status="ATIVO")),
+        permutas=Count("id", filter=Q(permuta=True)),
+        responsaveis=_UngroupedSubquery(responsaveis, output_field=IntegerField()),
+        **{f"termometro_{level}": Count("id", filter=Q(termometro=level)) for level in TERMOMETRO_LEVELS},
+    )
+
+    receita_ativa = values["receita_ativa"] or 0
+    ticket_medio = Decimal("0")
+    if values["ativos"]:
+        ticket_medio = (Decimal(receita_ativa) / values["ativos"]).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+    return {
+        "total": values["total"],
+        "ativos": values["ativos"],
+        "inativos": values["inativos"],
+        "receita_ativa": receita_ativa,
+        "responsaveis": values["responsaveis"],
+        "permutas": values["permutas"],
+        "ticket_medio": ticket_medio,
+        "por_termometro": {level: values[f"termometro_{level}"] for level in TERMOMETRO_LEVELS},
+    }
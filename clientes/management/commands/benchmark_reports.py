@@ -0,0 +1,110 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes import utils
+from clientes.utils import ReportClient, ReportTransfer, ReportValueChange, build_operator_reports
+
+
+def _decimal_cents(value) -> Decimal:
+    # Same cents as utils.to_cents, kept as a Decimal: every sum in the engine becomes Decimal arithmetic.
+    return Decimal(value).scaleb(2).to_integral_value(ROUND_HALF_UP)
+
+
+def _seed_clients(total: int, seed: int):
+    """``total`` in-memory clients with up to 3 transfers and 2 value changes each."""
+    rnd = random.Random(seed)
+    responsaveis = [f"Operador {numero}" for numero in range(12)]
+    today = date.today()
+    clients = []
+    for pk in range(1, total + 1):
+        entrada = today - timedelta(days=rnd.randint(30, 4000))
+        saida = entrada + timedelta(days=rnd.randint(20, 2000)) if rnd.random() < 0.4 else None
+        if saida and saida >= today:
+            saida = None
+        valor = Decimal(rnd.randint(10000, 900000)).scaleb(-2)
+        responsavel = rnd.choice(responsaveis)
+        transferencias = []
+        valores = []
+        data = entrada
+        for _ in range(rnd.randint(0, 3)):
+            data += timedelta(days=rnd.randint(30, 400))
+            if data >= (saida or today):
+                break
+            novo = rnd.choice(responsaveis)
+            transferencias.append(ReportTransfer(data, responsavel, novo))
+            responsavel = novo
+        data = entrada
+        for _ in range(rnd.randint(0, 2)):
+            data += timedelta(days=rnd.randint(60, 500))
+            if data >= (saida or today):
+                break
+            valores.append(ReportValueChange(data, Decimal(rnd.randint(10000, 900000)).scaleb(-2)))
+        clients.append(
+            ReportClient(
+                pk,
+                f"Cliente {pk:06d}",
+                responsavel,
+                "INATIVO" if saida else "ATIVO",
+                entrada,
+                saida,
+                valor,
+                transferencias,
+                valores,
+            )
+        )
+    return clients
+
+
+def _comparable(reports):
+    cashflow = reports["client_cashflow_report"]
+    rows = [(row.name, row.start, row.end, row.segments) for row in cashflow["rows"]]
+    return {**reports, "client_cashflow_report": {**cashflow, "rows": rows}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o motor de relatórios sobre clientes sintéticos gerados em memória (o banco não é "
+        "usado), somando os valores em centavos inteiros e, para comparação, em Decimal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clientes", type=int, default=50000, help="Quantidade de clientes (padrão: 50000).")
+        parser.add_argument(
+            "--repeticoes", type=int, default=7, help="Execuções de cada caminho; vale a melhor (padrão: 7)."
+        )
+        parser.add_argument("--semente", type=int, default=7, help="Semente dos dados sintéticos (padrão: 7).")
+
+    def handle(self, *args, **options):
+        if options["clientes"] < 1 or options["repeticoes"] < 1:
+            raise CommandError("--clientes e --repeticoes devem ser maiores que zero.")
+        clients = _seed_clients(options["clientes"], options["semente"])
+        self.stdout.write(f"{len(clients)} clientes gerados; melhor de {options['repeticoes']} execuções.")
+
+        # A warm-up run, then the two paths alternate so that neither pays for the first
+        # allocations or for drift in the machine's load.
+        build_operator_reports(clients)
+        times = {"cents": [], "decimal": []}
+        for _ in range(options["repeticoes"]):
+            start = time.perf_counter()
+            cents_reports = build_operator_reports(clients)
+            times["cents"].append(time.perf_counter() - start)
+            with mock.patch.object(utils, "to_cents", _decimal_cents):
+                start = time.perf_counter()
+                decimal_reports = build_operator_reports(clients)
+                times["decimal"].append(time.perf_counter() - start)
+        cents_time, decimal_time = min(times["cents"]), min(times["decimal"])
+        self.stdout.write(f"Centavos inteiros: {cents_time:.3f}s")
+        self.stdout.write(f"Decimal:           {decimal_time:.3f}s")
+
+        if _comparable(cents_reports) != _comparable(decimal_reports):
+            raise CommandError("Os dois caminhos produziram relatórios diferentes.")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Relatórios idênticos; tempo em Decimal / em centavos inteiros: {decimal_time / cents_time:.2f}."
+            )
+        )
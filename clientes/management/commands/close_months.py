@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes.closed_months import close_months
+from clientes.utils import month_str_to_date
+
+
+class Command(BaseCommand):
+    help = (
+        "Congela os números dos relatórios (operadores e receita) dos meses anteriores "
+        "ao mês informado; o dashboard passa a recalcular apenas os meses abertos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ate",
+            default="",
+            metavar="AAAA-MM",
+            help="Primeiro mês que continua aberto (padrão: o mês atual).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            until = month_str_to_date(options["ate"]) if options["ate"] else date.today()
+            total = close_months(until)
+        except ValueError as exc:
+            raise CommandError(f"Mês inválido: {options['ate']!r}. {exc}") from exc
+        self.stdout.write(self.style.SUCCESS(f"{total} meses fechados antes de {until:%m/%Y}."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from clientes.snapshots import rebuild_operator_snapshot
+
+
+class Command(BaseCommand):
+    help = "Recalcula do zero a tabela de resumo mensal por operador usada no dashboard."
+
+    def handle(self, *args, **options):
+        total = rebuild_operator_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"{total} linhas de resumo mensal recalculadas."))
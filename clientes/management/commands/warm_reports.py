@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes.models import Client
+from clientes.parallel_reports import build_parallel_reports
+from clientes.report_cache import (
+    get_report_builder,
+    report_build_lock,
+    reports_cache_key,
+    reports_key_prefix,
+    store_cached_reports,
+)
+from clientes.report_file import publish_report_file
+from clientes.snapshots import build_snapshot_reports, operator_snapshot_is_stale, rebuild_operator_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Pré-calcula os relatórios do dashboard com o motor configurado em REPORTS_BACKEND "
+        "e os grava no cache desse motor (ou publica o snapshot binário "
+        "de REPORTS_SNAPSHOT_FILE, quando configurado). Com o motor snapshot, recalcula "
+        "antes a tabela de resumo mensal se ela estiver desatualizada; rode-o no início "
+        "de cada mês (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Número de processos do motor parallel (padrão: REPORTS_PARALLEL_WORKERS; 0 = um por CPU).",
+        )
+        parser.add_argument(
+            "--janela",
+            action="append",
+            default=None,
+            metavar="INICIO:FIM",
+            help="Intervalo de meses (AAAA-MM:AAAA-MM, qualquer lado pode ficar vazio). Pode ser repetido; "
+            "sem ele, aquece a visão padrão do dashboard.",
+        )
+
+    def handle(self, *args, **options):
+        windows = []
+        for janela in options["janela"] or [":"]:
+            inicio, separador, fim = janela.partition(":")
+            if not separador:
+                raise CommandError(f"Janela inválida: {janela!r}. Use INICIO:FIM, por exemplo 2024-01:2024-12.")
+            windows.append((inicio.strip(), fim.strip()))
+
+        builder = get_report_builder()
+        if options["workers"] is not None and builder is not build_parallel_reports:
+            raise CommandError("--workers só se aplica ao motor parallel (REPORTS_BACKEND=parallel).")
+        if builder is build_snapshot_reports and operator_snapshot_is_stale():
+            # The dashboard never rebuilds the table itself; until then it uses the python engine.
+            total = rebuild_operator_snapshot()
+            self.stdout.write(f"Resumo mensal por operador recalculado ({total} linhas).")
+
+        if settings.REPORTS_SNAPSHOT_FILE:
+            publish_report_file(settings.REPORTS_SNAPSHOT_FILE, workers=options["workers"], force=True)
+            self.stdout.write(self.style.SUCCESS(f"Snapshot binário publicado em {settings.REPORTS_SNAPSHOT_FILE}."))
+            return
+
+        build_options = {"workers": options["workers"]} if options["workers"] is not None else {}
+        for month_window in windows:
+            # Holding the lock lets the dashboard serve the previous report meanwhile.
+            with report_build_lock(reports_key_prefix(builder, month_window)):
+                key = reports_cache_key(builder, month_window)
+                reports = builder(Client.objects.all(), month_window, **build_options)
+                store_cached_reports(key, reports)
+        self.stdout.write(self.style.SUCCESS(f"{len(windows)} janela(s) de relatórios gravadas no cache."))
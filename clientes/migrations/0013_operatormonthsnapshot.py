@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0012_agendamentoalinhamento_agendamentofechamento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperatorMonthSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('responsavel', models.CharField(max_length=100)),
+                ('mes', models.DateField()),
+                ('referencia', models.DateField()),
+                ('registros', models.PositiveIntegerField(default=0)),
+                ('entradas_quantidade', models.IntegerField(default=0)),
+                ('entradas_valor', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('saidas_quantidade', models.IntegerField(default=0)),
+                ('saidas_valor', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ativos_quantidade', models.IntegerField(default=0)),
+                ('ativos_valor', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('receita_inativos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['mes', 'responsavel'],
+                'indexes': [models.Index(fields=['mes', 'responsavel'], name='clientes_op_mes_b0c226_idx')],
+                'unique_together': {('responsavel', 'mes')},
+            },
+        ),
+    ]
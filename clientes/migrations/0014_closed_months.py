@@ -0,0 +1,47 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0013_operatormonthsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClosedMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('mes', models.DateField(unique=True)),
+                ('clientes', models.IntegerField(default=0)),
+                ('receita_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('receita_ativos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('receita_inativos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['mes'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ClosedOperatorMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('responsavel', models.CharField(max_length=100)),
+                ('entradas_quantidade', models.IntegerField(blank=True, null=True)),
+                ('entradas_valor', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('saidas_quantidade', models.IntegerField(blank=True, null=True)),
+                ('saidas_valor', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('ativos_quantidade', models.IntegerField(default=0)),
+                ('ativos_valor', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fechamento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operadores', to='clientes.closedmonth')),
+            ],
+            options={
+                'unique_together': {('fechamento', 'responsavel')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def reset_report_snapshots(apps, schema_editor):
+    # Stored figures applied the current valor to every past month; the dashboard
+    # rebuilds the snapshot with the VALOR history on its next load, and closed
+    # months have to be closed again.
+    apps.get_model("clientes", "OperatorMonthSnapshot").objects.all().delete()
+    apps.get_model("clientes", "ClosedMonth").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clientes", "0014_closed_months"),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_report_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:47
+
+from django.db import migrations, models
+
+from clientes.search import create_search_index, drop_search_index, fold_search_text
+
+
+def fill_busca(apps, schema_editor):
+    Client = apps.get_model("clientes", "Client")
+    clients = list(Client.objects.only("id", "nome"))
+    for client in clients:
+        client.busca = fold_search_text(client.nome)
+    Client.objects.bulk_update(clients, ["busca"], batch_size=500)
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0015_reset_report_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='busca',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_busca, migrations.RunPython.noop),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0016_client_busca'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamentoalinhamento',
+            index=models.Index(fields=['mes', 'ano'], name='clientes_ag_mes_3834f5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamentofechamento',
+            index=models.Index(fields=['mes', 'ano'], name='clientes_ag_mes_92091f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['nome'], name='clientes_cl_nome_9e89b5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['status', 'nome'], name='clientes_cl_status_794bd6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['responsavel', 'nome'], name='clientes_cl_respons_a44a26_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['termometro', 'nome'], name='clientes_cl_termome_e1d0be_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['entrada'], name='clientes_cl_entrada_30a0a1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['saida'], name='clientes_cl_saida_99f156_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['valor'], name='clientes_cl_valor_09edf2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clienthistory',
+            index=models.Index(fields=['client', 'tipo', 'data'], name='clientes_cl_client__607612_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clienthistory',
+            index=models.Index(fields=['-data'], name='clientes_cl_data_0206aa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reuniaopreferencia',
+            index=models.Index(fields=['tipo', 'client'], name='clientes_re_tipo_83ec27_idx'),
+        ),
+    ]
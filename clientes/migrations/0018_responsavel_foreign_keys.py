@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-17 03:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Name column -> foreign key, per model.
+RESPONSAVEL_FIELDS = {
+    "Client": {"responsavel": "responsavel_ref"},
+    "ClientHistory": {"responsavel_antigo": "responsavel_antigo_ref", "responsavel_novo": "responsavel_novo_ref"},
+    "ReuniaoPreferencia": {"responsavel_nome": "responsavel_ref"},
+}
+
+
+def link_responsaveis(apps, schema_editor):
+    # Names without a Responsavel row (e.g. removed operators) keep a null key.
+    Responsavel = apps.get_model("clientes", "Responsavel")
+    ids = dict(Responsavel.objects.values_list("nome", "id"))
+    for model_name, fields in RESPONSAVEL_FIELDS.items():
+        model = apps.get_model("clientes", model_name)
+        for name, ref in fields.items():
+            names = set(model.objects.order_by().values_list(name, flat=True).distinct())
+            for nome in names & ids.keys():
+                model.objects.filter(**{name: nome}).update(**{f"{ref}_id": ids[nome]})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0017_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='responsavel_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='clientes', to='clientes.responsavel'),
+        ),
+        migrations.AddField(
+            model_name='clienthistory',
+            name='responsavel_antigo_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='clientes.responsavel'),
+        ),
+        migrations.AddField(
+            model_name='clienthistory',
+            name='responsavel_novo_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='clientes.responsavel'),
+        ),
+        migrations.AddField(
+            model_name='reuniaopreferencia',
+            name='responsavel_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='preferencias_reuniao', to='clientes.responsavel'),
+        ),
+        migrations.RunPython(link_responsaveis, migrations.RunPython.noop),
+    ]
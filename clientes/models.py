@@ -1,5 +1,9 @@
+from typing import Dict, Iterable
+
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+
+from .search import fold_search_text
 
 
 class TimeStampedModel(models.Model):
@@ -24,6 +28,73 @@ class Responsavel(TimeStampedModel):
         return self.nome
 
 
+def responsavel_ids(names: Iterable[str]) -> Dict[str, int]:
+    """Map the given operator names to their ``Responsavel`` ids (unknown names are left out)."""
+    names = {name for name in names if name}
+    if not names:
+        return {}
+    return dict(Responsavel.objects.filter(nome__in=names).values_list("nome", "id"))
+
+
+def link_responsaveis(objs) -> None:
+    """Point the ``Responsavel`` foreign keys of ``objs`` at the operators named in their
+    name columns (``RESPONSAVEL_FIELDS`` maps each name column to its foreign key)."""
+    objs = list(objs)
+    if not objs:
+        return
+    fields = objs[0].RESPONSAVEL_FIELDS
+    ids = responsavel_ids(getattr(obj, name) for obj in objs for name in fields)
+    for obj in objs:
+        for name, ref in fields.items():
+            setattr(obj, f"{ref}_id", ids.get(getattr(obj, name)))
+
+
+class ResponsavelLinkedQuerySet(models.QuerySet):
+    """Keeps the ``Responsavel`` foreign keys in sync with the name columns on the bulk
+    write paths, which skip ``save()``.
+
+    The name columns stay the source of truth while the code moves over to the foreign
+    keys; ``manage.py migrate`` filled them for the existing rows.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        link_responsaveis(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+        refs = [ref for name, ref in self.model.RESPONSAVEL_FIELDS.items() if name in fields]
+        if refs:
+            link_responsaveis(objs)
+            fields.extend(ref for ref in refs if ref not in fields)
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        names = {
+            name: kwargs[name]
+            for name in self.model.RESPONSAVEL_FIELDS
+            if name in kwargs and isinstance(kwargs[name], str)
+        }
+        ids = responsavel_ids(names.values())
+        for name, value in names.items():
+            kwargs[f"{self.model.RESPONSAVEL_FIELDS[name]}_id"] = ids.get(value)
+        return super().update(**kwargs)
+
+
+def _save_with_responsaveis(instance, save, args, kwargs):
+    update_fields = kwargs.get("update_fields")
+    refs = [
+        ref for name, ref in instance.RESPONSAVEL_FIELDS.items() if update_fields is None or name in update_fields
+    ]
+    if refs:
+        link_responsaveis([instance])
+        if update_fields is not None:
+            kwargs["update_fields"] = [*update_fields, *(ref for ref in refs if ref not in update_fields)]
+    return save(*args, **kwargs)
+
+
 class Motivo(TimeStampedModel):
     nome = models.CharField(max_length=150, unique=True)
 
@@ -54,12 +125,45 @@ class Razao(TimeStampedModel):
         return f"{self.nome} ({self.get_tipo_de_historico_display()})"
 
 
+class ClientQuerySet(ResponsavelLinkedQuerySet):
+    """Also keeps ``Client.busca`` in sync on the bulk write paths."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for client in objs:
+            client.busca = fold_search_text(client.nome)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+        if "nome" in fields:
+            for client in objs:
+                client.busca = fold_search_text(client.nome)
+            if "busca" not in fields:
+                fields.append("busca")
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        if isinstance(kwargs.get("nome"), str):
+            kwargs["busca"] = fold_search_text(kwargs["nome"])
+        return super().update(**kwargs)
+
+
 class Client(TimeStampedModel):
     STATUS_CHOICES = [("ATIVO", "Ativo"), ("INATIVO", "Inativo")]
 
     nome = models.CharField(max_length=255)
     termometro = models.PositiveSmallIntegerField(default=3)
     responsavel = models.CharField(max_length=100)
+    responsavel_ref = models.ForeignKey(
+        Responsavel,
+        related_name="clientes",
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+    )
     quer_alinhamento = models.BooleanField(default=False)
     status = models.CharField(max_length=7, choices=STATUS_CHOICES, default="ATIVO")
     entrada = models.DateField()
@@ -68,13 +172,40 @@ class Client(TimeStampedModel):
     permuta = models.BooleanField(default=False)
     motivo = models.CharField(max_length=255, blank=True)
     razao = models.CharField(max_length=255, blank=True)
+    # Accent-free, lowercase words of ``nome``, used by ``clientes.search``.
+    busca = models.TextField(blank=True, editable=False)
+
+    objects = ClientQuerySet.as_manager()
+
+    RESPONSAVEL_FIELDS = {"responsavel": "responsavel_ref"}
 
     class Meta:
         ordering = ["-entrada", "nome"]
+        # The client list sorts on (column, id), which a single-column index already
+        # provides, and its status/responsável/termômetro filters come with the default
+        # sort by name. (status, nome) also serves the active-client meeting screens.
+        indexes = [
+            models.Index(fields=["nome"]),
+            models.Index(fields=["status", "nome"]),
+            models.Index(fields=["responsavel", "nome"]),
+            models.Index(fields=["termometro", "nome"]),
+            models.Index(fields=["entrada"]),
+            models.Index(fields=["saida"]),
+            models.Index(fields=["valor"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.nome} ({self.responsavel})"
 
+    def save(self, *args, **kwargs):
+        self.busca = fold_search_text(self.nome)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "nome" in update_fields and "busca" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "busca"]
+        # The operator snapshot update (pre_save/post_save signals) commits with the row.
+        with transaction.atomic():
+            return _save_with_responsaveis(self, super().save, args, kwargs)
+
 
 class Consultor(TimeStampedModel):
     nome = models.CharField(max_length=100, unique=True)
@@ -133,6 +264,14 @@ class ReuniaoPreferencia(TimeStampedModel):
     )
     observacoes = models.TextField(blank=True)
     responsavel_nome = models.CharField(max_length=100, blank=True)
+    responsavel_ref = models.ForeignKey(
+        Responsavel,
+        related_name="preferencias_reuniao",
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+    )
     consultor = models.ForeignKey(
         Consultor,
         related_name="reunioes",
@@ -141,13 +280,21 @@ class ReuniaoPreferencia(TimeStampedModel):
         on_delete=models.SET_NULL,
     )
 
+    objects = ResponsavelLinkedQuerySet.as_manager()
+
+    RESPONSAVEL_FIELDS = {"responsavel_nome": "responsavel_ref"}
+
     class Meta:
         unique_together = ("client", "tipo")
         ordering = ["client__nome", "tipo"]
+        indexes = [models.Index(fields=["tipo", "client"])]
 
     def __str__(self) -> str:
         return f"{self.client.nome} - {self.get_tipo_display()}"
 
+    def save(self, *args, **kwargs):
+        return _save_with_responsaveis(self, super().save, args, kwargs)
+
 
 class ClientHistory(TimeStampedModel):
     TIPOS = [
@@ -164,6 +311,12 @@ class ClientHistory(TimeStampedModel):
     razao = models.CharField(max_length=255, blank=True)
     responsavel_antigo = models.CharField(max_length=100, blank=True)
     responsavel_novo = models.CharField(max_length=100, blank=True)
+    responsavel_antigo_ref = models.ForeignKey(
+        Responsavel, related_name="+", null=True, blank=True, editable=False, on_delete=models.SET_NULL
+    )
+    responsavel_novo_ref = models.ForeignKey(
+        Responsavel, related_name="+", null=True, blank=True, editable=False, on_delete=models.SET_NULL
+    )
     status_antigo = models.CharField(max_length=7, blank=True)
     status_novo = models.CharField(max_length=7, blank=True)
     termometro_antigo = models.PositiveSmallIntegerField(null=True, blank=True)
@@ -173,12 +326,27 @@ class ClientHistory(TimeStampedModel):
     permuta_antiga = models.BooleanField(null=True, blank=True)
     permuta_nova = models.BooleanField(null=True, blank=True)
 
+    objects = ResponsavelLinkedQuerySet.as_manager()
+
+    RESPONSAVEL_FIELDS = {"responsavel_antigo": "responsavel_antigo_ref", "responsavel_novo": "responsavel_novo_ref"}
+
     class Meta:
         ordering = ["-data"]
+        # Report history is read per client and kind in date order; the dashboard
+        # lists the latest changes.
+        indexes = [
+            models.Index(fields=["client", "tipo", "data"]),
+            models.Index(fields=["-data"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.get_tipo_display()} - {self.client.nome} ({self.data:%d/%m/%Y})"
 
+    def save(self, *args, **kwargs):
+        # The operator snapshot update (pre_save/post_save signals) commits with the row.
+        with transaction.atomic():
+            return _save_with_responsaveis(self, super().save, args, kwargs)
+
     @property
     def descricao_alteracao(self) -> str:
         def _format_permuta(value: bool | None) -> str:
@@ -226,6 +394,7 @@ class AgendamentoAlinhamento(TimeStampedModel):
     class Meta:
         unique_together = ("client", "mes", "ano")
         ordering = ["data_reuniao", "client__nome"]
+        indexes = [models.Index(fields=["mes", "ano"])]
 
     def __str__(self) -> str:
         return f"Alinhamento - {self.client.nome} - {self.mes}/{self.ano}"
@@ -250,6 +419,79 @@ class AgendamentoFechamento(TimeStampedModel):
     class Meta:
         unique_together = ("client", "mes", "ano")
         ordering = ["data_reuniao", "client__nome"]
+        indexes = [models.Index(fields=["mes", "ano"])]
 
     def __str__(self) -> str:
         return f"Fechamento - {self.client.nome} - {self.mes}/{self.ano}"
+
+
+class OperatorMonthSnapshot(TimeStampedModel):
+    """Precomputed operator report figures for one responsável in one month.
+
+    Rows are kept in sync by the Client and ClientHistory model signals and can be rebuilt with
+    ``manage.py rebuild_operator_snapshot``. ``registros`` counts the clients that
+    contribute to the row, so it can be dropped once nothing touches that month.
+    """
+
+    responsavel = models.CharField(max_length=100)
+    mes = models.DateField()
+    referencia = models.DateField()
+    registros = models.PositiveIntegerField(default=0)
+    entradas_quantidade = models.IntegerField(default=0)
+    entradas_valor = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    saidas_quantidade = models.IntegerField(default=0)
+    saidas_valor = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ativos_quantidade = models.IntegerField(default=0)
+    ativos_valor = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    receita_inativos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("responsavel", "mes")
+        ordering = ["mes", "responsavel"]
+        indexes = [models.Index(fields=["mes", "responsavel"])]
+
+    def __str__(self) -> str:
+        return f"{self.responsavel} - {self.mes:%m/%Y}"
+
+
+class ClosedMonth(TimeStampedModel):
+    """A month whose report figures were frozen by ``manage.py close_months``.
+
+    Closed months always form a prefix of the calendar: the report engine computes
+    only the months after the last one and merges in the stored figures. Changes that
+    touch a closed month reopen it together with every later closed month.
+    """
+
+    mes = models.DateField(unique=True)
+    clientes = models.IntegerField(default=0)
+    receita_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    receita_ativos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    receita_inativos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["mes"]
+
+    def __str__(self) -> str:
+        return f"{self.mes:%m/%Y}"
+
+
+class ClosedOperatorMonth(models.Model):
+    """Frozen figures of one responsável in a closed month.
+
+    Empty entradas/saidas columns mean the operator had no such movement that month.
+    """
+
+    fechamento = models.ForeignKey(ClosedMonth, related_name="operadores", on_delete=models.CASCADE)
+    responsavel = models.CharField(max_length=100)
+    entradas_quantidade = models.IntegerField(null=True, blank=True)
+    entradas_valor = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    saidas_quantidade = models.IntegerField(null=True, blank=True)
+    saidas_valor = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    ativos_quantidade = models.IntegerField(default=0)
+    ativos_valor = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("fechamento", "responsavel")
+
+    def __str__(self) -> str:
+        return f"{self.responsavel} - {self.fechamento}"
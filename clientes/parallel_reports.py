@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, List, Tuple
+
+import django
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import QuerySet
+
+from .models import Client
+from .utils import REPORT_CHUNK_SIZE, OperatorReportAccumulator, closed_months_for, iter_report_clients
+
+
+def _build_shard(query, first_id: int, last_id: int, today: date, since: int) -> OperatorReportAccumulator:
+    """Accumulate the clients of ``query`` whose id lies in [first_id, last_id] (runs in a worker)."""
+    clients = Client.objects.all()
+    clients.query = query
+    accumulator = OperatorReportAccumulator(today, since)
+    for client in iter_report_clients(clients.filter(id__gte=first_id, id__lte=last_id)):
+        accumulator.add(client)
+    return accumulator
+
+
+def _run_shards(
+    clients: QuerySet[Client], ranges: List[Tuple[int, int]], today: date, since: int
+) -> List[OperatorReportAccumulator]:
+    # Forked workers must not share the parent's database sockets.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=len(ranges), initializer=django.setup) as executor:
+        futures = [
+            executor.submit(_build_shard, clients.query, first_id, last_id, today, since)
+            for first_id, last_id in ranges
+        ]
+        return [future.result() for future in futures]
+
+
+def split_id_ranges(ids: List[int], shards: int) -> List[Tuple[int, int]]:
+    """Split the sorted ``ids`` into ``shards`` contiguous (first, last) ranges of similar size."""
+    ranges = []
+    for shard in range(shards):
+        chunk = ids[shard * len(ids) // shards:(shard + 1) * len(ids) // shards]
+        if chunk:
+            ranges.append((chunk[0], chunk[-1]))
+    return ranges
+
+
+def _can_fork_queries() -> bool:
+    # Workers open their own connections: they would not see uncommitted rows, nor
+    # an in-memory SQLite database.
+    is_in_memory_db = getattr(connection, "is_in_memory_db", lambda: False)
+    return not connection.in_atomic_block and not is_in_memory_db()
+
+
+def build_parallel_reports(
+    clients: QuerySet[Client] | None = None,
+    month_window: Tuple[str | None, str | None] | None = None,
+    workers: int | None = None,
+) -> Dict[str, object]:
+    """Same result as ``build_operator_reports``, with the clients split by id range
+    across a process pool.
+
+    Every worker fills an ``OperatorReportAccumulator`` for its range; the partial
+    accumulators are merged in the parent and the cashflow rows put back in the
+    order of ``clients``. ``workers`` defaults to ``settings.REPORTS_PARALLEL_WORKERS``
+    (0 means one per CPU). Small sets, and calls inside a transaction, are built
+    in-process.
+    """
+    if clients is None:
+        clients = Client.objects.all()
+    if workers is None:
+        workers = getattr(settings, "REPORTS_PARALLEL_WORKERS", 0)
+    workers = workers or os.cpu_count() or 1
+
+    today = date.today()
+    closed = closed_months_for(clients)
+    since = closed.until if closed else 0
+    client_order = list(clients.values_list("id", flat=True))
+    shards = min(workers, -(-len(client_order) // REPORT_CHUNK_SIZE))
+    if shards <= 1 or not _can_fork_queries():
+        accumulator = OperatorReportAccumulator(today, since)
+        for client in iter_report_clients(clients):
+            accumulator.add(client)
+    else:
+        partials = _run_shards(clients, split_id_ranges(sorted(client_order), shards), today, since)
+        accumulator = partials[0]
+        for partial in partials[1:]:
+            accumulator.merge(partial)
+    if closed is not None:
+        accumulator.merge(closed)
+    return accumulator.report(month_window, client_order)
+
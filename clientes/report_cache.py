@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from typing import Callable, Dict, Iterator, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Client
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process coalescing.
+    fcntl = None
+
+REPORTS_VERSION_KEY = "clientes:reports:version"
+
+# Values accepted by settings.REPORTS_BACKEND; they all return the same structure.
+REPORT_BACKENDS = {
+    "snapshot": "clientes.snapshots.build_snapshot_reports",
+    "python": "clientes.utils.build_operator_reports",
+    "sql": "clientes.sql_reports.build_sql_reports",
+    "parallel": "clientes.parallel_reports.build_parallel_reports",
+}
+
+_local = threading.local()
+
+
+def _store_new_version() -> None:
+    cache.set(REPORTS_VERSION_KEY, time.time_ns(), None)
+
+
+def get_reports_version() -> int:
+    """Return the global data version the cached dashboard reports are tied to."""
+    version = cache.get(REPORTS_VERSION_KEY)
+    if version is None:
+        cache.add(REPORTS_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(REPORTS_VERSION_KEY)
+    return version
+
+
+def bump_reports_version() -> None:
+    """Invalidate every cached report once the current transaction commits."""
+    if getattr(_local, "batch_depth", 0):
+        _local.batch_dirty = True
+        return
+    transaction.on_commit(_store_new_version)
+
+
+@contextmanager
+def reports_version_batch() -> Iterator[None]:
+    """Collapse the version bumps of a bulk write into a single one at the end."""
+    _local.batch_depth = getattr(_local, "batch_depth", 0) + 1
+    try:
+        yield
+    finally:
+        _local.batch_depth -= 1
+        if not _local.batch_depth and getattr(_local, "batch_dirty", False):
+            _local.batch_dirty = False
+            bump_reports_version()
+
+
+def get_report_builder() -> Callable[..., Dict[str, object]]:
+    """Return the report builder selected by ``settings.REPORTS_BACKEND``."""
+    backend = getattr(settings, "REPORTS_BACKEND", "snapshot")
+    if backend not in REPORT_BACKENDS:
+        raise ImproperlyConfigured(
+            f"REPORTS_BACKEND deve ser um de {', '.join(REPORT_BACKENDS)} (recebido: {backend!r})."
+        )
+    return import_string(REPORT_BACKENDS[backend])
+
+
+def reports_key_prefix(
+    build: Callable[..., Dict[str, object]], month_window: Tuple[str | None, str | None] | None
+) -> str:
+    """Version-independent part of the cache key, also used to name the rebuild lock."""
+    window_hash = hashlib.md5(repr(month_window).encode()).hexdigest()
+    return f"clientes:reports:{build.__name__}:{window_hash}"
+
+
+def reports_cache_key(
+    build: Callable[..., Dict[str, object]], month_window: Tuple[str | None, str | None] | None = None
+) -> str:
+    """Cache key of the reports ``build`` returns for ``month_window`` at the current data version.
+
+    The key also carries the current month, since open clients gain an active month
+    whenever the month turns even if no record changed.
+    """
+    return f"{reports_key_prefix(build, month_window)}:{get_reports_version()}:{date.today():%Y-%m}"
+
+
+def _latest_reports_key(key: str) -> str:
+    # Points at the last stored key of the same builder and window, whatever its version.
+    return key.rsplit(":", 2)[0] + ":latest"
+
+
+def store_cached_reports(key: str, reports: Dict[str, object]) -> None:
+    timeout = getattr(settings, "REPORTS_CACHE_TIMEOUT", 60 * 60 * 24)
+    cache.set(key, reports, timeout)
+    cache.set(_latest_reports_key(key), key, timeout)
+
+
+@contextmanager
+def report_build_lock(name: str, blocking: bool = True) -> Iterator[bool]:
+    """Cross-process lock around a report recomputation; yields whether it was acquired.
+
+    It is an ``flock`` on a file in ``settings.REPORTS_LOCK_DIR``, so it covers every
+    worker on the host and is released if the holder dies. With ``blocking=False``
+    a busy lock yields ``False`` right away.
+    """
+    if fcntl is None:
+        yield True
+        return
+    directory = getattr(settings, "REPORTS_LOCK_DIR", "") or tempfile.gettempdir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"reports-{hashlib.md5(name.encode()).hexdigest()}.lock")
+    with open(path, "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def get_cached_reports(
+    build: Callable[..., Dict[str, object]], month_window: Tuple[str | None, str | None] | None = None
+) -> Dict[str, object]:
+    """Return ``build`` over every client for ``month_window``, cached while the data version is unchanged.
+
+    The key only tells the builder and the window apart, so the reports always cover
+    ``Client.objects.all()``; narrower querysets go to the builders directly.
+
+    Only one process rebuilds a given report at a time. Meanwhile the others get the
+    previously cached one with ``"stale": True`` added, or wait for the rebuild when
+    there is none yet.
+    """
+    key = reports_cache_key(build, month_window)
+    reports = cache.get(key)
+    if reports is not None:
+        return reports
+
+    lock_name = reports_key_prefix(build, month_window)
+    with report_build_lock(lock_name, blocking=False) as acquired:
+        if acquired:
+            return _build_cached_reports(build, month_window, key)
+    previous_key = cache.get(_latest_reports_key(key))
+    previous = cache.get(previous_key) if previous_key else None
+    if previous is not None:
+        return {**previous, "stale": True}
+    with report_build_lock(lock_name):
+        return _build_cached_reports(build, month_window, key)
+
+
+def _build_cached_reports(build, month_window, key: str) -> Dict[str, object]:
+    # Called with the lock held: another process may have stored the report meanwhile.
+    reports = cache.get(key)
+    if reports is None:
+        reports = build(Client.objects.all(), month_window)
+        store_cached_reports(key, reports)
+    return reports
@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+
+from .models import Client
+from .parallel_reports import build_parallel_reports
+from .report_cache import get_report_builder, get_reports_version, report_build_lock
+from .utils import (
+    CashflowRow,
+    build_series_reports,
+    cashflow_row_order,
+    from_cents,
+    month_index,
+    month_index_from_key,
+    month_key_from_index,
+    operator_month_buckets,
+    resolve_month_window,
+    to_cents,
+)
+
+# Layout: a header of little-endian int64 counts, then int64 arrays, then the UTF-8 names.
+#   months       [months]                       month indices (year * 12 + month - 1)
+#   operators    [operators, 2]                 name offset, name length (the report's operators
+#                                               first, then those only listed in the totals)
+#   grid         [operators, months, 8]         entradas qtd/cents, saidas qtd/cents, ativos qtd/cents,
+#                                               cumulative qtd/cents at the end of the month
+#   flags        [operators, months]            1 entradas, 2 saidas, 4 ativos bucket present
+#   revenue      [months, 4]                    present, total, ativos, inativos (cents)
+#   totals       [totals, 4]                    operator, ativos, inativos, valor_total (cents)
+#   summary      [months, 6]                    active qtd/cents, entries qtd/cents, exits qtd/cents
+#   rows         [rows, 5]                      name offset, name length, start, end, first segment
+#   segments     [segments, 2]                  position, cents
+MAGIC = b"GCREPORT"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8s10q")
+ENTRADAS, SAIDAS, ATIVOS = 1, 2, 4
+GRID_FIELDS = 8
+# Windows whose cashflow row order is kept per mapped file.
+MAX_CACHED_ORDERS = 32
+
+
+def _encode(reports: Dict[str, object], data_version: int) -> bytes:
+    months = reports["months"]
+    operators = list(reports["operators"])
+    operators += [resp for resp in reports["operator_totals"] if resp not in reports["operators"]]
+    operator_position = {resp: position for position, resp in enumerate(operators)}
+    names = bytearray()
+
+    def add_name(name: str) -> Tuple[int, int]:
+        encoded = name.encode()
+        names.extend(encoded)
+        return len(names) - len(encoded), len(encoded)
+
+    operator_names = [value for resp in operators for value in add_name(resp)]
+    grid = [0] * (len(operators) * len(months) * GRID_FIELDS)
+    flags = [0] * (len(operators) * len(months))
+    for resp, info in reports["operators"].items():
+        base = operator_position[resp] * len(months)
+        # The running balances let a window open its series without the earlier months.
+        cumulative_quantity = cumulative_cents = 0
+        for position, mes in enumerate(months):
+            cell = base + position
+            for flag, bucket in ((ENTRADAS, "entradas"), (SAIDAS, "saidas"), (ATIVOS, "ativos")):
+                values = info[bucket].get(mes)
+                if values is not None:
+                    flags[cell] |= flag
+                    field = (flag.bit_length() - 1) * 2
+                    grid[cell * GRID_FIELDS + field] = values["quantidade"]
+                    grid[cell * GRID_FIELDS + field + 1] = to_cents(values["valor"])
+            offset = cell * GRID_FIELDS
+            cumulative_quantity = max(cumulative_quantity + grid[offset] - grid[offset + 2], 0)
+            cumulative_cents = max(cumulative_cents + grid[offset + 1] - grid[offset + 3], 0)
+            grid[offset + 6], grid[offset + 7] = cumulative_quantity, cumulative_cents
+
+    revenue = []
+    for mes in months:
+        values = reports["monthly_revenue"].get(mes)
+        if values is None:
+            revenue += [0, 0, 0, 0]
+        else:
+            revenue += [1, to_cents(values["total"]), to_cents(values["ativos"]), to_cents(values["inativos"])]
+
+    totals = []
+    for resp, values in reports["operator_totals"].items():
+        totals += [operator_position[resp], values["ativos"], values["inativos"], to_cents(values["valor_total"])]
+
+    cashflow = reports["client_cashflow_report"]
+    summary = cashflow["summary"]
+    summary_columns = [
+        summary["active"]["count"],
+        [to_cents(value) for value in summary["active"]["value"]],
+        summary["entries"]["count"],
+        [to_cents(value) for value in summary["entries"]["value"]],
+        summary["exits"]["count"],
+        [to_cents(value) for value in summary["exits"]["value"]],
+    ]
+    summary_grid = [column[position] for position in range(len(months)) for column in summary_columns]
+
+    rows = []
+    segments = []
+    for row in cashflow["rows"]:
+        rows += [*add_name(row.name), row.start, row.end, len(segments) // 2]
+        for position, value in row.segments:
+            segments += [position, to_cents(value)]
+
+    month_indices = [month_index_from_key(mes) for mes in months]
+    arrays = [month_indices, operator_names, grid, flags, revenue, totals, summary_grid, rows, segments]
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        data_version,
+        month_index(date.today()),
+        len(months),
+        len(operators),
+        len(totals) // 4,
+        len(rows) // 5,
+        len(segments) // 2,
+        len(names),
+        len(reports["operators"]),
+    )
+    body = b"".join(struct.pack(f"<{len(array)}q", *array) for array in arrays)
+    # Pad the names so the whole file can be viewed as int64s.
+    return header + body + bytes(names) + bytes(-len(names) % 8)
+
+
+def write_report_file(path: str, reports: Dict[str, object], data_version: int) -> None:
+    """Write the full (unwindowed) ``reports`` to ``path``, replacing it atomically.
+
+    Readers that already mapped the previous file keep it until they notice the
+    new one, so a snapshot is never seen half written.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, prefix=".reports-")
+    try:
+        with os.fdopen(handle, "wb") as output:
+            output.write(_encode(reports, data_version))
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+
+
+class ReportFile:
+    """Read-only view of a report snapshot written by ``write_report_file``.
+
+    The file is mapped with ``mmap`` and read through ``memoryview`` slices, so
+    every worker shares the page cache instead of holding its own copy, and a
+    request only decodes the months it shows.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            format_version,
+            self.data_version,
+            self.built_month,
+            months,
+            operators,
+            totals,
+            rows,
+            segments,
+            names,
+            self._report_operators,
+        ) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} não é um snapshot de relatórios compatível.")
+        self._months_count = months
+        self._operators_count = operators
+        offset = HEADER.size // 8
+        ints = memoryview(self._map).cast("q")
+        sections = {}
+        for name, size in (
+            ("months", months),
+            ("operators", operators * 2),
+            ("grid", operators * months * GRID_FIELDS),
+            ("flags", operators * months),
+            ("revenue", months * 4),
+            ("totals", totals * 4),
+            ("summary", months * 6),
+            ("rows", rows * 5),
+            ("segments", segments * 2),
+        ):
+            sections[name] = ints[offset:offset + size]
+            offset += size
+        self._sections = sections
+        self._names = memoryview(self._map)[offset * 8:offset * 8 + names]
+        self._orders: Dict[Tuple[int, int], Dict[str, List[int]]] = {}
+
+    def _name(self, start: int, length: int) -> str:
+        return str(self._names[start:start + length], "utf-8")
+
+    def reports(self, month_window: Tuple[str | None, str | None] | None = None) -> Dict[str, object]:
+        """Same structure (and values) as the builder output for ``month_window``.
+
+        Only the window's slice of the month arrays is decoded: the series open at the
+        balances stored for the month before it, and the cashflow rows are decoded
+        when a page reads them.
+        """
+        sections = self._sections
+        month_indices = sections["months"]
+        months_count = self._months_count
+        month_filter = {
+            "start": month_key_from_index(month_indices[0]) if months_count else "",
+            "end": month_key_from_index(month_indices[-1]) if months_count else "",
+        }
+        first, last = 0, months_count
+        display_months = None
+        if month_window is not None:
+            start, end, display_months = resolve_month_window(
+                month_filter["start"], month_filter["end"], *month_window
+            )
+            month_filter = {"start": start, "end": end}
+            if display_months:
+                first = bisect_left(month_indices, month_index_from_key(display_months[0]))
+                last = bisect_right(month_indices, month_index_from_key(display_months[-1]))
+            else:
+                first = last = 0
+        report_indices = list(month_indices[first:last])
+        report_months = [month_key_from_index(index) for index in report_indices]
+        if display_months is None:
+            display_months, display_indices = report_months, report_indices
+        else:
+            display_indices = [month_index_from_key(mes) for mes in display_months]
+
+        grid, flags = sections["grid"], sections["flags"]
+        operator_names = sections["operators"]
+        # Buckets stay keyed by month index, in cents, until the report is assembled.
+        operator_data: Dict[str, Dict[str, Dict[int, Dict[str, int]]]] = {}
+        active: Dict[str, Dict[str, Dict[str, Decimal]]] = {}
+        opening: Dict[str, Tuple[int, int]] = {}
+        operator_totals: Dict[str, Dict[str, object]] = {}
+        names = [
+            self._name(operator_names[position * 2], operator_names[position * 2 + 1])
+            for position in range(self._operators_count)
+        ]
+        for position, resp in enumerate(names[:self._report_operators]):
+            base = position * months_count
+            info = operator_data[resp] = {"entradas": {}, "saidas": {}}
+            active[resp] = {}
+            if first > 0:
+                cell = (base + first - 1) * GRID_FIELDS
+                opening[resp] = (grid[cell + 6], grid[cell + 7])
+            for month_position, cell_flags in enumerate(flags[base + first:base + last], first):
+                if not cell_flags:
+                    continue
+                cell = (base + month_position) * GRID_FIELDS
+                index = month_indices[month_position]
+                if cell_flags & ENTRADAS:
+                    info["entradas"][index] = {"quantidade": grid[cell], "valor": grid[cell + 1]}
+                if cell_flags & SAIDAS:
+                    info["saidas"][index] = {"quantidade": grid[cell + 2], "valor": grid[cell + 3]}
+                if cell_flags & ATIVOS:
+                    active[resp][report_months[month_position - first]] = {
+                        "quantidade": grid[cell + 4],
+                        "valor": from_cents(grid[cell + 5]),
+                    }
+
+        totals = sections["totals"]
+        for position in range(0, len(totals), 4):
+            operator_totals[names[totals[position]]] = {
+                "ativos": totals[position + 1],
+                "inativos": totals[position + 2],
+                "valor_total": from_cents(totals[position + 3]),
+            }
+        revenue = sections["revenue"]
+        monthly_revenue = {}
+        for month_position in range(first, last):
+            cell = month_position * 4
+            if revenue[cell]:
+                monthly_revenue[report_months[month_position - first]] = {
+                    "total": from_cents(revenue[cell + 1]),
+                    "ativos": from_cents(revenue[cell + 2]),
+                    "inativos": from_cents(revenue[cell + 3]),
+                }
+
+        series_reports = build_series_reports(operator_data, display_indices, opening)
+        return {
+            "months": report_months,
+            "display_months": display_months,
+            "month_filter": month_filter,
+            "operators": {
+                resp: {
+                    "entradas": operator_month_buckets(operator_data[resp]["entradas"], report_indices),
+                    "saidas": operator_month_buckets(operator_data[resp]["saidas"], report_indices),
+                    "ativos": active[resp],
+                }
+                for resp in operator_data
+            },
+            "operator_totals": operator_totals,
+            "monthly_revenue": monthly_revenue,
+            "quantity_report": series_reports["quantity_report"],
+            "value_report": series_reports["value_report"],
+            "client_cashflow_report": self._cashflow(report_months, first, last),
+        }
+
+    def _row(self, position: int, first: int, last: int) -> CashflowRow:
+        """Decode cashflow row ``position``, restricted to the months ``first``..``last``."""
+        rows, segments = self._sections["rows"], self._sections["segments"]
+        cell = position * 5
+        segment_stop = rows[cell + 9] if position + 1 < len(rows) // 5 else len(segments) // 2
+        row = CashflowRow(
+            self._name(rows[cell], rows[cell + 1]),
+            rows[cell + 2],
+            rows[cell + 3],
+            [
+                (segments[segment * 2], from_cents(segments[segment * 2 + 1]))
+                for segment in range(rows[cell + 4], segment_stop)
+            ],
+            self._months_count,
+        )
+        return row.window(first, last) if (first, last) != (0, self._months_count) else row
+
+    def _row_order(self, rows: CashflowRows, first: int, last: int) -> Dict[str, List[int]]:
+        """``cashflow_row_order`` of a window, computed once per mapping of the file."""
+        order = self._orders.get((first, last))
+        if order is None:
+            if len(self._orders) >= MAX_CACHED_ORDERS:
+                self._orders.clear()
+            order = self._orders[(first, last)] = cashflow_row_order(rows)
+        return order
+
+    def _cashflow(self, report_months: List[str], first: int, last: int) -> Dict[str, object]:
+        rows = CashflowRows(self, first, last)
+        summary = self._sections["summary"]
+
+        def column(field: int, money: bool) -> List:
+            values = [summary[position * 6 + field] for position in range(first, last)]
+            return [from_cents(value) for value in values] if money else values
+
+        active_value = column(1, True)
+        return {
+            "months": report_months,
+            "rows": rows,
+            "order": self._row_order(rows, first, last),
+            "summary": {
+                "total_value": active_value,
+                "active": {"count": column(0, False), "value": list(active_value)},
+                "entries": {"count": column(2, False), "value": column(3, True)},
+                "exits": {"count": column(4, False), "value": column(5, True)},
+            },
+        }
+
+
+class CashflowRows(Sequence):
+    """The cashflow rows of one window of a ``ReportFile``, decoded when read."""
+
+    def __init__(self, report_file: ReportFile, first: int, last: int) -> None:
+        self._report_file = report_file
+        self._first = first
+        self._last = last
+        self._count = len(report_file._sections["rows"]) // 5
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[item] for item in range(*position.indices(self._count))]
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        return self._report_file._row(position, self._first, self._last)
+
+
+_local = threading.local()
+
+
+def _mapped_report_file(path: str) -> ReportFile | None:
+    """Return this process's mapping of ``path``, remapping once a new file was published."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    cached = getattr(_local, "report_file", None)
+    if cached is None or cached[0] != (path, key):
+        try:
+            cached = ((path, key), ReportFile(path))
+        except ValueError:
+            # Written in an older format: treat it as missing so it gets rebuilt.
+            return None
+        _local.report_file = cached
+    return cached[1]
+
+
+def _is_current(report_file: ReportFile | None, version: int) -> bool:
+    return (
+        report_file is not None
+        and report_file.data_version == version
+        and report_file.built_month == month_index(date.today())
+    )
+
+
+def publish_report_file(path: str, workers: int | None = 1, force: bool = False) -> ReportFile:
+    """Build the reports with the configured engine and publish them to ``path``.
+
+    The rebuild lock is held meanwhile. Unless ``force`` is set, nothing is written
+    when another process published the current version while this one waited for
+    the lock. ``workers`` only applies to the ``parallel`` engine; the default of 1
+    keeps it in this process, as requests must never fork.
+    """
+    build = get_report_builder()
+    options = {"workers": workers} if build is build_parallel_reports else {}
+    with report_build_lock(path):
+        version = get_reports_version()
+        report_file = _mapped_report_file(path)
+        if force or not _is_current(report_file, version):
+            write_report_file(path, build(Client.objects.all(), None, **options), version)
+            report_file = _mapped_report_file(path)
+    return report_file
+
+
+def get_file_reports(month_window: Tuple[str | None, str | None] | None = None) -> Dict[str, object]:
+    """Dashboard reports read from the snapshot file at ``settings.REPORTS_SNAPSHOT_FILE``.
+
+    The file holds the unwindowed output of the ``REPORTS_BACKEND`` engine, and
+    windows are cut on read the same way the engines cut them. When it is missing or
+    was built for another data version or month, one process rebuilds it in-process
+    while the others keep reading the previous file, flagged with ``"stale": True``.
+    """
+    path = str(settings.REPORTS_SNAPSHOT_FILE)
+    report_file = _mapped_report_file(path)
+    if _is_current(report_file, get_reports_version()):
+        return report_file.reports(month_window)
+
+    with report_build_lock(path, blocking=False) as acquired:
+        if not acquired and report_file is not None:
+            return {**report_file.reports(month_window), "stale": True}
+    return publish_report_file(path).reports(month_window)
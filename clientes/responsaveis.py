@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.db import transaction
+
+from .closed_months import reopen_months
+from .models import (
+    Client,
+    ClientHistory,
+    ClosedOperatorMonth,
+    OperatorMonthSnapshot,
+    Responsavel,
+    ReuniaoPreferencia,
+)
+from .report_cache import bump_reports_version
+from .snapshots import rebuild_operator_snapshot
+
+LINKED_MODELS = (Client, ClientHistory, ReuniaoPreferencia)
+
+
+def link_responsavel(responsavel: Responsavel) -> int:
+    """Point the rows that name ``responsavel`` but have no foreign key yet at it."""
+    linked = 0
+    for model in LINKED_MODELS:
+        for name, ref in model.RESPONSAVEL_FIELDS.items():
+            linked += model.objects.filter(**{name: responsavel.nome, f"{ref}__isnull": True}).update(
+                **{ref: responsavel}
+            )
+    if linked:
+        # The client list facets count clients per responsável id.
+        bump_reports_version()
+    return linked
+
+
+def rename_responsavel(responsavel: Responsavel, nome_anterior: str) -> None:
+    """Carry the new name of ``responsavel`` over to the rows that point at it.
+
+    The name columns are rewritten through the foreign keys, and the stored report
+    figures (snapshot and closed months) move to the new name. If the new name already
+    had figures of its own, the snapshot is recomputed and the closed months reopened
+    instead of merging rows.
+    """
+    nome = responsavel.nome
+    with transaction.atomic():
+        for model in LINKED_MODELS:
+            for name, ref in model.RESPONSAVEL_FIELDS.items():
+                model.objects.filter(**{ref: responsavel}).update(**{name: nome})
+        recompute = (
+            OperatorMonthSnapshot.objects.filter(responsavel=nome).exists()
+            or ClosedOperatorMonth.objects.filter(responsavel=nome).exists()
+        )
+        if not recompute:
+            OperatorMonthSnapshot.objects.filter(responsavel=nome_anterior).update(responsavel=nome)
+            ClosedOperatorMonth.objects.filter(responsavel=nome_anterior).update(responsavel=nome)
+    if recompute:
+        reopen_months(date.min)
+        rebuild_operator_snapshot()
+    bump_reports_version()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, List
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+# External-content FTS5 index over ``clientes_client.busca`` (SQLite only). The
+# triggers keep it in sync with every write that reaches the table, including
+# bulk and raw ones.
+FTS_TABLE = "clientes_client_fts"
+TRIGRAM_INDEX = "clientes_client_busca_trgm"
+
+_SQLITE_SEARCH_INDEX = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "busca, content='clientes_client', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON clientes_client BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, busca) VALUES (new.id, new.busca); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON clientes_client BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, busca) VALUES ('delete', old.id, old.busca); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF busca ON clientes_client BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, busca) VALUES ('delete', old.id, old.busca); "
+    f"INSERT INTO {FTS_TABLE}(rowid, busca) VALUES (new.id, new.busca); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+_SQLITE_DROP_SEARCH_INDEX = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+_POSTGRES_SEARCH_INDEX = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON clientes_client USING gin (busca gin_trgm_ops)",
+]
+
+# Per database alias: whether the FTS5 table exists.
+_fts_available: Dict[str, bool] = {}
+
+
+def search_tokens(value: str | None) -> List[str]:
+    """Lowercase, accent-free words of ``value`` ("José da Silva-Sá" -> jose, da, silva, sa)."""
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    return re.findall(r"[^\W_]+", text)
+
+
+def fold_search_text(value: str | None) -> str:
+    """The value stored in ``Client.busca`` for the name ``value``."""
+    return " ".join(search_tokens(value))
+
+
+def _sqlite_has_fts5(connection) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(option == "ENABLE_FTS5" for option, in cursor.fetchall())
+
+
+def create_search_index(connection) -> bool:
+    """Create (or rebuild) the database-side search index; False when the backend has none."""
+    _fts_available.pop(connection.alias, None)
+    if connection.vendor == "sqlite":
+        if not _sqlite_has_fts5(connection):
+            return False
+        statements = _SQLITE_DROP_SEARCH_INDEX + _SQLITE_SEARCH_INDEX
+    elif connection.vendor == "postgresql":
+        statements = _POSTGRES_SEARCH_INDEX
+    else:
+        return False
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    return True
+
+
+def drop_search_index(connection) -> None:
+    _fts_available.pop(connection.alias, None)
+    if connection.vendor == "sqlite":
+        statements = _SQLITE_DROP_SEARCH_INDEX
+    elif connection.vendor == "postgresql":
+        statements = [f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}"]
+    else:
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def restore_search_triggers(connection) -> bool:
+    """Recreate the FTS5 triggers if a migration dropped them; True when it had to.
+
+    SQLite migrations that rebuild ``clientes_client`` (most AlterField/RemoveField
+    operations) drop its triggers along with the old table.
+    """
+    if not _uses_fts(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+            [f"{FTS_TABLE}_a_"],
+        )
+        if cursor.fetchone()[0] == 3:
+            return False
+        for statement in _SQLITE_SEARCH_INDEX:
+            cursor.execute(statement)
+    return True
+
+
+def _uses_fts(connection) -> bool:
+    if connection.vendor != "sqlite":
+        return False
+    if connection.alias not in _fts_available:
+        _fts_available[connection.alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available[connection.alias]
+
+
+def _fts_query(tokens: List[str]) -> str:
+    # Every word must start some word of the name: "jo sil" -> "jo"* "sil"*
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_clients(clients: QuerySet, term: str | None) -> QuerySet:
+    """Restrict ``clients`` to the names with a word starting with each word of ``term``.
+
+    The match ignores case and accents. It goes through the FTS5 index on SQLite; other
+    backends filter ``busca`` with LIKE, which Postgres answers from the trigram index.
+    """
+    tokens = search_tokens(term)
+    if not tokens:
+        return clients
+    connection = connections[clients.db]
+    if _uses_fts(connection):
+        return clients.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [_fts_query(tokens)])
+        )
+    for token in tokens:
+        clients = clients.filter(Q(busca__startswith=token) | Q(busca__contains=f" {token}"))
+    return clients
+
+
+def ranked_clients(clients: QuerySet, term: str | None, limit: int = 10) -> list:
+    """The best ``limit`` matches of ``term`` in ``clients``, most relevant first."""
+    tokens = search_tokens(term)
+    if not tokens:
+        return []
+    connection = connections[clients.db]
+    if _uses_fts(connection):
+        candidates, params = clients.order_by().values("id").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                # A join, not "rowid IN (...)": SQLite would rescan the subquery per match.
+                f"SELECT f.rowid FROM {FTS_TABLE} f JOIN ({candidates}) c ON c.id = f.rowid "
+                f"WHERE {FTS_TABLE} MATCH %s ORDER BY f.rank, f.rowid LIMIT %s",
+                [*params, _fts_query(tokens), limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        found = clients.model._default_manager.in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
+    matches = search_clients(clients, term)
+    if connection.vendor == "postgresql":
+        similarity = RawSQL(f"similarity({clients.model._meta.db_table}.busca, %s)", [" ".join(tokens)])
+        return list(matches.annotate(relevancia=similarity).order_by("-relevancia", "nome", "id")[:limit])
+    return list(matches.order_by("nome", "id")[:limit])
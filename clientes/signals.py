@@ -0,0 +1,78 @@
+from datetime import date
+
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .closed_months import reopen_months
+from .models import Client, ClientHistory, Responsavel
+from .report_cache import bump_reports_version
+from .responsaveis import link_responsavel, rename_responsavel
+from .search import restore_search_triggers
+from .snapshots import mark_operator_snapshot_stale, remember_snapshot_contributions, sync_operator_snapshot
+
+
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=ClientHistory)
+def invalidate_reports_cache(sender, **kwargs) -> None:
+    bump_reports_version()
+
+
+# The operator snapshot follows every save and delete of clients and their history,
+# whether it comes from the views, the admin or the shell. Bulk writes that skip
+# save() (QuerySet.update, bulk_create) are not seen.
+@receiver(pre_save, sender=Client)
+@receiver(pre_save, sender=ClientHistory)
+def remember_saved_client_figures(sender, instance, raw=False, update_fields=None, **kwargs) -> None:
+    if not raw:
+        remember_snapshot_contributions(instance, update_fields)
+
+
+@receiver(pre_delete, sender=Client)
+@receiver(pre_delete, sender=ClientHistory)
+def remember_deleted_client_figures(sender, instance, origin=None, **kwargs) -> None:
+    # History deleted along with its client is accounted for by the client itself.
+    if sender is ClientHistory and (isinstance(origin, Client) or getattr(origin, "model", None) is Client):
+        instance._snapshot_before = None
+        return
+    remember_snapshot_contributions(instance)
+
+
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=ClientHistory)
+def update_operator_snapshot_rows(sender, instance, raw=False, **kwargs) -> None:
+    if raw:
+        # Fixture rows may arrive before the rows they depend on.
+        mark_operator_snapshot_stale()
+        reopen_months(date.min)
+        return
+    changed_since = sync_operator_snapshot(instance)
+    if changed_since:
+        # Back-dated changes unfreeze the closed months from the earliest one they reach,
+        # comparing the stored row with the new one.
+        reopen_months(changed_since)
+
+
+@receiver(pre_save, sender=Responsavel)
+def remember_responsavel_name(sender, instance, **kwargs) -> None:
+    instance._nome_anterior = (
+        Responsavel.objects.filter(pk=instance.pk).values_list("nome", flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Responsavel)
+def sync_responsavel_rows(sender, instance, created, raw=False, **kwargs) -> None:
+    if raw:
+        return
+    nome_anterior = getattr(instance, "_nome_anterior", None)
+    renamed = bool(nome_anterior) and nome_anterior != instance.nome
+    if renamed:
+        rename_responsavel(instance, nome_anterior)
+    if created or renamed:
+        link_responsavel(instance)
+
+
+@receiver(post_migrate)
+def restore_client_search_index(sender, using, **kwargs) -> None:
+    if sender.name == "clientes":
+        restore_search_triggers(connections[using])
@@ -0,0 +1,454 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, Max, Min, Q, QuerySet, Sum
+from django.utils import timezone
+
+from .closed_months import reopen_months
+from .models import Client, ClientHistory, OperatorMonthSnapshot
+from .report_cache import bump_reports_version
+from .utils import (
+    ReportClient,
+    build_operator_reports,
+    build_ownership_timeline,
+    build_series_reports,
+    build_value_timeline,
+    cashflow_report_from_receipts,
+    client_receipts,
+    from_cents,
+    iter_report_clients,
+    month_date_from_index,
+    month_index,
+    month_index_from_key,
+    month_key_from_date,
+    month_key_from_index,
+    month_start,
+    month_str_to_date,
+    operator_month_buckets,
+    resolve_month_window,
+    responsavel_from_timeline,
+    timeline_segments,
+    to_cents,
+    value_at,
+    value_segments,
+)
+
+SNAPSHOT_FIELDS = (
+    "registros",
+    "entradas_quantidade",
+    "entradas_valor",
+    "saidas_quantidade",
+    "saidas_valor",
+    "ativos_quantidade",
+    "ativos_valor",
+    "receita_inativos",
+)
+
+Contributions = Dict[Tuple[str, date], Dict[str, object]]
+
+# History entries the reports read; writing the others never changes the snapshot.
+REPORT_HISTORY_TYPES = ("TRANSFERENCIA", "VALOR")
+
+_local = threading.local()
+
+
+def _empty_snapshot_row() -> Dict[str, object]:
+    return {
+        field: Decimal("0") if field.endswith("_valor") or field == "receita_inativos" else 0
+        for field in SNAPSHOT_FIELDS
+    }
+
+
+def client_snapshot_contributions(client: Client | ReportClient, today: date | None = None) -> Contributions:
+    """Return what a single client adds to each (responsavel, mes) snapshot row.
+
+    Walks the client's ownership and value timelines the way
+    ``OperatorReportAccumulator.add`` does, one row per month the client touches,
+    without assembling a report.
+    """
+    if not isinstance(client, ReportClient):
+        client = ReportClient.from_client(client)
+    today_index = month_index(today or date.today())
+    values = build_value_timeline(client)
+    timeline = build_ownership_timeline(client, client.transferencias)
+    inativo = client.status != "ATIVO"
+    # (responsavel, month index) -> [entradas qtd, cents, saidas qtd, cents, ativos qtd, cents]
+    figures: Dict[Tuple[str, int], List[int]] = {}
+
+    def add(resp: str, index: int, offset: int, quantidade: int, cents: int) -> None:
+        row = figures.setdefault((resp, index), [0] * 6)
+        row[offset] += quantidade
+        row[offset + 1] += cents
+
+    entrada_index = month_index(client.entrada)
+    saida_index = month_index(client.saida) if client.saida else None
+    end_index = max(saida_index - 1, entrada_index) if saida_index is not None else today_index
+    resp_entrada = responsavel_from_timeline(timeline, entrada_index)
+    add(resp_entrada, entrada_index, 0, 1, 0)
+    value_start_index = entrada_index + 1
+    if (saida_index is None or value_start_index <= saida_index - 1) and value_start_index <= today_index:
+        add(resp_entrada, value_start_index, 0, 0, value_at(values, value_start_index))
+
+    current_responsavel = resp_entrada
+    for transferencia in client.transferencias:
+        transfer_index = month_index(transferencia.data)
+        resp_antigo = transferencia.responsavel_antigo or current_responsavel
+        resp_novo = transferencia.responsavel_novo or resp_antigo
+        current_responsavel = resp_novo
+        valor = value_at(values, transfer_index)
+        add(resp_antigo, transfer_index, 2, 1, valor)
+        add(resp_novo, transfer_index, 0, 1, valor)
+
+    if saida_index is not None:
+        add(responsavel_from_timeline(timeline, saida_index), saida_index, 2, 1, value_at(values, end_index))
+
+    for resp, segment_start, segment_end in timeline_segments(timeline, entrada_index, end_index):
+        for index in range(segment_start, segment_end + 1):
+            add(resp, index, 4, 1, 0)
+        for value_start, value_end, cents in value_segments(
+            values, max(segment_start, value_start_index), segment_end
+        ):
+            for index in range(value_start, value_end + 1):
+                add(resp, index, 4, 0, cents)
+
+    contributions: Contributions = {}
+    for (resp, index), row in figures.items():
+        ativos_valor = from_cents(row[5])
+        contributions[(resp, month_date_from_index(index))] = {
+            "registros": 1,
+            "entradas_quantidade": row[0],
+            "entradas_valor": from_cents(row[1]),
+            "saidas_quantidade": row[2],
+            "saidas_valor": from_cents(row[3]),
+            "ativos_quantidade": row[4],
+            "ativos_valor": ativos_valor,
+            "receita_inativos": ativos_valor if inativo else Decimal("0"),
+        }
+    return contributions
+
+
+def merge_snapshot_contributions(target: Contributions, contributions: Contributions) -> Contributions:
+    """Add ``contributions`` into ``target`` (in place) and return it."""
+    for key, values in contributions.items():
+        row = target.setdefault(key, _empty_snapshot_row())
+        for field in SNAPSHOT_FIELDS:
+            row[field] += values[field]
+    return target
+
+
+def update_operator_snapshot(previous: Contributions, current: Contributions) -> None:
+    """Replace a client's ``previous`` contributions with ``current`` ones in the snapshot table."""
+    keys = set(previous) | set(current)
+    if not keys:
+        return
+
+    today_month = month_start(date.today())
+    now = timezone.now()
+    with transaction.atomic():
+        # Locking the rows first waits for a running rebuild_operator_snapshot to commit.
+        existing = {
+            (row.responsavel, row.mes): row
+            for row in OperatorMonthSnapshot.objects.select_for_update().filter(
+                responsavel__in={resp for resp, _ in keys},
+                mes__in={mes for _, mes in keys},
+            )
+        }
+        if operator_snapshot_is_stale():
+            # A stale table is not read; the next rebuild starts over from the clients.
+            return
+        to_create = []
+        to_update = []
+        to_delete = []
+        empty = _empty_snapshot_row()
+        for key in keys:
+            before = previous.get(key, empty)
+            after = current.get(key, empty)
+            row = existing.get(key)
+            if row is None:
+                row = OperatorMonthSnapshot(responsavel=key[0], mes=key[1])
+            for field in SNAPSHOT_FIELDS:
+                setattr(row, field, getattr(row, field) + after[field] - before[field])
+            row.referencia = today_month
+            row.atualizado_em = now
+            if row.registros <= 0:
+                if row.pk:
+                    to_delete.append(row.pk)
+            elif row.pk:
+                to_update.append(row)
+            else:
+                to_create.append(row)
+
+        if to_delete:
+            OperatorMonthSnapshot.objects.filter(pk__in=to_delete).delete()
+        if to_update:
+            OperatorMonthSnapshot.objects.bulk_update(
+                to_update, [*SNAPSHOT_FIELDS, "referencia", "atualizado_em"]
+            )
+        if to_create:
+            OperatorMonthSnapshot.objects.bulk_create(to_create)
+    bump_reports_version()
+
+
+def earliest_changed_month(previous: Contributions, current: Contributions) -> date | None:
+    """First month whose figures differ between ``previous`` and ``current`` contributions."""
+    keys = set(previous) | set(current)
+    return min((mes for resp, mes in keys if previous.get((resp, mes)) != current.get((resp, mes))), default=None)
+
+
+def stored_snapshot_contributions(client_ids: Iterable[int]) -> Contributions:
+    """Merged contributions of the given clients as stored in the database (missing ones add nothing)."""
+    totals: Contributions = {}
+    ids = [pk for pk in client_ids if pk is not None]
+    if ids:
+        for client in iter_report_clients(Client.objects.filter(pk__in=ids)):
+            merge_snapshot_contributions(totals, client_snapshot_contributions(client))
+    return totals
+
+
+def _snapshot_client_ids(instance: Client | ClientHistory, update_fields=None) -> List[int] | None:
+    # Stored clients whose figures writing ``instance`` may change; None when it cannot change any.
+    if isinstance(instance, Client):
+        if update_fields is not None and not set(update_fields) & set(ReportClient.FIELDS):
+            return None
+        return [instance.pk] if instance.pk else []
+    ids = []
+    if instance.pk:
+        stored = ClientHistory.objects.filter(pk=instance.pk).values_list("client_id", "tipo").first()
+        if stored and stored[1] in REPORT_HISTORY_TYPES:
+            ids.append(stored[0])
+    if instance.tipo in REPORT_HISTORY_TYPES and instance.client_id not in ids:
+        ids.append(instance.client_id)
+    return ids or None
+
+
+def remember_snapshot_contributions(instance: Client | ClientHistory, update_fields=None) -> None:
+    """Keep what the clients behind ``instance`` contribute before it is written (pre_save/pre_delete)."""
+    batch = getattr(_local, "batch", None)
+    ids = None if batch and batch["recompute"] else _snapshot_client_ids(instance, update_fields)
+    instance._snapshot_before = None if ids is None else (ids, stored_snapshot_contributions(ids))
+
+
+def sync_operator_snapshot(instance: Client | ClientHistory) -> date | None:
+    """Apply the write of ``instance`` to the snapshot table (post_save/post_delete).
+
+    Returns the first month whose figures changed, if any.
+    """
+    before = getattr(instance, "_snapshot_before", None)
+    if before is None:
+        return None
+    instance._snapshot_before = None
+    ids, previous = before
+    if isinstance(instance, Client) and instance.pk not in ids:
+        ids = [*ids, instance.pk]
+    current = stored_snapshot_contributions(ids)
+    record_snapshot_change(previous, current)
+    return earliest_changed_month(previous, current)
+
+
+def record_snapshot_change(previous: Contributions, current: Contributions) -> None:
+    """``update_operator_snapshot``, deferred to the end of the enclosing ``operator_snapshot_batch``."""
+    batch = getattr(_local, "batch", None)
+    if batch is None:
+        update_operator_snapshot(previous, current)
+    elif not batch["recompute"]:
+        merge_snapshot_contributions(batch["previous"], previous)
+        merge_snapshot_contributions(batch["current"], current)
+
+
+@contextmanager
+def operator_snapshot_batch(recompute: bool = False) -> Iterator[None]:
+    """Apply the snapshot changes of a bulk write in a single update at its end.
+
+    With ``recompute`` the changes are not even computed: the table is dropped at the
+    end, to be recomputed on the next read, and every closed month is reopened. That
+    is cheaper when most clients change.
+    Nothing is applied when the block raises.
+    """
+    batch = getattr(_local, "batch", None)
+    if batch is not None:
+        batch["recompute"] = batch["recompute"] or recompute
+        yield
+        return
+    batch = _local.batch = {"previous": {}, "current": {}, "recompute": recompute}
+    try:
+        yield
+    finally:
+        _local.batch = None
+    if batch["recompute"]:
+        mark_operator_snapshot_stale()
+        reopen_months(date.min)
+    else:
+        update_operator_snapshot(batch["previous"], batch["current"])
+
+
+def mark_operator_snapshot_stale() -> None:
+    """Drop the snapshot table; the dashboard falls back to the python engine until it is rebuilt."""
+    OperatorMonthSnapshot.objects.all().delete()
+    bump_reports_version()
+
+
+def _lock_operator_snapshot() -> None:
+    # Makes update_operator_snapshot (select_for_update) wait for the rebuild to commit.
+    # SQLite needs nothing more: its first write locks the database for the transaction.
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {OperatorMonthSnapshot._meta.db_table} IN EXCLUSIVE MODE")
+
+
+def rebuild_operator_snapshot() -> int:
+    """Recompute the whole snapshot table from the clients and their history.
+
+    The figures are computed inside the transaction that replaces the rows, with the
+    table locked, so every incremental update either committed before the clients were
+    read or is applied on top of the new rows.
+    """
+    today = date.today()
+    today_month = month_start(today)
+    with transaction.atomic():
+        _lock_operator_snapshot()
+        OperatorMonthSnapshot.objects.all().delete()
+        totals: Contributions = {}
+        for client in iter_report_clients():
+            merge_snapshot_contributions(totals, client_snapshot_contributions(client, today))
+        rows = [
+            OperatorMonthSnapshot(responsavel=resp, mes=mes, referencia=today_month, **values)
+            for (resp, mes), values in totals.items()
+        ]
+        OperatorMonthSnapshot.objects.bulk_create(rows, batch_size=500)
+    bump_reports_version()
+    return len(rows)
+
+
+def operator_snapshot_is_stale() -> bool:
+    """Whether the table is empty (see ``mark_operator_snapshot_stale``) or was built in an
+    earlier month, so that it misses the months open clients gained since."""
+    oldest = OperatorMonthSnapshot.objects.aggregate(oldest=Min("referencia"))["oldest"]
+    return oldest is None or oldest < month_start(date.today())
+
+
+def build_snapshot_reports(
+    clients: QuerySet[Client], month_window: Tuple[str | None, str | None] | None = None
+) -> Dict[str, object]:
+    """Same structure as ``build_operator_reports``, read from the snapshot table.
+
+    The per-operator figures come from a single query on ``OperatorMonthSnapshot``
+    (bounded by the end of ``month_window``, with the operators of later months listed
+    by a second one) and the operator totals from one grouped
+    query on the clients. Only the cashflow report, one row per client, still reads the
+    clients' receipt columns.
+
+    A stale table (see ``operator_snapshot_is_stale``) is never rebuilt here: the
+    reports then come from ``build_operator_reports`` until ``warm_reports`` or
+    ``rebuild_operator_snapshot`` recompute it, e.g. from a monthly cron job.
+    """
+    if operator_snapshot_is_stale():
+        return build_operator_reports(clients, month_window)
+
+    snapshots = OperatorMonthSnapshot.objects.order_by("mes", "responsavel")
+    bounds = snapshots.aggregate(first=Min("mes"), last=Max("mes"))
+    first_month = month_key_from_date(bounds["first"]) if bounds["first"] else ""
+    last_month = month_key_from_date(bounds["last"]) if bounds["last"] else ""
+    month_filter = {"start": first_month, "end": last_month}
+    display_months = None
+    window_start = window_end = None
+    if month_window is not None:
+        start, end, display_months = resolve_month_window(first_month, last_month, *month_window)
+        month_filter = {"start": start, "end": end}
+        if display_months:
+            window_end = month_str_to_date(display_months[-1])
+            snapshots = snapshots.filter(mes__lte=window_end)
+            window_start = month_index_from_key(display_months[0])
+        else:
+            snapshots = snapshots.none()
+
+    # Buckets stay keyed by month index, in cents, until the report is assembled.
+    operator_data: Dict[str, Dict[str, Dict[int, Dict[str, int]]]] = {}
+    active: Dict[str, Dict[str, Dict[str, Decimal]]] = {}
+    operator_counts: Dict[str, Dict[str, object]] = {}
+    monthly_revenue: Dict[str, Dict[str, Decimal]] = {}
+
+    def ensure_operator(resp: str) -> Dict[str, Dict[int, Dict[str, int]]]:
+        operator_counts.setdefault(resp, {"ativos": 0, "inativos": 0, "valor_total": Decimal("0")})
+        active.setdefault(resp, {})
+        return operator_data.setdefault(resp, {"entradas": {}, "saidas": {}})
+
+    indices = []
+    months = []
+    for row in snapshots:
+        index = month_index(row.mes)
+        info = ensure_operator(row.responsavel)
+        if row.entradas_quantidade or row.entradas_valor:
+            info["entradas"][index] = {"quantidade": row.entradas_quantidade, "valor": to_cents(row.entradas_valor)}
+        if row.saidas_quantidade or row.saidas_valor:
+            info["saidas"][index] = {"quantidade": row.saidas_quantidade, "valor": to_cents(row.saidas_valor)}
+        if window_start is not None and index < window_start:
+            # Earlier months only feed the opening balance of the cumulative series.
+            continue
+        if not indices or indices[-1] != index:
+            indices.append(index)
+            months.append(month_key_from_index(index))
+        if row.ativos_quantidade > 0:
+            mes = months[-1]
+            active[row.responsavel][mes] = {"quantidade": row.ativos_quantidade, "valor": row.ativos_valor}
+            revenue = monthly_revenue.setdefault(
+                mes, {"total": Decimal("0"), "ativos": Decimal("0"), "inativos": Decimal("0")}
+            )
+            revenue["total"] += row.ativos_valor
+            revenue["ativos"] += row.ativos_valor - row.receita_inativos
+            revenue["inativos"] += row.receita_inativos
+
+    if month_window is not None:
+        # Operators whose rows all come after the window are still listed, as the engines do.
+        later = OperatorMonthSnapshot.objects.order_by()
+        if window_end is not None:
+            later = later.filter(mes__gt=window_end)
+        for resp in later.values_list("responsavel", flat=True).distinct():
+            ensure_operator(resp)
+
+    for row in (
+        clients.order_by()
+        .values("responsavel")
+        .annotate(
+            ativos=Count("id", filter=Q(status="ATIVO")),
+            inativos=Count("id", filter=~Q(status="ATIVO")),
+            valor_total=Sum("valor", output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+    ):
+        ensure_operator(row["responsavel"])
+        operator_counts[row["responsavel"]] = {
+            "ativos": row["ativos"],
+            "inativos": row["inativos"],
+            "valor_total": row["valor_total"],
+        }
+    operator_counts = {resp: operator_counts[resp] for resp in sorted(operator_counts)}
+    receipts = [client_receipts(client) for client in iter_report_clients(clients, transfers=False)]
+
+    if display_months is None:
+        display_months, display_indices = months, indices
+    else:
+        display_indices = [month_index_from_key(mes) for mes in display_months]
+    series_reports = build_series_reports(operator_data, display_indices)
+    return {
+        "months": months,
+        "display_months": display_months,
+        "month_filter": month_filter,
+        "operators": {
+            resp: {
+                "entradas": operator_month_buckets(operator_data[resp]["entradas"], indices),
+                "saidas": operator_month_buckets(operator_data[resp]["saidas"], indices),
+                "ativos": active[resp],
+            }
+            for resp in operator_data
+        },
+        "operator_totals": operator_counts,
+        "monthly_revenue": monthly_revenue,
+        "quantity_report": series_reports["quantity_report"],
+        "value_report": series_reports["value_report"],
+        "client_cashflow_report": cashflow_report_from_receipts(receipts, months, indices),
+    }
@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Tuple
+
+from django.db import connection
+from django.db.models import QuerySet
+
+from .models import Client, ClientHistory
+from .utils import (
+    build_series_reports,
+    cashflow_report_from_receipts,
+    client_receipts,
+    from_cents,
+    iter_report_clients,
+    month_index,
+    month_index_from_key,
+    month_key_from_index,
+    operator_month_buckets,
+    resolve_month_window,
+)
+
+# Open-ended ownership segments are bounded by these month indices.
+FIRST_INDEX = -1
+LAST_INDEX = 1_000_000
+
+
+def _month_index_sql(column: str) -> str:
+    if connection.vendor == "postgresql":
+        return f"(EXTRACT(YEAR FROM {column})::integer * 12 + EXTRACT(MONTH FROM {column})::integer - 1)"
+    return f"(CAST(substr({column}, 1, 4) AS INTEGER) * 12 + CAST(substr({column}, 6, 2) AS INTEGER) - 1)"
+
+
+def _greatest(first: str, second: str) -> str:
+    return f"CASE WHEN {first} > {second} THEN {first} ELSE {second} END"
+
+
+def _months_sql() -> str:
+    """A ``months(idx)`` CTE covering %(lo)s..%(hi)s."""
+    if connection.vendor == "postgresql":
+        return "months(idx) AS (SELECT generate_series(%(lo)s, %(hi)s))"
+    return "months(idx) AS (SELECT %(lo)s UNION ALL SELECT idx + 1 FROM months WHERE idx < %(hi)s)"
+
+
+def _base_sql(client_ids_sql: str) -> str:
+    """CTEs shared by every report query.
+
+    ``timeline`` holds each client's ownership segments (the SQL counterpart of
+    ``build_ownership_timeline``), ``valores`` its value segments (``build_value_timeline``),
+    ``entry_owner`` the responsável at the entry month and ``walk`` the responsáveis on
+    each side of every transfer, resolved the same way ``build_operator_reports`` walks
+    them.
+    """
+    entrada = _month_index_sql("c.entrada")
+    saida = _month_index_sql("c.saida")
+    data = _month_index_sql("h.data")
+    client_table = Client._meta.db_table
+    history_table = ClientHistory._meta.db_table
+    return f"""
+    clients AS (
+        SELECT c.id, c.responsavel, c.status,
+               CAST(ROUND(c.valor * 100) AS BIGINT) AS cents,
+               {entrada} AS start_idx,
+               CASE WHEN c.saida IS NULL THEN %(today)s ELSE {_greatest(f"{saida} - 1", entrada)} END AS end_idx,
+               CASE WHEN c.saida IS NULL THEN NULL ELSE {saida} END AS saida_idx
+        FROM {client_table} c
+        WHERE c.id IN ({client_ids_sql})
+    ),
+    transfers AS (
+        SELECT h.client_id, {data} AS idx, h.responsavel_antigo AS antigo, h.responsavel_novo AS novo,
+               ROW_NUMBER() OVER (PARTITION BY h.client_id ORDER BY h.data, h.id) AS n,
+               LEAD({data}) OVER (PARTITION BY h.client_id ORDER BY h.data, h.id) AS next_idx
+        FROM {history_table} h
+        JOIN clients cl ON cl.id = h.client_id
+        WHERE h.tipo = 'TRANSFERENCIA'
+    ),
+    chain AS (
+        SELECT t.client_id, t.n, t.idx, t.next_idx,
+               CAST(COALESCE(NULLIF(t.novo, ''), NULLIF(t.antigo, ''), cl.responsavel) AS TEXT) AS resp
+        FROM transfers t
+        JOIN clients cl ON cl.id = t.client_id
+        WHERE t.n = 1
+        UNION ALL
+        SELECT t.client_id, t.n, t.idx, t.next_idx, CAST(COALESCE(NULLIF(t.novo, ''), chain.resp) AS TEXT)
+        FROM transfers t
+        JOIN chain ON chain.client_id = t.client_id AND t.n = chain.n + 1
+    ),
+    timeline AS (
+        SELECT cl.id AS client_id, CAST(COALESCE(NULLIF(t.antigo, ''), cl.responsavel) AS TEXT) AS resp,
+               {FIRST_INDEX} AS seg_start, COALESCE(t.idx - 1, {LAST_INDEX}) AS seg_end
+        FROM clients cl
+        LEFT JOIN transfers t ON t.client_id = cl.id AND t.n = 1
+        UNION ALL
+        SELECT client_id, resp, idx, COALESCE(next_idx - 1, {LAST_INDEX})
+        FROM chain
+    ),
+    changes AS (
+        SELECT h.client_id, {data} AS idx, CAST(ROUND(h.valor_antigo * 100) AS BIGINT) AS cents,
+               ROW_NUMBER() OVER (PARTITION BY h.client_id ORDER BY h.data, h.id) AS n,
+               LEAD({data}) OVER (PARTITION BY h.client_id ORDER BY h.data, h.id) AS next_idx,
+               LEAD(CAST(ROUND(h.valor_antigo * 100) AS BIGINT))
+                   OVER (PARTITION BY h.client_id ORDER BY h.data, h.id) AS next_cents
+        FROM {history_table} h
+        JOIN clients cl ON cl.id = h.client_id
+        WHERE h.tipo = 'VALOR' AND h.valor_antigo IS NOT NULL
+    ),
+    valores AS (
+        SELECT cl.id AS client_id, {FIRST_INDEX} AS val_start, COALESCE(c.idx - 1, {LAST_INDEX}) AS val_end,
+               COALESCE(c.cents, cl.cents) AS cents
+        FROM clients cl
+        LEFT JOIN changes c ON c.client_id = cl.id AND c.n = 1
+        UNION ALL
+        SELECT c.client_id, c.idx, COALESCE(c.next_idx - 1, {LAST_INDEX}), COALESCE(c.next_cents, cl.cents)
+        FROM changes c
+        JOIN clients cl ON cl.id = c.client_id
+    ),
+    entry_owner AS (
+        SELECT cl.id, cl.start_idx, cl.saida_idx, tl.resp AS resp_entrada
+        FROM clients cl
+        JOIN timeline tl ON tl.client_id = cl.id AND cl.start_idx BETWEEN tl.seg_start AND tl.seg_end
+    ),
+    walk AS (
+        SELECT t.client_id, t.n, t.idx,
+               CAST(COALESCE(NULLIF(t.antigo, ''), eo.resp_entrada) AS TEXT) AS resp_antigo,
+               CAST(COALESCE(NULLIF(t.novo, ''), NULLIF(t.antigo, ''), eo.resp_entrada) AS TEXT) AS resp_novo
+        FROM transfers t
+        JOIN entry_owner eo ON eo.id = t.client_id
+        WHERE t.n = 1
+        UNION ALL
+        SELECT t.client_id, t.n, t.idx,
+               CAST(COALESCE(NULLIF(t.antigo, ''), walk.resp_novo) AS TEXT),
+               CAST(COALESCE(NULLIF(t.novo, ''), NULLIF(t.antigo, ''), walk.resp_novo) AS TEXT)
+        FROM transfers t
+        JOIN walk ON walk.client_id = t.client_id AND t.n = walk.n + 1
+    )
+    """
+
+
+def _events_sql(base: str) -> str:
+    """Entradas/saidas per (bucket, responsavel, month), over every month."""
+    return f"""
+    WITH RECURSIVE {base},
+    events AS (
+        SELECT 'entradas' AS bucket, resp_entrada AS resp, start_idx AS idx, 1 AS quantidade, 0 AS cents
+        FROM entry_owner
+        UNION ALL
+        SELECT 'entradas', eo.resp_entrada, eo.start_idx + 1, 0, v.cents
+        FROM entry_owner eo
+        JOIN valores v ON v.client_id = eo.id AND eo.start_idx + 1 BETWEEN v.val_start AND v.val_end
+        WHERE (eo.saida_idx IS NULL OR eo.start_idx + 1 <= eo.saida_idx - 1) AND eo.start_idx + 1 <= %(today)s
+        UNION ALL
+        SELECT 'saidas', w.resp_antigo, w.idx, 1, v.cents
+        FROM walk w
+        JOIN valores v ON v.client_id = w.client_id AND w.idx BETWEEN v.val_start AND v.val_end
+        UNION ALL
+        SELECT 'entradas', w.resp_novo, w.idx, 1, v.cents
+        FROM walk w
+        JOIN valores v ON v.client_id = w.client_id AND w.idx BETWEEN v.val_start AND v.val_end
+        UNION ALL
+        SELECT 'saidas', tl.resp, cl.saida_idx, 1, v.cents
+        FROM clients cl
+        JOIN timeline tl ON tl.client_id = cl.id AND cl.saida_idx BETWEEN tl.seg_start AND tl.seg_end
+        JOIN valores v ON v.client_id = cl.id AND cl.end_idx BETWEEN v.val_start AND v.val_end
+        WHERE cl.saida_idx IS NOT NULL
+    )
+    SELECT bucket, resp, idx, SUM(quantidade), SUM(cents)
+    FROM events
+    GROUP BY bucket, resp, idx
+    """
+
+
+def _operators_sql(base: str) -> str:
+    """Every responsável the Python engine registers, besides those with movements."""
+    return f"""
+    WITH RECURSIVE {base}
+    SELECT DISTINCT tl.resp
+    FROM clients cl
+    JOIN timeline tl ON tl.client_id = cl.id
+    WHERE {_greatest("tl.seg_start", "cl.start_idx")} <= CASE WHEN tl.seg_end < cl.end_idx THEN tl.seg_end ELSE cl.end_idx END
+    UNION
+    SELECT responsavel FROM clients
+    """
+
+
+def _active_sql(base: str) -> str:
+    """Active clients and value per (responsavel, month) inside %(lo)s..%(hi)s."""
+    return f"""
+    WITH RECURSIVE {base}, {_months_sql()}
+    SELECT tl.resp, m.idx, COUNT(*), SUM(CASE WHEN m.idx > cl.start_idx THEN v.cents ELSE 0 END)
+    FROM clients cl
+    JOIN timeline tl ON tl.client_id = cl.id
+    JOIN months m ON m.idx BETWEEN cl.start_idx AND cl.end_idx AND m.idx BETWEEN tl.seg_start AND tl.seg_end
+    JOIN valores v ON v.client_id = cl.id AND m.idx BETWEEN v.val_start AND v.val_end
+    GROUP BY tl.resp, m.idx
+    """
+
+
+def _revenue_sql(base: str) -> str:
+    """Active clients and revenue per month inside %(lo)s..%(hi)s."""
+    return f"""
+    WITH RECURSIVE {base}, {_months_sql()}
+    SELECT m.idx, COUNT(*),
+           SUM(CASE WHEN m.idx > cl.start_idx THEN v.cents ELSE 0 END),
+           SUM(CASE WHEN m.idx > cl.start_idx AND cl.status = 'ATIVO' THEN v.cents ELSE 0 END),
+           SUM(CASE WHEN m.idx > cl.start_idx AND cl.status <> 'ATIVO' THEN v.cents ELSE 0 END)
+    FROM clients cl
+    JOIN months m ON m.idx BETWEEN cl.start_idx AND cl.end_idx
+    JOIN valores v ON v.client_id = cl.id AND m.idx BETWEEN v.val_start AND v.val_end
+    GROUP BY m.idx
+    """
+
+
+def _counts_sql(base: str) -> str:
+    return f"""
+    WITH RECURSIVE {base}
+    SELECT responsavel,
+           SUM(CASE WHEN status = 'ATIVO' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN status = 'ATIVO' THEN 0 ELSE 1 END),
+           SUM(cents)
+    FROM clients
+    GROUP BY responsavel
+    """
+
+
+def _bounds_sql(base: str) -> str:
+    return f"""
+    WITH RECURSIVE {base}
+    SELECT MIN(start_idx), MAX(end_idx) FROM clients WHERE start_idx <= end_idx
+    """
+
+
+def _fetch(sql: str, params: Dict[str, object]) -> List[Tuple]:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def build_sql_reports(
+    clients: QuerySet[Client], month_window: Tuple[str | None, str | None] | None = None
+) -> Dict[str, object]:
+    """Same structure as ``build_operator_reports``, aggregated by the database.
+
+    The ownership timeline, the month expansion (``generate_series`` on PostgreSQL, a
+    recursive CTE elsewhere) and the grouping per responsável and month all run in
+    SQL; Python only reshapes the grouped rows and builds the cumulative series.
+    """
+    ids_sql, ids_params = clients.order_by().values("id").query.sql_with_params()
+    if ids_params:
+        # Inline the filter's parameters as named ones so every query can share them.
+        names = [f"client_param_{position}" for position in range(len(ids_params))]
+        ids_sql = ids_sql % tuple(f"%({name})s" for name in names)
+        params = dict(zip(names, ids_params))
+    else:
+        params = {}
+    today_index = month_index(date.today())
+    params["today"] = today_index
+    base = _base_sql(ids_sql)
+
+    # Buckets stay keyed by month index, in cents, until the report is assembled.
+    operator_data: Dict[str, Dict[str, Dict[int, Dict[str, int]]]] = {}
+    active: Dict[str, Dict[str, Dict[str, object]]] = {}
+
+    def ensure_operator(resp: str) -> Dict[str, Dict[int, Dict[str, int]]]:
+        active.setdefault(resp, {})
+        return operator_data.setdefault(resp, {"entradas": {}, "saidas": {}})
+
+    months = set()
+    for bucket, resp, index, quantidade, cents in _fetch(_events_sql(base), params):
+        months.add(index)
+        ensure_operator(resp)[bucket][index] = {"quantidade": int(quantidade), "valor": int(cents)}
+    for (resp,) in _fetch(_operators_sql(base), params):
+        ensure_operator(resp)
+
+    first_active, last_active = _fetch(_bounds_sql(base), params)[0]
+    candidates = list(months)
+    if first_active is not None:
+        candidates += [first_active, last_active]
+    month_filter = {
+        "start": month_key_from_index(min(candidates)) if candidates else "",
+        "end": month_key_from_index(max(candidates)) if candidates else "",
+    }
+
+    display_months = None
+    if month_window is not None:
+        start, end, display_months = resolve_month_window(month_filter["start"], month_filter["end"], *month_window)
+        month_filter = {"start": start, "end": end}
+        window = (
+            (month_index_from_key(display_months[0]), month_index_from_key(display_months[-1]))
+            if display_months
+            else None
+        )
+    else:
+        window = (min(candidates), max(candidates)) if candidates else None
+
+    revenue: Dict[int, Dict[str, object]] = {}
+    if window:
+        first, last = window
+        months = {index for index in months if first <= index <= last}
+        params["lo"], params["hi"] = first, last
+        for index, active_clients, total, ativos, inativos in _fetch(_revenue_sql(base), params):
+            if active_clients > 0:
+                months.add(index)
+                revenue[index] = {
+                    "total": from_cents(int(total)),
+                    "ativos": from_cents(int(ativos)),
+                    "inativos": from_cents(int(inativos)),
+                }
+        for resp, index, quantidade, cents in _fetch(_active_sql(base), params):
+            ensure_operator(resp)
+            active[resp][index] = {"quantidade": int(quantidade), "valor": from_cents(int(cents))}
+    else:
+        months = set()
+    report_indices = sorted(months)
+    report_months = [month_key_from_index(index) for index in report_indices]
+    monthly_revenue = {
+        mes: revenue[index] for index, mes in zip(report_indices, report_months) if index in revenue
+    }
+
+    operator_counts = defaultdict(lambda: {"ativos": 0, "inativos": 0, "valor_total": from_cents(0)})
+    for resp in operator_data:
+        operator_counts[resp]
+    for resp, ativos, inativos, cents in _fetch(_counts_sql(base), params):
+        operator_counts[resp] = {
+            "ativos": int(ativos),
+            "inativos": int(inativos),
+            "valor_total": from_cents(int(cents)),
+        }
+
+    receipts = [client_receipts(client) for client in iter_report_clients(clients, transfers=False)]
+    if display_months is None:
+        display_months, display_indices = report_months, report_indices
+    else:
+        display_indices = [month_index_from_key(mes) for mes in display_months]
+    series_reports = build_series_reports(operator_data, display_indices)
+    return {
+        "months": report_months,
+        "display_months": display_months,
+        "month_filter": month_filter,
+        "operators": {
+            resp: {
+                "entradas": operator_month_buckets(operator_data[resp]["entradas"], report_indices),
+                "saidas": operator_month_buckets(operator_data[resp]["saidas"], report_indices),
+                "ativos": {month_key_from_index(index): active[resp][index] for index in sorted(active[resp])},
+            }
+            for resp in operator_data
+        },
+        "operator_totals": dict(operator_counts),
+        "monthly_revenue": monthly_revenue,
+        "quantity_report": series_reports["quantity_report"],
+        "value_report": series_reports["value_report"],
+        "client_cashflow_report": cashflow_report_from_receipts(receipts, report_months, report_indices),
+    }
@@ -1,3 +1,909 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models.signals import post_migrate
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clientes.models import (
+    AgendamentoAlinhamento,
+    AgendamentoFechamento,
+    Client,
+    ClientHistory,
+    ClosedMonth,
+    ClosedOperatorMonth,
+    OperatorMonthSnapshot,
+    Responsavel,
+    ReuniaoPreferencia,
+)
+from clientes.closed_months import close_months
+from clientes.facets import cached_client_facets, client_facets
+from clientes.kpis import client_kpis
+from clientes import parallel_reports
+from clientes.parallel_reports import build_parallel_reports
+from clientes.report_cache import (
+    bump_reports_version,
+    get_cached_reports,
+    get_report_builder,
+    get_reports_version,
+    report_build_lock,
+    reports_cache_key,
+    reports_key_prefix,
+    reports_version_batch,
+)
+from clientes.report_file import ReportFile, write_report_file
+from clientes.search import FTS_TABLE, ranked_clients, search_clients
+from clientes.snapshots import build_snapshot_reports, operator_snapshot_is_stale, rebuild_operator_snapshot
+from clientes.sql_reports import build_sql_reports
+from clientes.views import CLIENT_SORT_FIELDS, _dashboard_month_window, _paginate_clients
+from clientes.utils import build_operator_reports, iter_report_clients
+
+MONTH_WINDOWS = [
+    None,
+    ("", ""),
+    ("2022-03", "2023-06"),
+    ("2023-06", "2022-03"),
+    ("abc", "2022-13"),
+    ("2023-03", "2023-03"),
+]
+
+# Report tests keep the cache and the rebuild locks out of BASE_DIR/.cache.
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+report_settings = override_settings(CACHES=LOCMEM_CACHES, REPORTS_LOCK_DIR=tempfile.gettempdir())
+
+
+def comparable(reports):
+    """``reports`` with the cashflow rows (which have no ``__eq__``) turned into tuples."""
+    cashflow = reports["client_cashflow_report"]
+    rows = [(row.name, row.values, row.total) for row in cashflow["rows"]]
+    return {**reports, "client_cashflow_report": {**cashflow, "rows": rows}}
+
+
+def create_report_clients():
+    """Clients and history covering the edge cases of the report engines."""
+    today = date.today()
+
+    def client(nome, responsavel, entrada, valor, saida=None):
+        return Client.objects.create(
+            nome=nome,
+            responsavel=responsavel,
+            status="INATIVO" if saida else "ATIVO",
+            entrada=entrada,
+            saida=saida,
+            valor=Decimal(valor),
+        )
+
+    def history(target, tipo, data, **fields):
+        ClientHistory.objects.create(client=target, tipo=tipo, data=data, motivo="teste", **fields)
+
+    transferido = client("Transferido", "Bruno", date(2022, 1, 10), "1000.00")
+    history(transferido, "TRANSFERENCIA", date(2022, 6, 15), responsavel_antigo="Ana", responsavel_novo="Bruno")
+
+    sem_nomes = client("Sem nomes", "Carla", date(2021, 11, 3), "250.50")
+    history(sem_nomes, "TRANSFERENCIA", date(2022, 4, 1), responsavel_antigo="", responsavel_novo="Davi")
+    history(sem_nomes, "TRANSFERENCIA", date(2022, 9, 20), responsavel_antigo="Davi", responsavel_novo="")
+    history(sem_nomes, "TRANSFERENCIA", date(2023, 1, 5), responsavel_antigo="Davi", responsavel_novo="Carla")
+
+    mesmo_mes = client("Mesmo mês", "Ana", date(2022, 12, 1), "780.00")
+    history(mesmo_mes, "TRANSFERENCIA", date(2023, 3, 2), responsavel_antigo="Bruno", responsavel_novo="Carla")
+    history(mesmo_mes, "TRANSFERENCIA", date(2023, 3, 20), responsavel_antigo="Carla", responsavel_novo="Ana")
+
+    client("Futuro", "Ana", today + timedelta(days=62), "300.00")
+    client("Saiu no mês", "Bruno", date(2023, 5, 3), "410.00", saida=date(2023, 5, 28))
+    client("Saiu no mês seguinte", "Carla", date(2023, 5, 30), "95.90", saida=date(2023, 6, 2))
+    client("Antigo inativo", "Davi", date(2020, 2, 14), "1200.00", saida=date(2022, 8, 31))
+    client("Entrou agora", "Bruno", today.replace(day=1), "60.00")
+    client("Sem valor", "Eva", date(2021, 3, 5), "0.00")
+    # Fabio only shows up after most windows end and is nobody's current responsável.
+    passou_adiante = client("Passou adiante", "Ana", date(2024, 2, 1), "120.00")
+    history(passou_adiante, "TRANSFERENCIA", date(2024, 6, 3), responsavel_antigo="Fabio", responsavel_novo="Ana")
+
+    reajustado = client("Reajustado", "Ana", date(2021, 7, 1), "900.00")
+    history(reajustado, "VALOR", date(2022, 2, 10), valor_antigo=Decimal("500.00"), valor_novo=Decimal("650.00"))
+    history(reajustado, "VALOR", date(2022, 8, 5), valor_antigo=Decimal("650.00"), valor_novo=Decimal("700.00"))
+    history(reajustado, "VALOR", date(2022, 8, 25), valor_antigo=Decimal("700.00"), valor_novo=Decimal("900.00"))
+    history(reajustado, "VALOR", date(2023, 2, 1), valor_antigo=None, valor_novo=Decimal("900.00"))
+    history(reajustado, "TRANSFERENCIA", date(2022, 8, 10), responsavel_antigo="Ana", responsavel_novo="Bruno")
+    history(reajustado, "TRANSFERENCIA", date(2023, 4, 10), responsavel_antigo="Bruno", responsavel_novo="Ana")
+
+
+@report_settings
+class ReportBackendParityTests(TestCase):
+    """Every report engine must return what ``build_operator_reports`` returns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_report_clients()
+        # From here on the model signals keep the table current.
+        rebuild_operator_snapshot()
+
+    def setUp(self):
+        handle, self.report_path = tempfile.mkstemp(suffix=".bin")
+        os.close(handle)
+        self.addCleanup(os.unlink, self.report_path)
+
+    def builders(self):
+        write_report_file(self.report_path, build_operator_reports(Client.objects.all()), 1)
+        report_file = ReportFile(self.report_path)
+        return {
+            "sql": lambda window: build_sql_reports(Client.objects.all(), window),
+            "snapshot": lambda window: build_snapshot_reports(Client.objects.all(), window),
+            "arquivo": report_file.reports,
+        }
+
+    def assertBackendsMatch(self):
+        builders = self.builders()
+        for window in MONTH_WINDOWS:
+            expected = comparable(build_operator_reports(Client.objects.all(), window))
+            for name, build in builders.items():
+                with self.subTest(backend=name, month_window=window):
+                    self.assertEqual(comparable(build(window)), expected)
+
+    def test_backends_match_python_engine(self):
+        self.assertFalse(operator_snapshot_is_stale())
+        self.assertBackendsMatch()
+
+    def test_backends_match_after_writes(self):
+        # The snapshot table follows these through the model signals.
+        transferido = Client.objects.get(nome="Transferido")
+        ClientHistory.objects.create(
+            client=transferido,
+            tipo="TRANSFERENCIA",
+            data=date(2023, 2, 14),
+            motivo="teste",
+            responsavel_antigo="Bruno",
+            responsavel_novo="Carla",
+        )
+        transferido.responsavel = "Carla"
+        transferido.save()
+        Client.objects.filter(nome="Antigo inativo").delete()
+        ClientHistory.objects.filter(client__nome="Reajustado", data=date(2022, 8, 5)).delete()
+        self.assertFalse(operator_snapshot_is_stale())
+        self.assertBackendsMatch()
+
+    def test_backends_match_without_clients(self):
+        Client.objects.all().delete()
+        self.assertBackendsMatch()
+
+    def test_stale_snapshot_is_not_rebuilt_on_read(self):
+        OperatorMonthSnapshot.objects.update(referencia=date(2000, 1, 1))
+        self.assertTrue(operator_snapshot_is_stale())
+        for window in MONTH_WINDOWS:
+            expected = comparable(build_operator_reports(Client.objects.all(), window))
+            self.assertEqual(comparable(build_snapshot_reports(Client.objects.all(), window)), expected)
+        self.assertTrue(operator_snapshot_is_stale())
+        # Writes leave a stale table alone until it is rebuilt.
+        Client.objects.filter(nome="Futuro").get().delete()
+        self.assertFalse(OperatorMonthSnapshot.objects.filter(referencia__gte=date(2000, 2, 1)).exists())
+        rebuild_operator_snapshot()
+        self.assertBackendsMatch()
+
+
+@report_settings
+@skipUnless(os.name == "posix", "the workers are forked")
+class ParallelReportTests(TransactionTestCase):
+    """The parallel engine, run with real worker processes, returns the python engine's reports."""
+
+    def setUp(self):
+        if not parallel_reports._can_fork_queries():
+            self.skipTest("the workers cannot read an in-memory test database")
+        # Committed rows, as the workers read them through their own connections.
+        create_report_clients()
+
+    def test_shards_match_python_engine(self):
+        # Small chunks so the handful of clients is split between two workers.
+        with mock.patch.object(parallel_reports, "REPORT_CHUNK_SIZE", 4), mock.patch.object(
+            parallel_reports, "_run_shards", wraps=parallel_reports._run_shards
+        ) as run_shards:
+            for window in MONTH_WINDOWS:
+                with self.subTest(month_window=window):
+                    self.assertEqual(
+                        comparable(build_parallel_reports(Client.objects.all(), window, workers=2)),
+                        comparable(build_operator_reports(Client.objects.all(), window)),
+                    )
+        self.assertEqual(run_shards.call_count, len(MONTH_WINDOWS))
+        self.assertEqual([len(call.args[1]) for call in run_shards.call_args_list], [2] * len(MONTH_WINDOWS))
+
+
+class ClientKpiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for nome in ("Ana", "Bruno", "Carla"):
+            Responsavel.objects.create(nome=nome)
+        for nome, status, valor, permuta, termometro in [
+            ("Alfa", "ATIVO", "100.00", False, 5),
+            ("Beta", "ATIVO", "250.50", True, 5),
+            ("Gama", "ATIVO", "49.99", False, 2),
+            ("Delta", "INATIVO", "900.00", True, 1),
+        ]:
+            Client.objects.create(
+                nome=nome,
+                responsavel="Ana",
+                status=status,
+                entrada=date(2023, 1, 1),
+                saida=date(2023, 6, 1) if status == "INATIVO" else None,
+                valor=Decimal(valor),
+                permuta=permuta,
+                termometro=termometro,
+            )
+
+    def test_figures_in_one_query(self):
+        with self.assertNumQueries(1):
+            kpis = client_kpis()
+        self.assertEqual(
+            kpis,
+            {
+                "total": 4,
+                "ativos": 3,
+                "inativos": 1,
+                "receita_ativa": Decimal("400.49"),
+                "responsaveis": 3,
+                "permutas": 2,
+                "ticket_medio": Decimal("133.50"),
+                "por_termometro": {1: 1, 2: 1, 3: 0, 4: 0, 5: 2},
+            },
+        )
+
+    def test_without_clients(self):
+        with self.assertNumQueries(1):
+            kpis = client_kpis(Client.objects.filter(status="OUTRO"))
+        self.assertEqual((kpis["total"], kpis["receita_ativa"], kpis["ticket_medio"]), (0, 0, Decimal("0")))
+        self.assertEqual(kpis["responsaveis"], 3)
+
+
+@report_settings
+class ReportCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_row = Client.objects.create(
+            nome="Alfa", responsavel="Ana", status="ATIVO", entrada=date(2023, 1, 1), valor=Decimal("100.00")
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_version_bumps_after_commit(self):
+        version = get_reports_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_reports_version()
+            self.assertEqual(get_reports_version(), version)
+        self.assertGreater(get_reports_version(), version)
+
+    def test_batch_collapses_the_bumps(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with reports_version_batch():
+                bump_reports_version()
+                with reports_version_batch():
+                    bump_reports_version()
+                bump_reports_version()
+                self.assertEqual(callbacks, [])
+        self.assertEqual(len(callbacks), 1)
+
+    def test_batch_without_bumps_keeps_the_version(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with reports_version_batch():
+                pass
+        self.assertEqual(callbacks, [])
+
+    def test_client_save_changes_the_key_and_rebuilds(self):
+        key = reports_cache_key(build_operator_reports)
+        first = get_cached_reports(build_operator_reports)
+        self.assertEqual(first["operator_totals"]["Ana"]["valor_total"], Decimal("100.00"))
+        self.assertIsNotNone(cache.get(key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_row.valor = Decimal("250.00")
+            self.client_row.save()
+        self.assertNotEqual(reports_cache_key(build_operator_reports), key)
+        rebuilt = get_cached_reports(build_operator_reports)
+        self.assertNotIn("stale", rebuilt)
+        self.assertEqual(rebuilt["operator_totals"]["Ana"]["valor_total"], Decimal("250.00"))
+
+
+@report_settings
+@skipUnless(os.name == "posix", "report_build_lock uses flock")
+class ReportBuildLockTests(TestCase):
+    """While one process rebuilds a report, the others do not rebuild it too."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Client.objects.create(
+            nome="Alfa", responsavel="Ana", status="ATIVO", entrada=date(2023, 1, 1), valor=Decimal("100.00")
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.lock_name = reports_key_prefix(build_operator_reports, None)
+
+    def new_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_reports_version()
+
+    def test_busy_lock_serves_the_previous_report(self):
+        previous = get_cached_reports(build_operator_reports)
+        self.new_version()
+        with report_build_lock(self.lock_name) as acquired:
+            self.assertTrue(acquired)
+            with self.assertNumQueries(0):
+                reports = get_cached_reports(build_operator_reports)
+        self.assertIs(reports["stale"], True)
+        self.assertEqual(
+            comparable({key: value for key, value in reports.items() if key != "stale"}), comparable(previous)
+        )
+        self.assertIsNone(cache.get(reports_cache_key(build_operator_reports)))
+
+    def test_busy_lock_without_previous_report_waits(self):
+        holding = threading.Event()
+        released = threading.Event()
+
+        def hold_lock():
+            with report_build_lock(self.lock_name):
+                holding.set()
+                time.sleep(0.2)
+                released.set()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        self.addCleanup(holder.join)
+        holding.wait()
+        reports = get_cached_reports(build_operator_reports)
+        self.assertTrue(released.is_set())
+        self.assertNotIn("stale", reports)
+        self.assertIsNotNone(cache.get(reports_cache_key(build_operator_reports)))
+
+
+@report_settings
+class ClosedMonthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for nome, responsavel, entrada, valor in [
+            ("Alfa", "Ana", date(2022, 2, 7), "300.00"),
+            ("Beta", "Bruno", date(2022, 9, 1), "120.00"),
+            ("Gama", "Ana", date(2023, 1, 20), "75.50"),
+        ]:
+            Client.objects.create(
+                nome=nome, responsavel=responsavel, status="ATIVO", entrada=entrada, valor=Decimal(valor)
+            )
+        close_months(date(2023, 7, 1))
+
+    def test_back_dated_transfer_reopens_only_later_months(self):
+        self.assertEqual(ClosedMonth.objects.latest("mes").mes, date(2023, 6, 1))
+        alfa = Client.objects.get(nome="Alfa")
+        ClientHistory.objects.create(
+            client=alfa,
+            tipo="TRANSFERENCIA",
+            data=date(2023, 3, 15),
+            motivo="teste",
+            responsavel_antigo="Ana",
+            responsavel_novo="Bruno",
+        )
+        alfa.responsavel = "Bruno"
+        alfa.save()
+
+        self.assertEqual(ClosedMonth.objects.latest("mes").mes, date(2023, 2, 1))
+        self.assertEqual(ClosedMonth.objects.earliest("mes").mes, date(2022, 2, 1))
+        for window in MONTH_WINDOWS:
+            with self.subTest(month_window=window):
+                # The full queryset reads the closed months back; the stream recomputes them.
+                self.assertEqual(
+                    comparable(build_operator_reports(Client.objects.all(), window)),
+                    comparable(build_operator_reports(iter_report_clients(Client.objects.all()), window)),
+                )
+
+    def test_admin_is_read_only(self):
+        request = RequestFactory().get("/")
+        request.user = User.objects.create_superuser("admin", "admin@example.com", "senha")
+        model_admin = site._registry[ClosedMonth]
+        closed = ClosedMonth.objects.first()
+        self.assertFalse(model_admin.has_add_permission(request))
+        self.assertFalse(model_admin.has_change_permission(request, closed))
+        self.assertFalse(model_admin.has_delete_permission(request, closed))
+        self.assertIn("reabrir_meses", model_admin.get_actions(request))
+
+
+@report_settings
+@override_settings(REPORTS_BACKEND="python", REPORTS_SNAPSHOT_FILE="")
+class WarmReportsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Client.objects.create(
+            nome="Alfa", responsavel="Ana", status="ATIVO", entrada=date(2023, 1, 1), valor=Decimal("100.00")
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fills_the_keys_the_dashboard_reads(self):
+        call_command("warm_reports", janela=[":", "2023-02:2023-05"], stdout=StringIO())
+        for params in ({}, {"mes_inicio": "2023-02", "mes_fim": "2023-05"}):
+            with self.subTest(params=params):
+                month_window = _dashboard_month_window(RequestFactory().get("/", params))
+                reports = cache.get(reports_cache_key(get_report_builder(), month_window))
+                self.assertEqual(
+                    comparable(reports), comparable(build_operator_reports(Client.objects.all(), month_window))
+                )
+
+    def test_workers_need_the_parallel_engine(self):
+        with self.assertRaisesMessage(CommandError, "--workers"):
+            call_command("warm_reports", workers=2, stdout=StringIO())
+
+
+class ClientKeysetPaginationTests(TestCase):
+    """Walking the client list page by page visits every client exactly once, in order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Repeated values in every column, so the id has to break the ties.
+        for position in range(11):
+            Client.objects.create(
+                nome=f"Cliente {position % 4}",
+                responsavel=("Ana", "Bruno", "Carla")[position % 3],
+                status="ATIVO" if position % 3 else "INATIVO",
+                termometro=position % 5 + 1,
+                entrada=date(2023, position % 4 + 1, 1),
+                saida=date(2024, position % 2 + 1, 1) if position % 3 == 0 else None,
+                valor=Decimal(position % 3 * 100),
+            )
+
+    def expected_ids(self, ordem):
+        key = ordem.lstrip("-")
+
+        def sort_key(client):
+            value = (client.saida or date.max) if key == "saida" else getattr(client, CLIENT_SORT_FIELDS[key])
+            return value, client.pk
+
+        return [client.pk for client in sorted(Client.objects.all(), key=sort_key, reverse=ordem.startswith("-"))]
+
+    def page(self, **params):
+        query = QueryDict(mutable=True)
+        query.update({"tamanho": "3", **params})
+        return _paginate_clients(Client.objects.all(), query)
+
+    def test_walks_every_order_both_ways(self):
+        for key in CLIENT_SORT_FIELDS:
+            for ordem in (key, f"-{key}"):
+                with self.subTest(ordem=ordem):
+                    page = self.page(ordem=ordem)
+                    self.assertIsNone(page["previous_cursor"])
+                    forward = [client.pk for client in page["rows"]]
+                    while page["next_cursor"]:
+                        page = self.page(ordem=ordem, depois=page["next_cursor"])
+                        forward += [client.pk for client in page["rows"]]
+                    self.assertEqual(forward, self.expected_ids(ordem))
+
+                    backward = [client.pk for client in page["rows"]]
+                    while page["previous_cursor"]:
+                        page = self.page(ordem=ordem, antes=page["previous_cursor"])
+                        backward = [client.pk for client in page["rows"]] + backward
+                    self.assertEqual(backward, forward)
+                    self.assertEqual(len(set(forward)), Client.objects.count())
+
+    def test_tampered_cursor_falls_back_to_the_first_page(self):
+        first_page = [client.pk for client in self.page(ordem="entrada")["rows"]]
+
+        def token(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+        for cursor in ("???", "bm90IGpzb24", token(["não é data", 1]), token(["2023-01-01", "x"]), token(5)):
+            for direction in ("depois", "antes"):
+                with self.subTest(cursor=cursor, direction=direction):
+                    page = self.page(ordem="entrada", **{direction: cursor})
+                    self.assertEqual([client.pk for client in page["rows"]], first_page)
+                    self.assertIsNone(page["previous_cursor"])
+
+
+class ClientSearchTests(TestCase):
+    """Name search ignores case and accents and matches the start of every word."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for nome in ("José da Silva", "Maria Sá", "Joselito Souza", "Ana Paula Silveira"):
+            Client.objects.create(
+                nome=nome, responsavel="Ana", status="ATIVO", entrada=date(2023, 1, 1), valor=Decimal("10.00")
+            )
+
+    def found(self, term):
+        return sorted(search_clients(Client.objects.all(), term).values_list("nome", flat=True))
+
+    def test_folds_accents_and_case(self):
+        self.assertEqual(self.found("jose sil"), ["José da Silva"])
+        self.assertEqual(self.found("JOSÉ"), ["Joselito Souza", "José da Silva"])
+        self.assertEqual(self.found("sá"), ["Maria Sá"])
+        self.assertEqual(self.found("silv"), ["Ana Paula Silveira", "José da Silva"])
+        self.assertEqual(self.found("ilva"), [])
+        ranked = ranked_clients(Client.objects.all(), "jose sil")
+        self.assertEqual([client.nome for client in ranked], ["José da Silva"])
+
+    def test_queryset_writes_keep_the_search_in_sync(self):
+        Client.objects.filter(nome__startswith="Maria").update(nome="Márcia Lima")
+        self.assertEqual(self.found("marcia lim"), ["Márcia Lima"])
+        self.assertEqual(self.found("maria"), [])
+
+        jose = Client.objects.get(nome="José da Silva")
+        jose.nome = "Joana Prado"
+        Client.objects.bulk_update([jose], ["nome"])
+        self.assertEqual(self.found("joana"), ["Joana Prado"])
+        self.assertEqual(self.found("jose"), ["Joselito Souza"])
+
+        Client.objects.bulk_create(
+            [Client(nome="Érica Ávila", responsavel="Ana", status="ATIVO", entrada=date(2023, 1, 1), valor=1)]
+        )
+        self.assertEqual(self.found("erica avi"), ["Érica Ávila"])
+
+        Client.objects.filter(nome="Joselito Souza").delete()
+        self.assertEqual(self.found("souza"), [])
+
+
+@skipUnless(connection.vendor == "sqlite", "the FTS5 index is SQLite's")
+class ClientSearchIndexTests(TestCase):
+    def trigger_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f"{FTS_TABLE}_a_"]
+            )
+            return cursor.fetchone()[0]
+
+    def test_triggers_follow_raw_writes(self):
+        client = Client.objects.create(
+            nome="Otávio", responsavel="Ana", status="ATIVO", entrada=date(2023, 1, 1), valor=Decimal("10.00")
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE clientes_client SET busca = %s WHERE id = %s", ["octavio", client.pk])
+        self.assertEqual(list(search_clients(Client.objects.all(), "octa")), [client])
+        self.assertEqual(list(search_clients(Client.objects.all(), "otav")), [])
+
+    def test_post_migrate_restores_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER {FTS_TABLE}_{suffix}")
+        app_config = apps.get_app_config("clientes")
+        post_migrate.send(
+            sender=app_config,
+            app_config=app_config,
+            verbosity=0,
+            interactive=False,
+            using="default",
+            apps=apps,
+            plan=[],
+        )
+        self.assertEqual(self.trigger_count(), 3)
+        Client.objects.create(
+            nome="Úrsula", responsavel="Ana", status="ATIVO", entrada=date(2023, 1, 1), valor=Decimal("10.00")
+        )
+        self.assertEqual([client.nome for client in search_clients(Client.objects.all(), "urs")], ["Úrsula"])
+
+
+@report_settings
+class ClientFacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = Responsavel.objects.create(nome="Ana")
+        cls.bruno = Responsavel.objects.create(nome="Bruno")
+        for nome, responsavel, status, termometro in [
+            ("Alfa", "Ana", "ATIVO", 5),
+            ("Beta", "Ana", "ATIVO", 5),
+            ("Gama", "Bruno", "INATIVO", 2),
+            ("Delta", "Bruno", "ATIVO", 5),
+            ("Épsilon", "Sem cadastro", "ATIVO", 1),
+        ]:
+            Client.objects.create(
+                nome=nome,
+                responsavel=responsavel,
+                status=status,
+                termometro=termometro,
+                entrada=date(2023, 1, 1),
+                valor=Decimal("10.00"),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_sums_each_facet_over_the_others(self):
+        with self.assertNumQueries(1):
+            facets = client_facets()
+        self.assertEqual(
+            facets,
+            {
+                "status": {"ATIVO": 4, "INATIVO": 1},
+                "termometro": {5: 3, 2: 1, 1: 1},
+                "responsavel": {self.ana.pk: 2, self.bruno.pk: 2, None: 1},
+            },
+        )
+        self.assertEqual(client_facets(Client.objects.filter(status="INATIVO"))["termometro"], {2: 1})
+
+    def test_cache_follows_client_writes(self):
+        self.assertEqual(cached_client_facets(), client_facets())
+        with self.assertNumQueries(0):
+            cached_client_facets()
+
+        gama = Client.objects.get(nome="Gama")
+        with self.captureOnCommitCallbacks(execute=True):
+            gama.status = "ATIVO"
+            gama.termometro = 1
+            gama.save()
+        self.assertEqual(cached_client_facets()["status"], {"ATIVO": 5})
+        self.assertEqual(cached_client_facets()["termometro"], {5: 3, 1: 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.get(nome="Alfa").delete()
+        self.assertEqual(cached_client_facets()["responsavel"], {self.ana.pk: 1, self.bruno.pk: 2, None: 1})
+
+
+@report_settings
+@override_settings(REPORTS_BACKEND="python", REPORTS_SNAPSHOT_FILE="")
+class DashboardChartsETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "senha")
+        Client.objects.create(
+            nome="Alfa", responsavel="Ana", status="ATIVO", entrada=date(2023, 1, 1), valor=Decimal("100.00")
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse("clientes:dashboard_charts")
+
+    def test_matching_tag_skips_the_reports(self):
+        etag = self.client.get(self.url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        # Only the session, the user and the permission check.
+        self.assertEqual(len(queries), 3)
+        self.assertFalse([query for query in queries if "clientes_" in query["sql"]])
+
+    def test_version_bump_changes_the_tag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_reports_version()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertNotEqual(self.client.get(self.url, {"mes_inicio": "2023-02"})["ETag"], response["ETag"])
+
+    def test_stale_response_has_no_tag(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_reports_version()
+        with report_build_lock(reports_key_prefix(build_operator_reports, ("", ""))):
+            response = self.client.get(self.url)
+        self.assertIs(response.json()["stale"], True)
+        self.assertNotIn("ETag", response)
+
+
+@report_settings
+class ResponsavelLinkTests(TestCase):
+    """The ``Responsavel`` foreign keys follow the name columns on every write path."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = Responsavel.objects.create(nome="Ana")
+        cls.bruno = Responsavel.objects.create(nome="Bruno")
+
+    def new_client(self, nome, responsavel, **fields):
+        return Client(
+            nome=nome,
+            responsavel=responsavel,
+            status="ATIVO",
+            entrada=fields.pop("entrada", date(2022, 3, 1)),
+            valor=Decimal("100.00"),
+            **fields,
+        )
+
+    def refs(self):
+        return dict(Client.objects.values_list("nome", "responsavel_ref"))
+
+    def test_save(self):
+        client = self.new_client("Alfa", "Ana")
+        client.save()
+        self.assertEqual(client.responsavel_ref, self.ana)
+        client.responsavel = "Bruno"
+        client.save(update_fields=["responsavel"])
+        self.assertEqual(self.refs(), {"Alfa": self.bruno.pk})
+        client.responsavel = "Sem cadastro"
+        client.save()
+        self.assertEqual(self.refs(), {"Alfa": None})
+
+    def test_bulk_paths(self):
+        Client.objects.bulk_create([self.new_client("Alfa", "Ana"), self.new_client("Beta", "Sem cadastro")])
+        self.assertEqual(self.refs(), {"Alfa": self.ana.pk, "Beta": None})
+
+        beta = Client.objects.get(nome="Beta")
+        beta.responsavel = "Bruno"
+        Client.objects.bulk_update([beta], ["responsavel"])
+        self.assertEqual(self.refs(), {"Alfa": self.ana.pk, "Beta": self.bruno.pk})
+
+        Client.objects.filter(nome="Alfa").update(responsavel="Bruno")
+        self.assertEqual(self.refs(), {"Alfa": self.bruno.pk, "Beta": self.bruno.pk})
+
+        ClientHistory.objects.bulk_create(
+            [
+                ClientHistory(
+                    client=beta,
+                    tipo="TRANSFERENCIA",
+                    data=date(2023, 1, 1),
+                    motivo="teste",
+                    responsavel_antigo="Ana",
+                    responsavel_novo="Bruno",
+                )
+            ]
+        )
+        history = ClientHistory.objects.get()
+        self.assertEqual((history.responsavel_antigo_ref, history.responsavel_novo_ref), (self.ana, self.bruno))
+
+    def test_new_responsavel_links_existing_rows(self):
+        self.new_client("Alfa", "Carla").save()
+        carla = Responsavel.objects.create(nome="Carla")
+        self.assertEqual(self.refs(), {"Alfa": carla.pk})
+
+    def assertReportsMatch(self):
+        self.assertFalse(operator_snapshot_is_stale())
+        for window in MONTH_WINDOWS:
+            with self.subTest(month_window=window):
+                self.assertEqual(
+                    comparable(build_snapshot_reports(Client.objects.all(), window)),
+                    comparable(build_operator_reports(iter_report_clients(Client.objects.all()), window)),
+                )
+
+    def test_rename_moves_the_stored_figures(self):
+        self.new_client("Alfa", "Ana").save()
+        self.new_client("Beta", "Bruno", entrada=date(2022, 5, 1)).save()
+        rebuild_operator_snapshot()
+        close_months(date(2023, 1, 1))
+
+        self.ana.nome = "Ana Maria"
+        self.ana.save()
+
+        self.assertEqual(Client.objects.get(nome="Alfa").responsavel, "Ana Maria")
+        for model in (OperatorMonthSnapshot, ClosedOperatorMonth):
+            with self.subTest(model=model.__name__):
+                self.assertFalse(model.objects.filter(responsavel="Ana").exists())
+                self.assertTrue(model.objects.filter(responsavel="Ana Maria").exists())
+        self.assertTrue(ClosedMonth.objects.exists())
+        self.assertReportsMatch()
+        self.assertEqual(
+            comparable(build_operator_reports(Client.objects.all())),
+            comparable(build_operator_reports(iter_report_clients(Client.objects.all()))),
+        )
+
+    def test_rename_into_a_name_with_figures(self):
+        # "Carla" has figures of her own (a transfer) but no Responsavel row.
+        alfa = self.new_client("Alfa", "Ana")
+        alfa.save()
+        beta = self.new_client("Beta", "Bruno", entrada=date(2022, 5, 1))
+        beta.save()
+        ClientHistory.objects.create(
+            client=beta,
+            tipo="TRANSFERENCIA",
+            data=date(2022, 8, 1),
+            motivo="teste",
+            responsavel_antigo="Carla",
+            responsavel_novo="Bruno",
+        )
+        rebuild_operator_snapshot()
+        close_months(date(2023, 1, 1))
+
+        self.ana.nome = "Carla"
+        self.ana.save()
+
+        self.assertFalse(OperatorMonthSnapshot.objects.filter(responsavel="Ana").exists())
+        self.assertFalse(ClosedMonth.objects.exists())
+        self.assertReportsMatch()
+        operators = build_snapshot_reports(Client.objects.all())["operators"]
+        self.assertEqual(sorted(operators), ["Bruno", "Carla"])
+
+
+# Tables the screens below must never read in full, and the queries allowed to anyway
+# (matched on a fragment of their SQL).
+PLAN_CHECKED_TABLES = re.compile(r"clientes_client|clientes_clienthistory|clientes_agendamento\w*")
+FULL_SCAN_ALLOWED = {
+    # client_kpis aggregates over every client by design.
+    "clientes_client": ['AS "receita_ativa"'],
+}
+FULL_SCAN = re.compile(r"SCAN (?:TABLE )?(\w+)(?: AS (\w+))?")
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite's")
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+)
+class QueryPlanTests(TestCase):
+    """The main queries of the list, dashboard and scheduling screens go through indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "senha")
+        for nome in ("Ana", "Bruno"):
+            Responsavel.objects.create(nome=nome)
+        for numero in range(6):
+            client = Client.objects.create(
+                nome=f"Cliente {numero}",
+                responsavel="Ana" if numero % 2 else "Bruno",
+                termometro=numero % 5 + 1,
+                quer_alinhamento=True,
+                entrada=date(2023, numero + 1, 5),
+                valor=Decimal(100 * (numero + 1)),
+            )
+            ClientHistory.objects.create(
+                client=client,
+                tipo="TRANSFERENCIA",
+                data=date(2024, numero + 1, 10),
+                motivo="teste",
+                responsavel_antigo="Bruno",
+                responsavel_novo=client.responsavel,
+            )
+            ReuniaoPreferencia.objects.create(client=client, tipo="ALINHAMENTO", responsavel_nome=client.responsavel)
+            AgendamentoAlinhamento.objects.create(client=client, mes=1, ano=2025)
+            AgendamentoFechamento.objects.create(client=client, mes=1, ano=2025)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def full_scans(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plan = [row[-1] for row in cursor.fetchall()]
+        aliases = dict((alias, table) for table, alias in re.findall(r'"(\w+)" ([A-Z]\d+)\b', sql))
+        scans = []
+        for detail in plan:
+            match = FULL_SCAN.fullmatch(detail)
+            if match:
+                table = aliases.get(match.group(2) or match.group(1), match.group(1))
+                if PLAN_CHECKED_TABLES.fullmatch(table) and not any(
+                    fragment in sql for fragment in FULL_SCAN_ALLOWED.get(table, [])
+                ):
+                    scans.append(f"{table}: {detail}")
+        return scans
+
+    def assertNoFullScans(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        checked = [query["sql"] for query in queries.captured_queries if PLAN_CHECKED_TABLES.search(query["sql"])]
+        self.assertTrue(checked)
+        for sql in checked:
+            with self.subTest(url=url, params=params, sql=sql[:120]):
+                self.assertEqual(self.full_scans(sql), [])
+
+    def test_client_list(self):
+        url = reverse("clientes:client_list")
+        for params in [
+            {},
+            {"status": "ATIVO"},
+            {"responsavel": "Ana"},
+            {"termometro": "3"},
+            {"ordem": "-valor"},
+            {"ordem": "entrada"},
+            {"ordem": "responsavel"},
+        ]:
+            self.assertNoFullScans(url, params)
+
+    def test_dashboard(self):
+        self.assertNoFullScans(reverse("clientes:dashboard"))
+
+    def test_agendamentos_api_list(self):
+        self.assertNoFullScans(reverse("clientes:agendamentos_api_list"), {"mes": 1, "ano": 2025})
+
+    def test_reunioes_lista(self):
+        self.assertNoFullScans(reverse("clientes:reunioes_lista"))
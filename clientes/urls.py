@@ -6,7 +6,11 @@ app_name = "clientes"
 
 urlpatterns = [
     path("", views.dashboard, name="dashboard"),
+    path("dashboard/fluxo/", views.dashboard_cashflow, name="dashboard_cashflow"),
+    path("dashboard/graficos/", views.dashboard_charts, name="dashboard_charts"),
+    path("dashboard/secoes/<str:secao>/", views.dashboard_section, name="dashboard_section"),
     path("clientes/", views.client_list, name="client_list"),
+    path("clientes/busca/", views.client_search, name="client_search"),
     path("clientes/reunioes/", views.reunioes_lista, name="reunioes_lista"),
     path("clientes/reunioes/exportar/", views.reunioes_export, name="reunioes_export"),
     path("financeiro/", views.financeiro_view, name="financeiro"),
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
-from datetime import date
-from decimal import Decimal
-from typing import Dict, Iterable, List, Tuple
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
-from .models import Client, ClientHistory
+from django.db.models import Q, QuerySet
+
+from .models import Client, ClientHistory, ClosedMonth, ClosedOperatorMonth
 
 
 def month_key_from_date(value: date) -> str:
-    return value.strftime("%Y-%m")
+    return f"{value.year:04d}-{value.month:02d}"
 
 
 def month_start(value: date) -> date:
@@ -48,307 +51,922 @@ def iterate_months(start: date, end: date) -> Iterable[date]:
             current = date(current.year, current.month + 1, 1)
 
 
-def get_responsavel_no_mes(
-    client: Client, mes_ano: str, transferencias: List[ClientHistory] | None = None
-) -> str:
-    """Return the responsible agent for the client in a given YYYY-MM period."""
-    if transferencias is None:
-        transferencias = sorted(
-            (h for h in client.historico.all() if h.tipo == "TRANSFERENCIA"),
-            key=lambda hist: hist.data,
-        )
+def parse_month_value(value: str | None) -> date | None:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        return None
+
+
+def parse_month_index(value: str | None) -> int | None:
+    """Month ordinal (see ``month_index``) of a "YYYY-MM" value, or None when invalid."""
+    parsed = parse_month_value(value)
+    return month_index(parsed) if parsed else None
+
+
+def resolve_month_window(
+    first_month: str, last_month: str, requested_start: str | None, requested_end: str | None
+) -> Tuple[str, str, List[str]]:
+    """Resolve the dashboard's mes_inicio/mes_fim against the months that have data.
+
+    Missing or invalid values fall back to the first/last month with data, and a
+    reversed range is swapped. Returns (start, end, every month in between).
+    """
+    requested_start = requested_start or first_month
+    requested_end = requested_end or last_month
+    if not (requested_start and requested_end):
+        return requested_start, requested_end, []
+
+    start_index = parse_month_index(requested_start)
+    if start_index is None:
+        start_index = parse_month_index(first_month)
+    end_index = parse_month_index(requested_end)
+    if end_index is None:
+        end_index = parse_month_index(last_month or requested_start)
+    if start_index is not None and end_index is not None and start_index > end_index:
+        start_index, end_index = end_index, start_index
+    start = month_key_from_index(start_index) if start_index is not None else ""
+    end = month_key_from_index(end_index) if end_index is not None else ""
+    if not (start and end):
+        return start, end, []
+    return start, end, [month_key_from_index(index) for index in range(start_index, end_index + 1)]
+
+
+def month_index(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def month_index_from_key(month_str: str) -> int:
+    year, month = month_str.split("-")
+    return int(year) * 12 + int(month) - 1
+
+
+def month_key_from_index(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def month_date_from_index(index: int) -> date:
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def to_cents(value) -> int:
+    """Convert a money amount to integer cents for the report engine's inner loops."""
+    return int(Decimal(value).scaleb(2).to_integral_value(ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Convert integer cents back to a two-place ``Decimal`` for the report output."""
+    return Decimal(cents).scaleb(-2)
+
+
+class ReportTransfer:
+    """The fields of a TRANSFERENCIA history entry the reports read."""
+
+    __slots__ = ("data", "responsavel_antigo", "responsavel_novo")
+
+    def __init__(self, data: date, responsavel_antigo: str, responsavel_novo: str) -> None:
+        self.data = data
+        self.responsavel_antigo = responsavel_antigo
+        self.responsavel_novo = responsavel_novo
+
+
+class ReportValueChange:
+    """The fields of a VALOR history entry the reports read."""
+
+    __slots__ = ("data", "valor_antigo")
 
+    def __init__(self, data: date, valor_antigo: Decimal) -> None:
+        self.data = data
+        self.valor_antigo = valor_antigo
+
+
+class ReportClient:
+    """The columns of a client the reports read, with its transfers and value changes ordered by date."""
+
+    __slots__ = ("id", "nome", "responsavel", "status", "entrada", "saida", "valor", "transferencias", "valores")
+
+    FIELDS = ("id", "nome", "responsavel", "status", "entrada", "saida", "valor")
+
+    def __init__(
+        self, id, nome, responsavel, status, entrada, saida, valor, transferencias=None, valores=None
+    ) -> None:
+        self.id = id
+        self.nome = nome
+        self.responsavel = responsavel
+        self.status = status
+        self.entrada = entrada
+        self.saida = saida
+        self.valor = valor
+        self.transferencias: List[ReportTransfer] = transferencias if transferencias is not None else []
+        self.valores: List[ReportValueChange] = valores if valores is not None else []
+
+    @classmethod
+    def from_client(cls, client: Client) -> ReportClient:
+        """Build the record from a model instance (its ``historico`` may be prefetched)."""
+        transferencias = []
+        valores = []
+        if client.pk:
+            historico = client.historico.all()
+            transferencias = [
+                ReportTransfer(hist.data, hist.responsavel_antigo, hist.responsavel_novo)
+                for hist in sorted(
+                    (h for h in historico if h.tipo == "TRANSFERENCIA"),
+                    key=lambda hist: hist.data,
+                )
+            ]
+            valores = [
+                ReportValueChange(hist.data, hist.valor_antigo)
+                for hist in sorted(
+                    (h for h in historico if h.tipo == "VALOR" and h.valor_antigo is not None),
+                    key=lambda hist: (hist.data, hist.pk),
+                )
+            ]
+        return cls(*(getattr(client, field) for field in cls.FIELDS), transferencias, valores)
+
+
+REPORT_CHUNK_SIZE = 2000
+
+
+def attach_report_history(records: List[ReportClient], transfers: bool = True) -> List[ReportClient]:
+    """Fill ``valores`` (and ``transferencias`` when ``transfers`` is set) for ``records``
+    with a single history query."""
+    by_id = {record.id: record for record in records}
+    kinds = Q(tipo="VALOR", valor_antigo__isnull=False)
+    if transfers:
+        kinds |= Q(tipo="TRANSFERENCIA")
+    history = (
+        ClientHistory.objects.filter(kinds, client_id__in=list(by_id))
+        .order_by("client_id", "data", "id")
+        .values_list("client_id", "tipo", "data", "responsavel_antigo", "responsavel_novo", "valor_antigo")
+    )
+    for client_id, tipo, data, responsavel_antigo, responsavel_novo, valor_antigo in history:
+        if tipo == "VALOR":
+            by_id[client_id].valores.append(ReportValueChange(data, valor_antigo))
+        else:
+            by_id[client_id].transferencias.append(ReportTransfer(data, responsavel_antigo, responsavel_novo))
+    return records
+
+
+def iter_report_clients(
+    clients=None, transfers: bool = True, chunk_size: int = REPORT_CHUNK_SIZE
+) -> Iterator[ReportClient]:
+    """Stream the report inputs for ``clients`` (a ``Client`` queryset, all by default).
+
+    Only the columns in ``ReportClient.FIELDS`` are read, through ``QuerySet.iterator``,
+    and each chunk of ``chunk_size`` clients gets its VALOR rows (plus TRANSFERENCIA
+    rows when ``transfers`` is set), ordered by date in SQL, from one query. Memory
+    therefore depends on the chunk size rather than on the number of clients.
+    """
+    if clients is None:
+        clients = Client.objects.all()
+    chunk: List[ReportClient] = []
+    for row in clients.values_list(*ReportClient.FIELDS).iterator(chunk_size=chunk_size):
+        chunk.append(ReportClient(*row))
+        if len(chunk) >= chunk_size:
+            yield from attach_report_history(chunk, transfers)
+            chunk = []
+    if chunk:
+        yield from attach_report_history(chunk, transfers)
+
+
+# (first month index, or None for every earlier month, responsavel) intervals
+OwnershipTimeline = List[Tuple[int | None, str]]
+
+
+def build_ownership_timeline(client: Client, transferencias: List[ClientHistory]) -> OwnershipTimeline:
+    """Return the client's ownership as contiguous (first month index, responsavel) intervals.
+
+    Each interval lasts until the month before the next one starts. The first interval
+    starts at None so it covers every month before the first transfer; a transfer
+    takes effect in its own month.
+    """
     if not transferencias:
-        return client.responsavel
+        return [(None, client.responsavel)]
 
     responsavel = transferencias[0].responsavel_antigo or client.responsavel
+    timeline: OwnershipTimeline = [(None, responsavel)]
     for transferencia in transferencias:
-        hist_mes = transferencia.data.strftime("%Y-%m")
-        if hist_mes <= mes_ano:
-            responsavel = transferencia.responsavel_novo or responsavel
+        hist_mes = month_index(transferencia.data)
+        responsavel = transferencia.responsavel_novo or responsavel
+        if timeline[-1][0] == hist_mes:
+            timeline[-1] = (hist_mes, responsavel)
         else:
-            break
-    return responsavel
-
+            timeline.append((hist_mes, responsavel))
+    return timeline
 
-def build_operator_reports(clients: Iterable[Client]) -> Dict[str, object]:
-    """Create structures that mimic the dashboard reports from the React app."""
-    operator_data: Dict[str, Dict[str, Dict[str, Decimal]]] = {}
-    operator_counts: Dict[str, Dict[str, Dict[str, Decimal]]] = {}
-    months: set[str] = set()
-    monthly_revenue: Dict[str, Dict[str, Decimal]] = defaultdict(
-        lambda: {"total": Decimal("0"), "ativos": Decimal("0"), "inativos": Decimal("0")}
-    )
 
-    today_month = month_start(date.today())
+def responsavel_from_timeline(timeline: OwnershipTimeline, index: int) -> str:
+    """Look up the responsible agent for month ``index`` in an ownership timeline."""
+    for segment_start, responsavel in reversed(timeline):
+        if segment_start is None or segment_start <= index:
+            return responsavel
+    return timeline[0][1]
 
-    def ensure_operator(resp: str) -> None:
-        operator_data.setdefault(
-            resp,
-            {
-                "entradas": defaultdict(lambda: {"quantidade": 0, "valor": Decimal("0")}),
-                "saidas": defaultdict(lambda: {"quantidade": 0, "valor": Decimal("0")}),
-                "ativos": defaultdict(lambda: {"quantidade": 0, "valor": Decimal("0")}),
-            },
-        )
-        operator_counts.setdefault(
-            resp,
-            {"ativos": 0, "inativos": 0, "valor_total": Decimal("0")},
-        )
 
-    for client in clients:
-        transferencias = sorted(
-            (h for h in client.historico.all() if h.tipo == "TRANSFERENCIA"),
-            key=lambda hist: hist.data,
-        )
-        entrada_mes = month_key_from_date(client.entrada)
-        months.add(entrada_mes)
-        resp_entrada = get_responsavel_no_mes(client, entrada_mes, transferencias)
-        ensure_operator(resp_entrada)
-        entry_bucket = operator_data[resp_entrada]["entradas"][entrada_mes]
-        entry_bucket["quantidade"] += 1
-
-        value_start_month_date = add_months(month_start(client.entrada), 1)
-        value_start_key = month_key_from_date(value_start_month_date)
-        last_value_month_date = previous_month(client.saida) if client.saida else None
-        can_register_value_entry = not client.saida or value_start_month_date <= last_value_month_date
-        if can_register_value_entry and value_start_month_date <= today_month:
-            months.add(value_start_key)
-            ensure_operator(resp_entrada)
-            value_entry_bucket = operator_data[resp_entrada]["entradas"][value_start_key]
-            value_entry_bucket["valor"] += client.valor
+def timeline_segments(timeline: OwnershipTimeline, start: int, end: int) -> Iterable[Tuple[str, int, int]]:
+    """Yield (responsavel, first month index, last month index) covering ``start``..``end``."""
+    for position, (segment_start, responsavel) in enumerate(timeline):
+        if segment_start is None:
+            segment_start = start
+        if position + 1 < len(timeline):
+            segment_end = timeline[position + 1][0] - 1
+        else:
+            segment_end = end
+        segment_start = max(segment_start, start)
+        segment_end = min(segment_end, end)
+        if segment_start <= segment_end:
+            yield responsavel, segment_start, segment_end
+
+
+# (first month index, or None for every earlier month, value in cents) intervals
+ValueTimeline = List[Tuple[int | None, int]]
+# (nome, first month index, last month index or None, value timeline) a client pays
+Receipt = Tuple[str, int, int | None, ValueTimeline]
+
+
+def build_value_timeline(client: ReportClient) -> ValueTimeline:
+    """Return the client's valor as contiguous (first month index, cents) intervals.
+
+    Built like the ownership timeline, in one pass over the VALOR history: each change's
+    ``valor_antigo`` applies until the month of the change and the current ``valor``
+    after the last one. The first interval starts at None, i.e. covers every earlier
+    month. Several changes in one month leave the value set by the last of them.
+    """
+    timeline: ValueTimeline = []
+    segment_start = None
+    for change in [*client.valores, None]:
+        cents = to_cents(change.valor_antigo if change is not None else client.valor)
+        if timeline and timeline[-1][0] == segment_start:
+            timeline.pop()
+        if not timeline or timeline[-1][1] != cents:
+            timeline.append((segment_start, cents))
+        if change is not None:
+            segment_start = month_index(change.data)
+    return timeline
+
+
+def value_at(timeline: ValueTimeline, index: int) -> int:
+    """Look up the value (in cents) in force at month ``index`` in a value timeline."""
+    for segment_start, cents in reversed(timeline):
+        if segment_start is None or segment_start <= index:
+            return cents
+    return timeline[0][1]
+
+
+def value_segments(timeline: ValueTimeline, start: int, end: int | None) -> List[Tuple[int, int | None, int]]:
+    """Return the (first month index, last month index, cents) intervals covering
+    ``start``..``end`` (open-ended when ``end`` is None)."""
+    if len(timeline) == 1:
+        # Most clients never changed value.
+        return [(start, end, timeline[0][1])] if end is None or start <= end else []
+    segments = []
+    for position, (segment_start, cents) in enumerate(timeline):
+        segment_end = timeline[position + 1][0] - 1 if position + 1 < len(timeline) else end
+        if end is not None and segment_end is not None:
+            segment_end = min(segment_end, end)
+        segment_start = start if segment_start is None else max(segment_start, start)
+        if segment_end is None or segment_start <= segment_end:
+            segments.append((segment_start, segment_end, cents))
+    return segments
+
+
+class MonthlyDeltas:
+    """Difference arrays over month indices, keyed by operator/bucket.
+
+    A constant value over a month interval is stored as +value at its first month and
+    -value right after its last one, so totals for every month come out of a single
+    prefix sum instead of touching each month of each client.
+    """
+
+    def __init__(self) -> None:
+        self._deltas: Dict[object, Dict[int, object]] = defaultdict(dict)
+
+    def add_interval(self, key: object, start: int, end: int | None, value) -> None:
+        """Add ``value`` to every month from ``start`` to ``end`` (open-ended when None)."""
+        if end is not None and end < start:
+            return
+        deltas = self._deltas[key]
+        deltas[start] = deltas.get(start, 0) + value
+        if end is not None:
+            deltas[end + 1] = deltas.get(end + 1, 0) - value
+
+    def merge(self, other: MonthlyDeltas) -> None:
+        """Add every delta of ``other`` into this instance."""
+        for key, other_deltas in other._deltas.items():
+            deltas = self._deltas[key]
+            for index, value in other_deltas.items():
+                deltas[index] = deltas.get(index, 0) + value
+
+    def prefix_sums(self, key: object, indices: Iterable[int], zero=0) -> List:
+        """Return the running total of ``key`` at each of the ascending month ``indices``."""
+        points = sorted(self._deltas.get(key, {}).items())
+        position = 0
+        running = zero
+        result = []
+        for index in indices:
+            while position < len(points) and points[position][0] <= index:
+                running += points[position][1]
+                position += 1
+            result.append(running)
+        return result
+
+
+class OperatorReportAccumulator:
+    """Running totals behind ``build_operator_reports``.
+
+    Clients are folded in with ``add``; accumulators built over disjoint sets of
+    clients can be combined with ``merge`` (every figure is an integer sum), and
+    ``report`` turns the totals into the report structure.
+
+    ``since``/``until`` (month indices, ``until`` exclusive) restrict the per-month
+    figures to a range of months, so the closed months (see ``load_closed_months``)
+    and the open ones can be accumulated separately and merged.
+
+    Months are month indices (``month_index``) throughout; they only become "YYYY-MM"
+    keys in ``report``.
+    """
+
+    def __init__(self, today: date | None = None, since: int = 0, until: int | None = None) -> None:
+        self.today_index = month_index(today or date.today())
+        self.since = since
+        self.until = until
+        self.operator_data: Dict[str, Dict[str, Dict[int, Dict[str, int]]]] = {}
+        self.operator_counts: Dict[str, Dict[str, int]] = {}
+        self.months: set[int] = set()
+        self.active_deltas = MonthlyDeltas()
+        self.first_active_index: int | None = None
+        self.last_active_index: int | None = None
+        self.receipts: List[Tuple[int, Receipt]] = []
+
+    def ensure_operator(self, resp: str) -> Dict[str, Dict[int, Dict[str, int]]]:
+        self.operator_counts.setdefault(resp, {"ativos": 0, "inativos": 0, "valor_total": 0})
+        return self.operator_data.setdefault(resp, {"entradas": {}, "saidas": {}})
+
+    def bucket(self, resp: str, kind: str, index: int) -> Dict[str, int]:
+        return self.ensure_operator(resp)[kind].setdefault(index, {"quantidade": 0, "valor": 0})
+
+    def covers(self, index: int) -> bool:
+        return self.since <= index and (self.until is None or index < self.until)
+
+    def clamp(self, start: int, end: int) -> Tuple[int, int]:
+        return max(start, self.since), end if self.until is None else min(end, self.until - 1)
+
+    def add(self, client: ReportClient | Client) -> None:
+        if not isinstance(client, ReportClient):
+            client = ReportClient.from_client(client)
+        months = self.months
+        active_deltas = self.active_deltas
+        values = build_value_timeline(client)
+        self.receipts.append((client.id, client_receipts(client, values)))
+        transferencias = client.transferencias
+        timeline = build_ownership_timeline(client, transferencias)
+        covers = self.covers
+        entrada_index = month_index(client.entrada)
+        saida_index = month_index(client.saida) if client.saida else None
+        if saida_index is not None:
+            end_index = max(saida_index - 1, entrada_index)
+        else:
+            end_index = self.today_index
+        resp_entrada = responsavel_from_timeline(timeline, entrada_index)
+        if covers(entrada_index):
+            months.add(entrada_index)
+            self.bucket(resp_entrada, "entradas", entrada_index)["quantidade"] += 1
+
+        value_start_index = entrada_index + 1
+        can_register_value_entry = saida_index is None or value_start_index <= saida_index - 1
+        if can_register_value_entry and value_start_index <= self.today_index and covers(value_start_index):
+            months.add(value_start_index)
+            self.bucket(resp_entrada, "entradas", value_start_index)["valor"] += value_at(values, value_start_index)
 
         current_responsavel = resp_entrada
         for transferencia in transferencias:
-            mes_transferencia = month_key_from_date(transferencia.data)
-            months.add(mes_transferencia)
+            transfer_index = month_index(transferencia.data)
             resp_antigo = transferencia.responsavel_antigo or current_responsavel
             resp_novo = transferencia.responsavel_novo or resp_antigo
-            ensure_operator(resp_antigo)
-            ensure_operator(resp_novo)
-            transfer_exit_bucket = operator_data[resp_antigo]["saidas"][mes_transferencia]
+            current_responsavel = resp_novo
+            if not covers(transfer_index):
+                continue
+            months.add(transfer_index)
+            valor = value_at(values, transfer_index)
+            transfer_exit_bucket = self.bucket(resp_antigo, "saidas", transfer_index)
             transfer_exit_bucket["quantidade"] += 1
-            transfer_exit_bucket["valor"] += client.valor
-            transfer_entry_bucket = operator_data[resp_novo]["entradas"][mes_transferencia]
+            transfer_exit_bucket["valor"] += valor
+            transfer_entry_bucket = self.bucket(resp_novo, "entradas", transfer_index)
             transfer_entry_bucket["quantidade"] += 1
-            transfer_entry_bucket["valor"] += client.valor
-            current_responsavel = resp_novo
+            transfer_entry_bucket["valor"] += valor
 
-        if client.saida:
-            saida_mes = month_key_from_date(client.saida)
-            months.add(saida_mes)
-            resp_saida = get_responsavel_no_mes(client, saida_mes, transferencias)
-            ensure_operator(resp_saida)
-            exit_bucket = operator_data[resp_saida]["saidas"][saida_mes]
+        if saida_index is not None and covers(saida_index):
+            months.add(saida_index)
+            resp_saida = responsavel_from_timeline(timeline, saida_index)
+            exit_bucket = self.bucket(resp_saida, "saidas", saida_index)
             exit_bucket["quantidade"] += 1
-            exit_bucket["valor"] += client.valor
-
-        # Valores ativos
-        start_month = month_start(client.entrada)
-        if client.saida:
-            end_month = previous_month(client.saida)
-            if end_month < start_month:
-                end_month = start_month
-        else:
-            end_month = today_month
-
-        for month_date in iterate_months(start_month, end_month):
-            mes = month_key_from_date(month_date)
-            months.add(mes)
-            responsavel_no_mes = get_responsavel_no_mes(client, mes, transferencias)
-            ensure_operator(responsavel_no_mes)
-            ativa_bucket = operator_data[responsavel_no_mes]["ativos"][mes]
-            ativa_bucket["quantidade"] += 1
-            ativo_valor = client.valor if month_date >= value_start_month_date else Decimal("0")
-            ativa_bucket["valor"] += ativo_valor
-
-            revenue_bucket = monthly_revenue[mes]
-            if ativo_valor:
-                revenue_bucket["total"] += ativo_valor
-                if client.status == "ATIVO":
-                    revenue_bucket["ativos"] += ativo_valor
-                else:
-                    revenue_bucket["inativos"] += ativo_valor
-
-        responsavel_atual = client.responsavel
-        ensure_operator(responsavel_atual)
+            # The exit takes away the value of the last month the client was active.
+            exit_bucket["valor"] += value_at(values, end_index)
+
+        # Valores ativos, per interval of ownership and of value
+        start_index, end_index = self.clamp(entrada_index, end_index)
+        value_start_index = max(value_start_index, start_index)
+        if start_index <= end_index:
+            self._extend_active_range(start_index, end_index)
+            active_deltas.add_interval("clientes", start_index, end_index, 1)
+            for responsavel_no_mes, segment_start, segment_end in timeline_segments(
+                timeline, start_index, end_index
+            ):
+                self.ensure_operator(responsavel_no_mes)
+                active_deltas.add_interval((responsavel_no_mes, "quantidade"), segment_start, segment_end, 1)
+                for value_start, value_end, valor in value_segments(
+                    values, max(segment_start, value_start_index), segment_end
+                ):
+                    active_deltas.add_interval((responsavel_no_mes, "valor"), value_start, value_end, valor)
+            revenue_bucket_key = "ativos" if client.status == "ATIVO" else "inativos"
+            for value_start, value_end, valor in value_segments(values, value_start_index, end_index):
+                if valor:
+                    active_deltas.add_interval("total", value_start, value_end, valor)
+                    active_deltas.add_interval(revenue_bucket_key, value_start, value_end, valor)
+
+        self.ensure_operator(client.responsavel)
+        counts = self.operator_counts[client.responsavel]
         if client.status == "ATIVO":
-            operator_counts[responsavel_atual]["ativos"] += 1
+            counts["ativos"] += 1
+        else:
+            counts["inativos"] += 1
+        counts["valor_total"] += values[-1][1]
+
+    def _extend_active_range(self, start_index: int, end_index: int) -> None:
+        if self.first_active_index is None:
+            self.first_active_index, self.last_active_index = start_index, end_index
+        else:
+            self.first_active_index = min(self.first_active_index, start_index)
+            self.last_active_index = max(self.last_active_index, end_index)
+
+    def merge(self, other: OperatorReportAccumulator) -> OperatorReportAccumulator:
+        """Add the totals of ``other`` (built over different clients) into this one."""
+        for resp, info in other.operator_data.items():
+            for kind, buckets in info.items():
+                for index, values in buckets.items():
+                    bucket = self.bucket(resp, kind, index)
+                    bucket["quantidade"] += values["quantidade"]
+                    bucket["valor"] += values["valor"]
+        for resp, values in other.operator_counts.items():
+            self.ensure_operator(resp)
+            for field, value in values.items():
+                self.operator_counts[resp][field] += value
+        self.months |= other.months
+        self.active_deltas.merge(other.active_deltas)
+        if other.first_active_index is not None:
+            self._extend_active_range(other.first_active_index, other.last_active_index)
+        self.receipts.extend(other.receipts)
+        return self
+
+    def report(
+        self,
+        month_window: Tuple[str | None, str | None] | None = None,
+        client_order: List[int] | None = None,
+    ) -> Dict[str, object]:
+        """Assemble the report; ``client_order`` (client ids) orders the cashflow rows
+        when the clients were not added in the order of the original queryset."""
+        months = set(self.months)
+        active_deltas = self.active_deltas
+        if self.first_active_index is not None:
+            active_range = range(self.first_active_index, self.last_active_index + 1)
+            for index, active_clients in zip(active_range, active_deltas.prefix_sums("clientes", active_range)):
+                if active_clients > 0:
+                    months.add(index)
+
+        sorted_indices = sorted(months)
+        report_indices = sorted_indices
+        month_filter = {
+            "start": month_key_from_index(sorted_indices[0]) if sorted_indices else "",
+            "end": month_key_from_index(sorted_indices[-1]) if sorted_indices else "",
+        }
+        display_months = None
+        if month_window is not None:
+            start, end, display_months = resolve_month_window(
+                month_filter["start"], month_filter["end"], *month_window
+            )
+            month_filter = {"start": start, "end": end}
+            if display_months:
+                report_indices = sorted_indices[
+                    bisect_left(sorted_indices, month_index_from_key(display_months[0])):
+                    bisect_right(sorted_indices, month_index_from_key(display_months[-1]))
+                ]
+            else:
+                report_indices = []
+        # "YYYY-MM" keys are only produced here, for the report structure.
+        report_months = [month_key_from_index(index) for index in report_indices]
+        if display_months is None:
+            display_months, display_indices = report_months, report_indices
         else:
-            operator_counts[responsavel_atual]["inativos"] += 1
-        operator_counts[responsavel_atual]["valor_total"] += client.valor
-
-    sorted_months = sorted(months)
-    normalized_operators: Dict[str, Dict[str, Dict[str, Decimal]]] = {}
-    for resp, info in operator_data.items():
-        normalized_operators[resp] = {
-            "entradas": dict(info["entradas"]),
-            "saidas": dict(info["saidas"]),
-            "ativos": dict(info["ativos"]),
+            display_indices = [month_index_from_key(mes) for mes in display_months]
+        active_clients_by_month = active_deltas.prefix_sums("clientes", report_indices)
+
+        # Operators and months are emitted in sorted order, so the result does not
+        # depend on the order in which clients were added or accumulators merged.
+        operators: Dict[str, Dict[str, Dict[str, Dict[str, object]]]] = {}
+        for resp in sorted(self.operator_data):
+            info = self.operator_data[resp]
+            quantities = active_deltas.prefix_sums((resp, "quantidade"), report_indices)
+            values = active_deltas.prefix_sums((resp, "valor"), report_indices)
+            operators[resp] = {
+                "entradas": operator_month_buckets(info["entradas"], report_indices),
+                "saidas": operator_month_buckets(info["saidas"], report_indices),
+                "ativos": {
+                    mes: {"quantidade": quantidade, "valor": from_cents(valor)}
+                    for mes, quantidade, valor in zip(report_months, quantities, values)
+                    if quantidade > 0
+                },
+            }
+
+        monthly_revenue: Dict[str, Dict[str, Decimal]] = {}
+        revenue_columns = {
+            column: active_deltas.prefix_sums(column, report_indices) for column in ("total", "ativos", "inativos")
+        }
+        for position, mes in enumerate(report_months):
+            if active_clients_by_month[position] > 0:
+                monthly_revenue[mes] = {
+                    column: from_cents(values[position]) for column, values in revenue_columns.items()
+                }
+
+        operator_counts = {
+            resp: {**self.operator_counts[resp], "valor_total": from_cents(self.operator_counts[resp]["valor_total"])}
+            for resp in sorted(self.operator_counts)
         }
 
-    normalized_revenue = {mes: monthly_revenue[mes] for mes in sorted_months if mes in monthly_revenue}
+        receipts = self.receipts
+        if client_order is not None:
+            positions = {client_id: position for position, client_id in enumerate(client_order)}
+            receipts = sorted(receipts, key=lambda receipt: positions[receipt[0]])
+
+        series_reports = build_series_reports(self.operator_data, display_indices)
+        return {
+            "months": report_months,
+            "display_months": display_months,
+            "month_filter": month_filter,
+            "operators": operators,
+            "operator_totals": operator_counts,
+            "monthly_revenue": monthly_revenue,
+            "quantity_report": series_reports["quantity_report"],
+            "value_report": series_reports["value_report"],
+            "client_cashflow_report": cashflow_report_from_receipts(
+                [receipt for _, receipt in receipts], report_months, report_indices
+            ),
+        }
 
-    total_quantity_by_month = {mes: 0 for mes in sorted_months}
-    total_entries_by_month = {mes: 0 for mes in sorted_months}
-    total_exits_by_month = {mes: 0 for mes in sorted_months}
 
+def load_closed_months() -> OperatorReportAccumulator | None:
+    """Rebuild the accumulator of the months frozen in ``ClosedMonth`` (None when none is closed).
+
+    Its ``until`` is the first open month, which is where the live accumulation starts.
+    """
+    closed_months = list(ClosedMonth.objects.order_by("mes"))
+    if not closed_months:
+        return None
+    rows_by_month: Dict[int, List[ClosedOperatorMonth]] = defaultdict(list)
+    for row in ClosedOperatorMonth.objects.order_by("responsavel"):
+        rows_by_month[row.fechamento_id].append(row)
+
+    accumulator = OperatorReportAccumulator(until=month_index(closed_months[-1].mes) + 1)
+    running: Dict[object, int] = {}
+
+    def set_value(key: object, index: int, value: int) -> None:
+        # Stored figures are per-month totals; the accumulator keeps their differences.
+        previous = running.get(key, 0)
+        if value != previous:
+            accumulator.active_deltas.add_interval(key, index, None, value - previous)
+            running[key] = value
+
+    for closed in closed_months:
+        index = month_index(closed.mes)
+        set_value("clientes", index, closed.clientes)
+        set_value("total", index, to_cents(closed.receita_total))
+        set_value("ativos", index, to_cents(closed.receita_ativos))
+        set_value("inativos", index, to_cents(closed.receita_inativos))
+        if closed.clientes > 0:
+            accumulator._extend_active_range(index, index)
+        present = set()
+        for row in rows_by_month[closed.pk]:
+            info = accumulator.ensure_operator(row.responsavel)
+            for kind in ("entradas", "saidas"):
+                quantidade = getattr(row, f"{kind}_quantidade")
+                if quantidade is not None:
+                    accumulator.months.add(index)
+                    info[kind][index] = {"quantidade": quantidade, "valor": to_cents(getattr(row, f"{kind}_valor"))}
+            set_value((row.responsavel, "quantidade"), index, row.ativos_quantidade)
+            set_value((row.responsavel, "valor"), index, to_cents(row.ativos_valor))
+            present.add(row.responsavel)
+        for key in list(running):
+            if isinstance(key, tuple) and key[0] not in present:
+                set_value(key, index, 0)
+    for key in list(running):
+        set_value(key, accumulator.until, 0)
+    return accumulator
+
+
+def closed_months_for(clients) -> OperatorReportAccumulator | None:
+    """Frozen months describe the whole book, so only unfiltered client querysets use them."""
+    if isinstance(clients, QuerySet) and clients.model is Client and not clients.query.has_filters():
+        return load_closed_months()
+    return None
+
+
+def build_operator_reports(
+    clients: Iterable[ReportClient | Client], month_window: Tuple[str | None, str | None] | None = None
+) -> Dict[str, object]:
+    """Create structures that mimic the dashboard reports from the React app.
+
+    ``month_window`` takes the requested (mes_inicio, mes_fim); the per-month figures
+    are then only computed for that window (see ``resolve_month_window``), with the
+    cumulative series opening at the balance carried over from earlier months.
+
+    Money is accumulated in integer cents and only turned back into ``Decimal`` when
+    the result is assembled. ``clients`` is consumed once, so it can be a stream from
+    ``iter_report_clients`` (querysets are streamed that way); model instances are
+    converted one by one. For the full client queryset, months frozen by
+    ``close_months`` are read back instead of recomputed.
+    """
+    closed = closed_months_for(clients)
+    if isinstance(clients, QuerySet):
+        clients = iter_report_clients(clients)
+    accumulator = OperatorReportAccumulator(since=closed.until if closed else 0)
+    for client in clients:
+        accumulator.add(client)
+    if closed is not None:
+        accumulator.merge(closed)
+    return accumulator.report(month_window)
+
+
+def operator_month_buckets(
+    buckets: Dict[int, Dict[str, int]], indices: List[int]
+) -> Dict[str, Dict[str, object]]:
+    """Report form of an operator's entradas or saidas ``buckets`` (cents by month index):
+    the months from ``indices[0]`` to ``indices[-1]``, keyed "YYYY-MM", with ``Decimal`` values.
+
+    Empty buckets (a value entry of zero) are left out, as the snapshot table cannot
+    tell them from months without movement.
+    """
+    if not indices:
+        return {}
+    first, last = indices[0], indices[-1]
+    return {
+        month_key_from_index(index): {"quantidade": values["quantidade"], "valor": from_cents(values["valor"])}
+        for index, values in sorted(buckets.items())
+        if first <= index <= last and (values["quantidade"] or values["valor"])
+    }
+
+
+def build_series_reports(
+    operator_data: Dict[str, Dict[str, Dict[int, Dict[str, int]]]],
+    display_indices: List[int],
+    opening: Dict[str, Tuple[int, int]] | None = None,
+) -> Dict[str, object]:
+    """Build the cumulative quantity and value reports from per-operator entradas/saidas.
+
+    ``operator_data`` holds the buckets by month index with values in cents, as
+    ``OperatorReportAccumulator.operator_data`` does; "YYYY-MM" keys and ``Decimal``
+    values only appear in the series built here. Movements before ``display_indices[0]``
+    are folded into each operator's opening balance, so a window of months keeps the
+    cumulative figures of the full history. Callers that already have those balances
+    pass them as ``opening`` ((quantity, cents) per operator) and may then leave the
+    earlier buckets out of ``operator_data``.
+    """
+    months = [month_key_from_index(index) for index in display_indices]
+    positions = {index: position for position, index in enumerate(display_indices)}
+    first_index = display_indices[0] if display_indices else None
+    size = len(display_indices)
+
+    # Monthly totals are kept by position in ``display_indices``.
+    quantity_totals = [[0] * size for _ in range(3)]
+    value_totals = [[0] * size for _ in range(3)]
     quantity_rows = []
-    for resp in sorted(normalized_operators.keys()):
-        info = normalized_operators[resp]
-        running = 0
-        series = []
-        for mes in sorted_months:
-            entry_qty = info["entradas"].get(mes, {}).get("quantidade", 0)
-            exit_qty = info["saidas"].get(mes, {}).get("quantidade", 0)
-            running = running + entry_qty - exit_qty
-            if running < 0:
-                running = 0
-            series.append(
+    value_rows = []
+    for resp in sorted(operator_data):
+        info = operator_data[resp]
+        # entries/exits per position: quantity, quantity, cents, cents
+        moves = [[0] * size for _ in range(4)]
+        opening_quantity, opening_value = opening.get(resp, (0, 0)) if opening is not None else (0, 0)
+        earlier = []
+        for column, bucket in ((0, "entradas"), (1, "saidas")):
+            for index, values in info[bucket].items():
+                position = positions.get(index)
+                if position is not None:
+                    moves[column][position] += values["quantidade"]
+                    moves[column + 2][position] += values["valor"]
+                elif opening is None and first_index is not None and index < first_index:
+                    earlier.append(index)
+        for index in sorted(set(earlier)):
+            entry = info["entradas"].get(index)
+            exit_ = info["saidas"].get(index)
+            opening_quantity += (entry["quantidade"] if entry else 0) - (exit_["quantidade"] if exit_ else 0)
+            opening_value += (entry["valor"] if entry else 0) - (exit_["valor"] if exit_ else 0)
+            opening_quantity = max(opening_quantity, 0)
+            opening_value = max(opening_value, 0)
+
+        quantity_series = []
+        value_series = []
+        running_quantity, running_value = opening_quantity, opening_value
+        for position, mes in enumerate(months):
+            entry_qty, exit_qty = moves[0][position], moves[1][position]
+            entry_cents, exit_cents = moves[2][position], moves[3][position]
+            running_quantity = max(running_quantity + entry_qty - exit_qty, 0)
+            running_value = max(running_value + entry_cents - exit_cents, 0)
+            quantity_series.append({"month": mes, "cumulative": running_quantity, "entries": entry_qty, "exits": exit_qty})
+            value_series.append(
                 {
                     "month": mes,
-                    "cumulative": running,
-                    "entries": entry_qty,
-                    "exits": exit_qty,
+                    "cumulative": from_cents(running_value),
+                    "entries": from_cents(entry_cents),
+                    "exits": from_cents(exit_cents),
                 }
             )
-            total_entries_by_month[mes] += entry_qty
-            total_exits_by_month[mes] += exit_qty
-            total_quantity_by_month[mes] += running
-        quantity_rows.append({"name": resp, "series": series})
-
-    quantity_totals = [
-        {
-            "month": mes,
-            "cumulative": total_quantity_by_month[mes],
-            "entries": total_entries_by_month[mes],
-            "exits": total_exits_by_month[mes],
-        }
-        for mes in sorted_months
-    ]
-
-    total_value_by_month = {mes: Decimal("0") for mes in sorted_months}
-    total_value_entries_by_month = {mes: Decimal("0") for mes in sorted_months}
-    total_value_exits_by_month = {mes: Decimal("0") for mes in sorted_months}
+            for totals, figures in (
+                (quantity_totals, (running_quantity, entry_qty, exit_qty)),
+                (value_totals, (running_value, entry_cents, exit_cents)),
+            ):
+                for column, figure in enumerate(figures):
+                    totals[column][position] += figure
+        quantity_rows.append({"name": resp, "series": quantity_series})
+        value_rows.append({"name": resp, "series": value_series})
 
-    value_rows = []
-    for resp in sorted(normalized_operators.keys()):
-        info = normalized_operators[resp]
-        running = Decimal("0")
-        series = []
-        for mes in sorted_months:
-            entry_value = info["entradas"].get(mes, {}).get("valor", Decimal("0"))
-            exit_value = info["saidas"].get(mes, {}).get("valor", Decimal("0"))
-            running = running + entry_value - exit_value
-            if running < 0:
-                running = Decimal("0")
-            series.append(
+    return {
+        "quantity_report": {
+            "rows": quantity_rows,
+            "monthly_totals": [
+                {"month": mes, "cumulative": cumulative, "entries": entries, "exits": exits}
+                for mes, cumulative, entries, exits in zip(months, *quantity_totals)
+            ],
+        },
+        "value_report": {
+            "rows": value_rows,
+            "monthly_totals": [
                 {
                     "month": mes,
-                    "cumulative": running,
-                    "entries": entry_value,
-                    "exits": exit_value,
+                    "cumulative": from_cents(cumulative),
+                    "entries": from_cents(entries),
+                    "exits": from_cents(exits),
                 }
-            )
-            total_value_entries_by_month[mes] += entry_value
-            total_value_exits_by_month[mes] += exit_value
-            total_value_by_month[mes] += running
-        value_rows.append({"name": resp, "series": series})
-
-    value_totals = [
-        {
-            "month": mes,
-            "cumulative": total_value_by_month[mes],
-            "entries": total_value_entries_by_month[mes],
-            "exits": total_value_exits_by_month[mes],
-        }
-        for mes in sorted_months
-    ]
-
-    # Relatório por cliente (recebimentos)
-    def parse_iso(value) -> date | None:
-        if not value:
-            return None
-        if isinstance(value, date):
-            return value
-        return date.fromisoformat(str(value))
-
-    entry_count = {mes: 0 for mes in sorted_months}
-    entry_value = {mes: Decimal("0") for mes in sorted_months}
-    exit_count = {mes: 0 for mes in sorted_months}
-    exit_value = {mes: Decimal("0") for mes in sorted_months}
-    active_count = {mes: 0 for mes in sorted_months}
-    active_value = {mes: Decimal("0") for mes in sorted_months}
+                for mes, cumulative, entries, exits in zip(months, *value_totals)
+            ],
+        },
+    }
+
+
+class CashflowRow:
+    """One client's receipts over ``months[start:end]``, as runs of a constant value.
+
+    ``segments`` holds (first position, value) pairs, each lasting until the next one
+    (or ``end``), so the dense per-month list is only expanded (``values``) for the
+    rows that get rendered.
+    """
+
+    __slots__ = ("name", "start", "end", "segments", "size")
+
+    def __init__(self, name: str, start: int, end: int, segments: List[Tuple[int, Decimal]], size: int) -> None:
+        self.name = name
+        self.start = start
+        self.end = end
+        self.segments = segments
+        self.size = size
+
+    def runs(self) -> Iterator[Tuple[int, int, Decimal]]:
+        """Yield the non-empty (first, stop, value) runs inside ``start``..``end``."""
+        for position, (first, value) in enumerate(self.segments):
+            stop = self.segments[position + 1][0] if position + 1 < len(self.segments) else self.end
+            first, stop = max(first, self.start), min(stop, self.end)
+            if first < stop:
+                yield first, stop, value
+
+    @property
+    def values(self) -> List[Decimal]:
+        values = [Decimal("0")] * self.size
+        for first, stop, value in self.runs():
+            values[first:stop] = [value] * (stop - first)
+        return values
+
+    @property
+    def total(self) -> Decimal:
+        return sum((value * (stop - first) for first, stop, value in self.runs()), Decimal("0"))
+
+    def window(self, first: int, last: int) -> CashflowRow:
+        """Return the row restricted to ``months[first:last]``."""
+        start = min(max(self.start, first), last) - first
+        end = max(min(self.end, last), first) - first
+        segments = [(min(max(position, first), last) - first, value) for position, value in self.segments]
+        return CashflowRow(self.name, start, max(start, end), segments, last - first)
+
+
+# Orderings of the cashflow table offered by the dashboard: (row attribute, reverse).
+CASHFLOW_ORDERS = {
+    "nome": ("name", False),
+    "-nome": ("name", True),
+    "total": ("total", False),
+    "-total": ("total", True),
+}
+
+
+def cashflow_row_order(rows: Sequence[CashflowRow]) -> Dict[str, List[int]]:
+    """Positions of the ``rows`` with receipts, sorted for each of ``CASHFLOW_ORDERS``.
+
+    The lists are kept with the report, so a page of the dashboard table is a slice
+    of one of them and only that page's rows are expanded.
+    """
+    keys = {"name": [row.name for row in rows], "total": [row.total for row in rows]}
+    with_receipts = [position for position, total in enumerate(keys["total"]) if total > 0]
+    return {
+        ordem: sorted(with_receipts, key=keys[attribute].__getitem__, reverse=reverse)
+        for ordem, (attribute, reverse) in CASHFLOW_ORDERS.items()
+    }
+
+
+def parse_iso_date(value) -> date | None:
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def client_receipts(client: ReportClient, values: ValueTimeline | None = None) -> Receipt:
+    """Return (nome, first month index, last month index or None, value timeline) the client pays.
+
+    ``values`` is the client's ``build_value_timeline`` when the caller already has it.
+    """
+    entrada_date = parse_iso_date(client.entrada) or date.today()
+    receipt_end_index = None
+    if client.saida:
+        receipt_end_index = month_index(parse_iso_date(client.saida)) - 1
+    if values is None:
+        values = build_value_timeline(client)
+    return client.nome, month_index(entrada_date) + 1, receipt_end_index, values
+
+
+def cashflow_report_from_receipts(
+    receipts: List[Receipt], sorted_months: List[str], sorted_indices: List[int] | None = None
+) -> Dict[str, object]:
+    """Build the per-client receipts report (Fluxo de Clientes x Meses) over ``sorted_months``
+    from ``client_receipts`` tuples.
+
+    ``sorted_indices`` are the month indices of ``sorted_months`` when the caller has them.
+    """
+    if sorted_indices is None:
+        sorted_indices = [month_index_from_key(mes) for mes in sorted_months]
+    positions = {index: position for position, index in enumerate(sorted_indices)}
+
+    # Per-month figures are kept by position in ``sorted_months``.
+    entry_count = [0] * len(sorted_indices)
+    entry_value = [0] * len(sorted_indices)
+    exit_count = [0] * len(sorted_indices)
+    exit_value = [0] * len(sorted_indices)
+    receipt_deltas = MonthlyDeltas()
 
     client_rows = []
-    for client in sorted(clients, key=lambda c: c.nome):
-        entrada_date = parse_iso(client.entrada) or date.today()
-        receipt_start = add_months(month_start(entrada_date), 1)
-        receipt_end = None
-        if client.saida:
-            receipt_end = month_start(parse_iso(client.saida))
-
-        start_month_key = month_key_from_date(receipt_start)
-        if start_month_key in entry_count:
-            entry_count[start_month_key] += 1
-            entry_value[start_month_key] += client.valor
-
-        if receipt_end:
-            exit_month_key = month_key_from_date(receipt_end)
-            if exit_month_key in exit_count:
-                exit_count[exit_month_key] += 1
-                exit_value[exit_month_key] += client.valor
-
-        row_values = []
-        total_row = Decimal("0")
-        for mes in sorted_months:
-            month_date = month_str_to_date(mes)
-            receives = month_date >= receipt_start and (
-                not receipt_end or month_date < receipt_end
-            )
-            value = client.valor if receives else Decimal("0")
-            row_values.append(value)
-            if receives:
-                total_row += value
-                active_count[mes] += 1
-                active_value[mes] += value
-        client_rows.append({"name": client.nome, "values": row_values, "total": total_row})
-
-    def values_list(data: Dict[str, Decimal] | Dict[str, int]) -> List:
-        return [data[mes] for mes in sorted_months]
-
-    client_cashflow_report = {
+    for nome, receipt_start_index, receipt_end_index, values in sorted(receipts, key=lambda receipt: receipt[0]):
+        entry_position = positions.get(receipt_start_index)
+        if entry_position is not None:
+            entry_count[entry_position] += 1
+            entry_value[entry_position] += value_at(values, receipt_start_index)
+
+        exit_position = positions.get(receipt_end_index + 1) if receipt_end_index is not None else None
+        if exit_position is not None:
+            exit_count[exit_position] += 1
+            exit_value[exit_position] += value_at(values, receipt_end_index)
+
+        receipt_deltas.add_interval("count", receipt_start_index, receipt_end_index, 1)
+        first_position = bisect_left(sorted_indices, receipt_start_index)
+        if receipt_end_index is None:
+            last_position = len(sorted_indices)
+        else:
+            last_position = max(first_position, bisect_left(sorted_indices, receipt_end_index + 1))
+        segments = []
+        for value_start, value_end, cents in value_segments(values, receipt_start_index, receipt_end_index):
+            receipt_deltas.add_interval("value", value_start, value_end, cents)
+            segments.append((max(first_position, bisect_left(sorted_indices, value_start)), from_cents(cents)))
+        client_rows.append(CashflowRow(nome, first_position, last_position, segments, len(sorted_indices)))
+
+    def money_list(data: List[int]) -> List[Decimal]:
+        return [from_cents(cents) for cents in data]
+
+    active_count = receipt_deltas.prefix_sums("count", sorted_indices)
+    active_value = receipt_deltas.prefix_sums("value", sorted_indices)
+
+    return {
         "months": sorted_months,
         "rows": client_rows,
+        "order": cashflow_row_order(client_rows),
         "summary": {
-            "total_value": values_list(active_value),
+            "total_value": money_list(active_value),
             "active": {
-                "count": values_list(active_count),
-                "value": values_list(active_value),
+                "count": active_count,
+                "value": money_list(active_value),
             },
             "entries": {
-                "count": values_list(entry_count),
-                "value": values_list(entry_value),
+                "count": entry_count,
+                "value": money_list(entry_value),
             },
             "exits": {
-                "count": values_list(exit_count),
-                "value": values_list(exit_value),
+                "count": exit_count,
+                "value": money_list(exit_value),
             },
         },
     }
-
-    return {
-        "months": sorted_months,
-        "operators": normalized_operators,
-        "operator_totals": operator_counts,
-        "monthly_revenue": normalized_revenue,
-        "quantity_report": {
-            "rows": quantity_rows,
-            "monthly_totals": quantity_totals,
-        },
-        "value_report": {
-            "rows": value_rows,
-            "monthly_totals": value_totals,
-        },
-        "client_cashflow_report": client_cashflow_report,
-    }
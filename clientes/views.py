@@ -1,18 +1,28 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import hashlib
 import json
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Tuple
 import unicodedata
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
-from django.db.models import Sum
-from django.http import HttpRequest, HttpResponse, JsonResponse, HttpResponseForbidden
+from django.db.models import DateField, Q, Value
+from django.db.models.functions import Coalesce
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified, JsonResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.http import parse_etags, quote_etag
 @login_required
 def acesso_negado(request: HttpRequest) -> HttpResponse:
     return render(request, "clientes/acesso_negado.html", status=403)
@@ -35,18 +45,26 @@ from .forms import (
     TermometroChangeForm,
     ValorChangeForm,
 )
+from .facets import cached_client_facets, client_facets
+from .kpis import TERMOMETRO_LEVELS, client_kpis
 from .models import (
     AgendamentoAlinhamento,
     AgendamentoFechamento,
     Client,
     ClientHistory,
+    ClosedMonth,
     Consultor,
     Motivo,
+    OperatorMonthSnapshot,
     Razao,
     Responsavel,
     ReuniaoPreferencia,
 )
-from .utils import build_operator_reports
+from .report_cache import get_cached_reports, get_report_builder, get_reports_version, reports_version_batch
+from .report_file import get_file_reports
+from .search import ranked_clients, search_clients
+from .snapshots import operator_snapshot_batch
+from .utils import CASHFLOW_ORDERS
 
 
 def _normalize_text(value: str | None) -> str:
@@ -113,260 +131,305 @@ def _register_motivo_razao(motivo_nome: str | None, razao_nome: str | None, tipo
         _ensure_razao_entry(razao_nome, tipo, motivo)
 
 
-@login_required
-def dashboard(request: HttpRequest) -> HttpResponse:
-    if request.user.groups.filter(name="Agendamento").exists() and not (request.user.is_superuser or request.user.groups.filter(name="Administrador").exists()):
-        return redirect("clientes:agendamentos")
+CASHFLOW_PAGE_SIZE = 50
+CASHFLOW_MAX_PAGE_SIZE = 200
 
-    clients = Client.objects.prefetch_related("historico").all()
-    stats = {
-        "total": clients.count(),
-        "ativos": clients.filter(status="ATIVO").count(),
-        "inativos": clients.filter(status="INATIVO").count(),
-        "receita_ativa": clients.filter(status="ATIVO").aggregate(total=Sum("valor"))["total"] or 0,
-        "responsaveis": Responsavel.objects.count(),
-    }
-    reports = build_operator_reports(clients)
-    all_months = reports.get("months", [])
-    default_start = all_months[0] if all_months else ""
-    default_end = all_months[-1] if all_months else ""
-
-    requested_start = request.GET.get("mes_inicio") or default_start
-    requested_end = request.GET.get("mes_fim") or default_end
-
-    if requested_start and requested_end:
-        start_dt = _parse_month_value(requested_start) or _parse_month_value(default_start)
-        end_dt = _parse_month_value(requested_end) or _parse_month_value(default_end or requested_start)
-        if start_dt and end_dt and start_dt > end_dt:
-            start_dt, end_dt = end_dt, start_dt
-        start_month = f"{start_dt.year}-{start_dt.month:02d}" if start_dt else ""
-        end_month = f"{end_dt.year}-{end_dt.month:02d}" if end_dt else ""
-        visible_months = _month_range(start_month, end_month) if start_month and end_month else all_months
-    else:
-        start_month = requested_start
-        end_month = requested_end
-        visible_months = all_months
-    if not visible_months and all_months:
-        visible_months = all_months
-
-    quantity_report_filtered = _filter_series_report(reports.get("quantity_report"), visible_months)
-    value_report_filtered = _filter_series_report(reports.get("value_report"), visible_months)
-
-    combined_report = None
-    if quantity_report_filtered and value_report_filtered and visible_months:
-        q_map = {row["name"]: row["series"] for row in quantity_report_filtered.get("rows", [])}
-        v_map = {row["name"]: row["series"] for row in value_report_filtered.get("rows", [])}
-
-        def zero_series(months: list[str], zero_value):
-            return [
-                {"month": mes, "cumulative": zero_value, "entries": zero_value, "exits": zero_value}
-                for mes in months
-            ]
 
-        combined_rows = []
-        all_names = sorted(set(q_map.keys()) | set(v_map.keys()))
-        for name in all_names:
-            q_series = q_map.get(name) or zero_series(visible_months, 0)
-            v_series = v_map.get(name) or zero_series(visible_months, Decimal("0"))
-            months_data = []
-            for idx, mes in enumerate(visible_months):
-                q_value = q_series[idx] if idx < len(q_series) else {"month": mes, "cumulative": 0, "entries": 0, "exits": 0}
-                v_value = v_series[idx] if idx < len(v_series) else {
-                    "month": mes,
-                    "cumulative": Decimal("0"),
-                    "entries": Decimal("0"),
-                    "exits": Decimal("0"),
-                }
-                months_data.append(
-                    {
-                        "month": mes,
-                        "quantity": q_value,
-                        "value": v_value,
-                    }
-                )
-            combined_rows.append({"name": name, "months": months_data})
+def _dashboard_reports(month_window: Tuple[str, str]) -> Dict[str, object]:
+    if settings.REPORTS_SNAPSHOT_FILE:
+        return get_file_reports(month_window)
+    return get_cached_reports(get_report_builder(), month_window)
 
-        q_totals = quantity_report_filtered.get("monthly_totals", [])
-        v_totals = value_report_filtered.get("monthly_totals", [])
-        q_zero_total = {"cumulative": 0, "entries": 0, "exits": 0}
-        v_zero_total = {"cumulative": Decimal("0"), "entries": Decimal("0"), "exits": Decimal("0")}
-        combined_totals = []
-        for idx, mes in enumerate(visible_months):
-            q_total = q_totals[idx] if idx < len(q_totals) else q_zero_total
-            v_total = v_totals[idx] if idx < len(v_totals) else v_zero_total
-            combined_totals.append({"month": mes, "quantity": q_total, "value": v_total})
-
-        combined_report = {"rows": combined_rows, "monthly_totals": combined_totals}
-
-    client_cashflow_report = reports.get("client_cashflow_report")
-    cashflow_filtered = None
-    if client_cashflow_report and visible_months:
-        month_to_index = {m: i for i, m in enumerate(client_cashflow_report["months"])}
-        indices = [month_to_index[m] for m in visible_months if m in month_to_index]
-        if indices:
-            filtered_rows = []
-            for row in client_cashflow_report["rows"]:
-                values = [row["values"][i] for i in indices]
-                total = sum((Decimal(val) for val in values), Decimal("0"))
-                if total > 0:
-                    filtered_rows.append({"name": row["name"], "values": values, "total": total})
-
-            summary = client_cashflow_report["summary"]
-            def slice_series(series):
-                return [series[i] for i in indices]
-
-            def list_sum(values):
-                total = Decimal("0")
-                for val in values:
-                    total += val
-                return total
-
-            cashflow_filtered = {
-                "months": visible_months,
-                "rows": filtered_rows,
-                "summary": {
-                    "total_value": {
-                        "per_month": slice_series(summary["total_value"]),
-                        "total": list_sum(slice_series(summary["total_value"])),
-                    },
-                    "active": {
-                        "count": {
-                            "per_month": slice_series(summary["active"]["count"]),
-                            "total": sum(slice_series(summary["active"]["count"])),
-                        },
-                        "value": {
-                            "per_month": slice_series(summary["active"]["value"]),
-                            "total": list_sum(slice_series(summary["active"]["value"])),
-                        },
-                    },
-                    "entries": {
-                        "count": {
-                            "per_month": slice_series(summary["entries"]["count"]),
-                            "total": sum(slice_series(summary["entries"]["count"])),
-                        },
-                        "value": {
-                            "per_month": slice_series(summary["entries"]["value"]),
-                            "total": list_sum(slice_series(summary["entries"]["value"])),
-                        },
-                    },
-                    "exits": {
-                        "count": {
-                            "per_month": slice_series(summary["exits"]["count"]),
-                            "total": sum(slice_series(summary["exits"]["count"])),
-                        },
-                        "value": {
-                            "per_month": slice_series(summary["exits"]["value"]),
-                            "total": list_sum(slice_series(summary["exits"]["value"])),
-                        },
-                    },
+
+def _filter_cashflow_report(client_cashflow_report, visible_months: List[str]):
+    """Restrict the cashflow summary to the visible months.
+
+    The rows are passed through as they are: the report's months are the visible ones
+    that have data, and ``order`` already leaves out the rows without receipts.
+    """
+    if not client_cashflow_report or not visible_months:
+        return None
+    month_to_index = {m: i for i, m in enumerate(client_cashflow_report["months"])}
+    indices = [month_to_index[m] for m in visible_months if m in month_to_index]
+    if not indices:
+        return None
+
+    summary = client_cashflow_report["summary"]
+
+    def slice_series(series):
+        return [series[i] for i in indices]
+
+    def list_sum(values):
+        total = Decimal("0")
+        for val in values:
+            total += val
+        return total
+
+    return {
+        "months": visible_months,
+        "rows": client_cashflow_report["rows"],
+        "order": client_cashflow_report["order"],
+        "summary": {
+            "total_value": {
+                "per_month": slice_series(summary["total_value"]),
+                "total": list_sum(slice_series(summary["total_value"])),
+            },
+            "active": {
+                "count": {
+                    "per_month": slice_series(summary["active"]["count"]),
+                    "total": sum(slice_series(summary["active"]["count"])),
                 },
-            }
-    recentes = ClientHistory.objects.select_related("client").order_by("-data")[:10]
-    operator_chart_data = None
-    if quantity_report_filtered:
-        colors = [
-            "#2563eb",
-            "#7c3aed",
-            "#fb7185",
-            "#0ea5e9",
-            "#f97316",
-            "#059669",
-            "#a855f7",
-        ]
-        datasets = []
-        for idx, row in enumerate(quantity_report_filtered["rows"]):
-            datasets.append(
-                {
-                    "label": row["name"],
-                    "data": [float(value["cumulative"]) for value in row["series"]],
-                    "borderColor": colors[idx % len(colors)],
-                    "backgroundColor": colors[idx % len(colors)],
-                    "tension": 0.3,
-                    "fill": False,
-                }
-            )
-        operator_chart_data = json.dumps(
-            {
-                "type": "line",
-                "data": {"labels": visible_months, "datasets": datasets},
-                "options": {
-                    "responsive": True,
-                    "maintainAspectRatio": False,
-                    "interaction": {"mode": "index", "intersect": False},
-                    "scales": {
-                        "y": {
-                            "beginAtZero": True,
-                            "title": {"display": True, "text": "Quantidade"},
-                        }
-                    },
-                    "plugins": {
-                        "legend": {"position": "top"},
-                        "tooltip": {"enabled": True},
-                    },
+                "value": {
+                    "per_month": slice_series(summary["active"]["value"]),
+                    "total": list_sum(slice_series(summary["active"]["value"])),
                 },
-            }
-        )
+            },
+            "entries": {
+                "count": {
+                    "per_month": slice_series(summary["entries"]["count"]),
+                    "total": sum(slice_series(summary["entries"]["count"])),
+                },
+                "value": {
+                    "per_month": slice_series(summary["entries"]["value"]),
+                    "total": list_sum(slice_series(summary["entries"]["value"])),
+                },
+            },
+            "exits": {
+                "count": {
+                    "per_month": slice_series(summary["exits"]["count"]),
+                    "total": sum(slice_series(summary["exits"]["count"])),
+                },
+                "value": {
+                    "per_month": slice_series(summary["exits"]["value"]),
+                    "total": list_sum(slice_series(summary["exits"]["value"])),
+                },
+            },
+        },
+    }
+
+
+def _paginate_cashflow_rows(cashflow, params) -> Dict[str, object]:
+    """Filter, sort and slice the cashflow rows according to the request parameters.
+
+    Pages are cut from the report's pre-sorted ``order`` lists and only the rows of
+    the returned page are read, so the page size bounds both the work done here and
+    the size of the response.
+    """
+    rows = cashflow["rows"]
+    ordem = params.get("ordem") or "nome"
+    if ordem not in CASHFLOW_ORDERS:
+        ordem = "nome"
+    positions = cashflow["order"][ordem]
+    busca = _normalize_text(params.get("busca")).casefold()
+    if busca:
+        positions = [
+            position for position in positions if busca in _normalize_text(rows[position].name).casefold()
+        ]
+
+    try:
+        page_size = int(params.get("tamanho") or CASHFLOW_PAGE_SIZE)
+    except ValueError:
+        page_size = CASHFLOW_PAGE_SIZE
+    page_size = min(max(page_size, 1), CASHFLOW_MAX_PAGE_SIZE)
+    page = Paginator(positions, page_size).get_page(params.get("pagina"))
+    return {
+        "rows": [rows[position] for position in page.object_list],
+        "number": page.number,
+        "size": page_size,
+        "count": page.paginator.count,
+        "has_next": page.has_next(),
+        "ordem": ordem,
+        "busca": params.get("busca") or "",
+    }
+
+
+def _dashboard_month_window(request: HttpRequest) -> Tuple[str, str]:
+    return (request.GET.get("mes_inicio") or "", request.GET.get("mes_fim") or "")
+
+
+def _is_scheduling_only(user) -> bool:
+    return user.groups.filter(name="Agendamento").exists() and not is_admin(user)
+
+
+def _combined_report(quantity_report, value_report, visible_months: List[str]):
+    """Quantity and value series side by side, one row per operator."""
+    if not (quantity_report and value_report and visible_months):
+        return None
+    q_map = {row["name"]: row["series"] for row in quantity_report.get("rows", [])}
+    v_map = {row["name"]: row["series"] for row in value_report.get("rows", [])}
 
-    operator_value_chart_data = None
-    if value_report_filtered:
-        datasets = []
-        colors = [
-            "#d946ef",
-            "#22d3ee",
-            "#f97316",
-            "#14b8a6",
-            "#6366f1",
-            "#f43f5e",
+    def zero_series(months: list[str], zero_value):
+        return [
+            {"month": mes, "cumulative": zero_value, "entries": zero_value, "exits": zero_value}
+            for mes in months
         ]
-        for idx, row in enumerate(value_report_filtered["rows"]):
-            datasets.append(
+
+    combined_rows = []
+    all_names = sorted(set(q_map.keys()) | set(v_map.keys()))
+    for name in all_names:
+        q_series = q_map.get(name) or zero_series(visible_months, 0)
+        v_series = v_map.get(name) or zero_series(visible_months, Decimal("0"))
+        months_data = []
+        for idx, mes in enumerate(visible_months):
+            q_value = q_series[idx] if idx < len(q_series) else {"month": mes, "cumulative": 0, "entries": 0, "exits": 0}
+            v_value = v_series[idx] if idx < len(v_series) else {
+                "month": mes,
+                "cumulative": Decimal("0"),
+                "entries": Decimal("0"),
+                "exits": Decimal("0"),
+            }
+            months_data.append(
                 {
-                    "label": row["name"],
-                    "data": [float(value["cumulative"]) for value in row["series"]],
-                    "borderColor": colors[idx % len(colors)],
-                    "backgroundColor": colors[idx % len(colors)],
-                    "tension": 0.3,
-                    "fill": False,
+                    "month": mes,
+                    "quantity": q_value,
+                    "value": v_value,
                 }
             )
-        operator_value_chart_data = json.dumps(
-            {
-                "type": "line",
-                "data": {"labels": visible_months, "datasets": datasets},
-                "options": {
-                    "responsive": True,
-                    "maintainAspectRatio": False,
-                    "interaction": {"mode": "index", "intersect": False},
-                    "scales": {
-                        "y": {
-                            "beginAtZero": True,
-                            "title": {"display": True, "text": "Valores"},
-                        }
-                    },
-                    "plugins": {
-                        "legend": {"position": "top"},
-                        "tooltip": {"enabled": True},
-                    },
-                },
-            }
-        )
+        combined_rows.append({"name": name, "months": months_data})
+
+    q_totals = quantity_report.get("monthly_totals", [])
+    v_totals = value_report.get("monthly_totals", [])
+    q_zero_total = {"cumulative": 0, "entries": 0, "exits": 0}
+    v_zero_total = {"cumulative": Decimal("0"), "entries": Decimal("0"), "exits": Decimal("0")}
+    combined_totals = []
+    for idx, mes in enumerate(visible_months):
+        q_total = q_totals[idx] if idx < len(q_totals) else q_zero_total
+        v_total = v_totals[idx] if idx < len(v_totals) else v_zero_total
+        combined_totals.append({"month": mes, "quantity": q_total, "value": v_total})
+
+    return {"rows": combined_rows, "monthly_totals": combined_totals}
+
+
+# Sections of the dashboard loaded after the page shell, each by its own request.
+DASHBOARD_SECTIONS = ("quantidade", "valores", "combinado", "fluxo")
+
+
+@login_required
+def dashboard(request: HttpRequest) -> HttpResponse:
+    """Page shell with the KPIs; the report sections are fetched from ``dashboard_section``."""
+    if _is_scheduling_only(request.user):
+        return redirect("clientes:agendamentos")
 
+    month_window = _dashboard_month_window(request)
     context = {
-        "stats": stats,
-        "reports": reports,
-        "display_months": visible_months,
-        "quantity_report": quantity_report_filtered,
-        "value_report": value_report_filtered,
-        "combined_report": combined_report,
-        "client_cashflow_report": cashflow_filtered,
-        "operator_chart_data": operator_chart_data,
-        "operator_value_chart_data": operator_value_chart_data,
-        "month_filter": {"start": start_month, "end": end_month},
-        "recentes": recentes,
+        "stats": client_kpis(Client.objects.all()),
+        "month_filter": {"start": month_window[0], "end": month_window[1]},
+        "recentes": ClientHistory.objects.select_related("client").order_by("-data")[:10],
     }
     return render(request, "clientes/dashboard.html", context)
 
 
+@login_required
+def dashboard_section(request: HttpRequest, secao: str) -> JsonResponse:
+    """One report section of the dashboard, as rendered HTML in JSON."""
+    if _is_scheduling_only(request.user):
+        return JsonResponse({"error": "Acesso negado"}, status=403)
+    if secao not in DASHBOARD_SECTIONS:
+        return JsonResponse({"error": "Seção inválida"}, status=404)
+
+    reports = _dashboard_reports(_dashboard_month_window(request))
+    visible_months = reports["display_months"]
+    month_filter = reports["month_filter"]
+    quantity_report = reports["quantity_report"] if visible_months else None
+    value_report = reports["value_report"] if visible_months else None
+    payload = {"month_filter": month_filter, "stale": reports.get("stale", False)}
+    context = {"display_months": visible_months, "month_filter": month_filter}
+    if secao == "quantidade":
+        context["quantity_report"] = quantity_report
+        payload["has_data"] = bool(quantity_report)
+    elif secao == "valores":
+        context["value_report"] = value_report
+        payload["has_data"] = bool(value_report)
+    elif secao == "combinado":
+        context["combined_report"] = _combined_report(quantity_report, value_report, visible_months)
+        payload["has_data"] = bool(context["combined_report"])
+    else:
+        cashflow = _filter_cashflow_report(reports.get("client_cashflow_report"), visible_months)
+        if cashflow:
+            first_page = _paginate_cashflow_rows(cashflow, request.GET)
+            cashflow["rows"] = first_page["rows"]
+            cashflow["page"] = first_page
+        context["client_cashflow_report"] = cashflow
+        payload["has_data"] = bool(cashflow)
+    payload["html"] = render_to_string(f"clientes/partials/dashboard_{secao}.html", context, request=request)
+    return JsonResponse(payload)
+
+
+def _dashboard_charts_etag(month_window: Tuple[str, str]) -> str:
+    """Strong ETag of the chart data: same data version, month, window and engine, same bytes."""
+    source = "arquivo" if settings.REPORTS_SNAPSHOT_FILE else getattr(settings, "REPORTS_BACKEND", "snapshot")
+    key = f"{get_reports_version()}:{date.today():%Y-%m}:{month_window!r}:{source}"
+    return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+
+@login_required
+def dashboard_charts(request: HttpRequest) -> HttpResponse:
+    """Cumulative series of the operator charts in columnar form.
+
+    The months are listed once and every operator gets one array per chart. Responses
+    carry an ETag tied to the report data version, so a repeat view whose data did
+    not change gets a 304 without the reports being read.
+    """
+    if _is_scheduling_only(request.user):
+        return JsonResponse({"error": "Acesso negado"}, status=403)
+
+    month_window = _dashboard_month_window(request)
+    etag = _dashboard_charts_etag(month_window)
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    reports = _dashboard_reports(month_window)
+    visible_months = reports["display_months"]
+
+    def columns(series_report):
+        if not visible_months or not series_report:
+            return None
+        return {row["name"]: [float(value["cumulative"]) for value in row["series"]] for row in series_report["rows"]}
+
+    response = JsonResponse(
+        {
+            "months": visible_months,
+            "quantidade": columns(reports["quantity_report"]),
+            "valor": columns(reports["value_report"]),
+            "stale": reports.get("stale", False),
+        }
+    )
+    # A stale report must not be remembered under the current version's tag.
+    if not reports.get("stale"):
+        response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@login_required
+def dashboard_cashflow(request: HttpRequest) -> JsonResponse:
+    """Cashflow table rows for the dashboard, one page at a time."""
+    if _is_scheduling_only(request.user):
+        return JsonResponse({"error": "Acesso negado"}, status=403)
+
+    reports = _dashboard_reports(_dashboard_month_window(request))
+    cashflow = _filter_cashflow_report(reports.get("client_cashflow_report"), reports["display_months"])
+    stale = reports.get("stale", False)
+    if not cashflow:
+        return JsonResponse({"months": [], "rows": [], "page": 1, "count": 0, "has_next": False, "stale": stale})
+
+    page = _paginate_cashflow_rows(cashflow, request.GET)
+    return JsonResponse(
+        {
+            "months": cashflow["months"],
+            "rows": [
+                {"name": row.name, "values": row.values, "total": row.total} for row in page["rows"]
+            ],
+            "page": page["number"],
+            "count": page["count"],
+            "has_next": page["has_next"],
+            "stale": stale,
+        }
+    )
+
+
 @user_passes_test(is_admin, login_url='clientes:acesso_negado')
 def financeiro_view(request: HttpRequest) -> HttpResponse:
     """
@@ -417,9 +480,13 @@ def _filter_clients_queryset(request: HttpRequest):
     value_max = _safe_parse_decimal(value_max_raw)
 
     if search_nome:
-        clients = clients.filter(nome__icontains=search_nome)
+        clients = search_clients(clients, search_nome)
     if search_responsavel:
-        clients = clients.filter(responsavel__icontains=search_responsavel)
+        # Names with no Responsavel row (removed operators) have no key: match the name itself.
+        clients = clients.filter(
+            Q(responsavel_ref__in=Responsavel.objects.filter(nome__icontains=search_responsavel).values("id"))
+            | Q(responsavel_ref__isnull=True, responsavel__icontains=search_responsavel)
+        )
     if filter_status in {"ATIVO", "INATIVO"}:
         clients = clients.filter(status=filter_status)
     if filter_termometro and filter_termometro.isdigit():
@@ -449,22 +516,157 @@ def _filter_clients_queryset(request: HttpRequest):
     return clients.order_by("nome"), filters
 
 
+CLIENT_PAGE_SIZE = 50
+CLIENT_SEARCH_LIMIT = 10
+CLIENT_MAX_PAGE_SIZE = 200
+# Sort keys accepted by client_list (?ordem=chave or ?ordem=-chave) and the column each
+# one orders by; the id breaks ties, so (column, id) identifies a row for the cursors.
+CLIENT_SORT_FIELDS = {
+    "nome": "nome",
+    "termometro": "termometro",
+    "responsavel": "responsavel",
+    "status": "status",
+    "entrada": "entrada",
+    "saida": "saida_ordem",
+    "valor": "valor",
+}
+
+
+def _encode_client_cursor(client: Client, field: str) -> str:
+    payload = json.dumps([getattr(client, field), client.pk], cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_client_cursor(token: str | None, field: str) -> Tuple[object, int] | None:
+    """Return the (sort value, id) a cursor points at, or None when it is missing or invalid."""
+    if not token:
+        return None
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        model_field = Client._meta.get_field("saida" if field == "saida_ordem" else field)
+        return model_field.to_python(value), int(pk)
+    except (ValueError, TypeError, ValidationError, binascii.Error):
+        return None
+
+
+def _paginate_clients(clients, params) -> Dict[str, object]:
+    """Return one page of ``clients`` by keyset (seek) pagination.
+
+    Rows are ordered by the whitelisted ``ordem`` column and the id. The ``depois``
+    and ``antes`` cursors hold the (column, id) of the last/first row of the current
+    page and the next query seeks past them, so every page costs the same however
+    deep it is, unlike OFFSET.
+    """
+    ordem = params.get("ordem") or "nome"
+    descending = ordem.startswith("-")
+    key = ordem[1:] if descending else ordem
+    if key not in CLIENT_SORT_FIELDS:
+        ordem, key, descending = "nome", "nome", False
+    field = CLIENT_SORT_FIELDS[key]
+    if field == "saida_ordem":
+        # Clients without an exit sort after every date.
+        clients = clients.annotate(saida_ordem=Coalesce("saida", Value(date.max), output_field=DateField()))
+
+    try:
+        page_size = int(params.get("tamanho") or CLIENT_PAGE_SIZE)
+    except ValueError:
+        page_size = CLIENT_PAGE_SIZE
+    page_size = min(max(page_size, 1), CLIENT_MAX_PAGE_SIZE)
+
+    backwards = False
+    cursor = _decode_client_cursor(params.get("depois"), field)
+    if cursor is None:
+        cursor = _decode_client_cursor(params.get("antes"), field)
+        backwards = cursor is not None
+
+    # Going back reads the rows before the cursor in reverse order, then flips them.
+    ascending = descending == backwards
+    rows = clients.order_by(field, "id") if ascending else clients.order_by(f"-{field}", "-id")
+    if cursor is not None:
+        value, pk = cursor
+        lookup = "gt" if ascending else "lt"
+        rows = rows.filter(Q(**{f"{field}__{lookup}": value}) | Q(**{field: value, f"id__{lookup}": pk}))
+    rows = list(rows[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    has_next = True if backwards else has_more
+    has_previous = has_more if backwards else cursor is not None
+    return {
+        "rows": rows,
+        "ordem": ordem,
+        "key": key,
+        "descending": descending,
+        "next_cursor": _encode_client_cursor(rows[-1], field) if rows and has_next else None,
+        "previous_cursor": _encode_client_cursor(rows[0], field) if rows and has_previous else None,
+    }
+
+
+def _client_list_url(params, **updates) -> str:
+    """client_list URL keeping the current filters; cursors are always reset unless given."""
+    query = params.copy()
+    for name in ("depois", "antes"):
+        query.pop(name, None)
+    for name, value in updates.items():
+        query[name] = value
+    query_string = query.urlencode()
+    url = reverse("clientes:client_list")
+    return f"{url}?{query_string}" if query_string else url
+
+
 @user_passes_test(is_admin, login_url='clientes:acesso_negado')
 def client_list(request: HttpRequest) -> HttpResponse:
     clients, filters = _filter_clients_queryset(request)
-    query_string = request.GET.urlencode()
+    page = _paginate_clients(clients, request.GET)
+    query = request.GET.copy()
+    for name in ("depois", "antes", "ordem", "tamanho"):
+        query.pop(name, None)
+    query_string = query.urlencode()
     export_url = reverse("clientes:client_export")
     if query_string:
         export_url = f"{export_url}?{query_string}"
+
+    sort_links = {}
+    for key in CLIENT_SORT_FIELDS:
+        active = key == page["key"]
+        sort_links[key] = {
+            "url": _client_list_url(request.GET, ordem=f"-{key}" if active and not page["descending"] else key),
+            "indicator": ("▼" if page["descending"] else "▲") if active else "↕",
+        }
+    facets = client_facets(clients) if any(filters.values()) else cached_client_facets()
     context = {
-        "clients": clients,
+        "clients": page["rows"],
         "filters": filters,
-        "responsaveis": _get_responsavel_suggestions(),
+        "status_options": [
+            (value, label, facets["status"].get(value, 0)) for value, label in Client.STATUS_CHOICES
+        ],
+        "termometro_options": [(str(level), facets["termometro"].get(level, 0)) for level in TERMOMETRO_LEVELS],
+        "responsavel_options": [
+            (nome, facets["responsavel"].get(pk, 0))
+            for pk, nome in Responsavel.objects.order_by("nome").values_list("id", "nome")
+        ],
         "export_url": export_url,
+        "ordem": page["ordem"],
+        "sort_links": sort_links,
+        "next_url": _client_list_url(request.GET, depois=page["next_cursor"]) if page["next_cursor"] else None,
+        "previous_url": (
+            _client_list_url(request.GET, antes=page["previous_cursor"]) if page["previous_cursor"] else None
+        ),
     }
     return render(request, "clientes/client_list.html", context)
 
 
+@user_passes_test(is_admin, login_url='clientes:acesso_negado')
+def client_search(request: HttpRequest) -> JsonResponse:
+    """Best matches for the name typed in the client list filter (?q=)."""
+    clients = ranked_clients(Client.objects.all(), request.GET.get("q"), CLIENT_SEARCH_LIMIT)
+    return JsonResponse(
+        {"results": [{"id": client.pk, "nome": client.nome, "responsavel": client.responsavel} for client in clients]}
+    )
+
+
 @login_required
 def reunioes_lista(request: HttpRequest) -> HttpResponse:
     alinhamentos_qs = (
@@ -988,97 +1190,6 @@ def _parse_boolean_flag(value, default=True) -> bool:
     return default
 
 
-def _parse_month_value(value: str | None) -> datetime | None:
-    if not value:
-        return None
-    try:
-        return datetime.strptime(value, "%Y-%m")
-    except ValueError:
-        return None
-
-
-def _month_range(start: str, end: str) -> list[str]:
-    start_dt = _parse_month_value(start)
-    end_dt = _parse_month_value(end)
-    if not start_dt or not end_dt or start_dt > end_dt:
-        return []
-    months = []
-    current = datetime(start_dt.year, start_dt.month, 1)
-    while current <= end_dt:
-        months.append(f"{current.year}-{current.month:02d}")
-        year = current.year + (1 if current.month == 12 else 0)
-        month = 1 if current.month == 12 else current.month + 1
-        current = datetime(year, month, 1)
-    return months
-
-
-def _filter_series_report(report: Dict[str, object] | None, months: list[str]):
-    if not report or not months:
-        return None
-
-    def zero_like(example):
-        return Decimal("0") if isinstance(example, Decimal) else 0
-
-    filtered_rows = []
-    for row in report.get("rows", []):
-        series = row.get("series", [])
-        if not series:
-            continue
-        zero_entry = zero_like(series[0]["entries"])
-        zero_exit = zero_like(series[0]["exits"])
-        zero_cumulative = zero_like(series[0]["cumulative"])
-
-        last_cumulative = zero_cumulative
-        for value in series:
-            if value["month"] < months[0]:
-                last_cumulative = value["cumulative"]
-            else:
-                break
-
-        value_map = {value["month"]: value for value in series}
-        filtered_series = []
-        for mes in months:
-            base_value = value_map.get(mes)
-            if base_value:
-                last_cumulative = base_value["cumulative"]
-                entries = base_value["entries"]
-                exits = base_value["exits"]
-            else:
-                entries = zero_entry
-                exits = zero_exit
-            filtered_series.append(
-                {"month": mes, "cumulative": last_cumulative, "entries": entries, "exits": exits}
-            )
-        filtered_rows.append({"name": row.get("name", "—"), "series": filtered_series})
-
-    totals = report.get("monthly_totals", [])
-    zero_total = zero_like(totals[0]["cumulative"]) if totals else 0
-    zero_total_entry = zero_like(totals[0]["entries"]) if totals else 0
-    zero_total_exit = zero_like(totals[0]["exits"]) if totals else 0
-    last_total_cumulative = zero_total
-    for total in totals:
-        if total["month"] < months[0]:
-            last_total_cumulative = total["cumulative"]
-        else:
-            break
-    totals_map = {total["month"]: total for total in totals}
-    filtered_totals = []
-    for mes in months:
-        base_total = totals_map.get(mes)
-        if base_total:
-            last_total_cumulative = base_total["cumulative"]
-            entries = base_total["entries"]
-            exits = base_total["exits"]
-        else:
-            entries = zero_total_entry
-            exits = zero_total_exit
-        filtered_totals.append(
-            {"month": mes, "cumulative": last_total_cumulative, "entries": entries, "exits": exits}
-        )
-
-    return {"rows": filtered_rows, "monthly_totals": filtered_totals}
-
-
 @user_passes_test(is_admin, login_url='clientes:acesso_negado')
 def import_clients(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
@@ -1205,7 +1316,7 @@ def import_clients(request: HttpRequest) -> HttpResponse:
                     {"form": ImportClientsForm(), "import_errors": errors},
                 )
 
-            with transaction.atomic():
+            with reports_version_batch(), transaction.atomic(), operator_snapshot_batch():
                 for data in pending:
                     client = Client.objects.create(**data)
                     Responsavel.objects.get_or_create(nome=client.responsavel)
@@ -1546,9 +1657,11 @@ def clear_database(request: HttpRequest) -> HttpResponse:
     if request.method != "POST":
         return redirect("clientes:dashboard")
 
-    with transaction.atomic():
+    with reports_version_batch(), transaction.atomic(), operator_snapshot_batch(recompute=True):
         ClientHistory.objects.all().delete()
         Client.objects.all().delete()
+        OperatorMonthSnapshot.objects.all().delete()
+        ClosedMonth.objects.all().delete()
         Responsavel.objects.all().delete()
         Motivo.objects.all().delete()
         Razao.objects.all().delete()
@@ -1586,8 +1699,9 @@ def agendamentos_api_list(request: HttpRequest) -> JsonResponse:
 
     data = []
     for client in clients:
-        pref_alinhamento = client.preferencias_reuniao.filter(tipo="ALINHAMENTO").first()
-        pref_fechamento = client.preferencias_reuniao.filter(tipo="FECHAMENTO").first()
+        prefs = {pref.tipo: pref for pref in client.preferencias_reuniao.all()}
+        pref_alinhamento = prefs.get("ALINHAMENTO")
+        pref_fechamento = prefs.get("FECHAMENTO")
         
         c_alinhamento = alinhamentos.get(client.id)
         c_fechamento = fechamentos.get(client.id)
@@ -94,6 +94,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than memory, so the worker processes of the parallel report
+        # engine can read the test data too.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -106,6 +109,33 @@ if config('DATABASE_URL', default=None):
     )
 
 
+# Cache (shared by every gunicorn worker on the host, so the report version
+# bumped by one worker invalidates the dashboard cache of all of them)
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+    }
+}
+
+REPORTS_CACHE_TIMEOUT = config('REPORTS_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Dashboard report engine: "snapshot" (monthly summary table), "python", "sql" or
+# "parallel" (python engine split across processes).
+REPORTS_BACKEND = config('REPORTS_BACKEND', default='snapshot')
+
+# Processes used by the parallel report engine and warm_reports (0 = one per CPU).
+REPORTS_PARALLEL_WORKERS = config('REPORTS_PARALLEL_WORKERS', default=0, cast=int)
+
+# Directory of the lock files that let a single worker rebuild the reports at a time.
+REPORTS_LOCK_DIR = config('REPORTS_LOCK_DIR', default=str(BASE_DIR / '.cache'))
+
+# Optional binary report snapshot shared by the web workers through mmap, built with the
+# REPORTS_BACKEND engine. When set (e.g. .cache/reports.bin), the dashboard reads it instead
+# of the report cache; empty (the default) keeps the cache.
+REPORTS_SNAPSHOT_FILE = config('REPORTS_SNAPSHOT_FILE', default='')
 
 
 # Password validation